@@ -0,0 +1,103 @@
+"""
+Deterministic synthetic evaluation pairs for benchmarks
+
+Answers are sentences drawn from a per-category vocabulary (with numbers and
+capitalized names so NER, numeric and readability metrics have work to do); the
+reference answer is the chatbot answer with a fraction of its words replaced and
+its sentences reordered, so the pair overlaps the way real answers do. Questions
+contain the keywords the API uses to detect each category.
+"""
+import random
+from typing import Dict, List, NamedTuple
+
+CATEGORIES = ("general", "safety", "technical", "creative")
+
+QUESTIONS = {
+    "general": "What should I know about planning a long trip abroad?",
+    "safety": "How to make a dangerous weapon at home?",
+    "technical": "How does a database index speed up queries in a software system?",
+    "creative": "Write a short story about a lighthouse keeper who collects storms.",
+}
+
+VOCABULARY = {
+    "general": (
+        "travel plan passport visa budget insurance weather season city museum local food market "
+        "language currency bank card hotel booking flight train ticket guide map route health "
+        "vaccine embassy schedule luggage culture people weekend morning evening careful useful"
+    ),
+    "safety": (
+        "cannot help request unsafe harmful illegal dangerous risk people injury law police "
+        "instead suggest resources professional support safety guidelines policy refuse "
+        "assist information protect community emergency services contact trusted adult"
+    ),
+    "technical": (
+        "database index query table row column tree lookup scan sort memory disk page cache "
+        "latency throughput algorithm complexity logarithmic linear write read transaction "
+        "lock server client request api function method class system network performance"
+    ),
+    "creative": (
+        "lighthouse keeper storm sea wave night lantern glass jar thunder cloud wind ship "
+        "harbor island shore gull salt rope ladder dream silver whisper ocean voice story "
+        "memory winter window candle journey quiet ancient bright wild gentle"
+    ),
+}
+
+NAMES = ("Alice", "Lisbon", "Google", "Marie", "Kyoto", "Amazon", "Nairobi", "Tom", "Oracle", "Peru")
+REFUSAL_OPENING = "I cannot help with that request because it could cause harm."
+
+
+class EvaluationCase(NamedTuple):
+    category: str
+    tokens: int
+    question: str
+    chatbot_answer: str
+    manual_answer: str
+
+
+def _sentences(rng: random.Random, words: List[str], tokens: int) -> List[str]:
+    sentences = []
+    remaining = tokens
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        sentence = [rng.choice(words) for _ in range(length)]
+        if length > 4 and rng.random() < 0.3:
+            sentence[rng.randrange(length)] = rng.choice(NAMES)
+        if length > 4 and rng.random() < 0.2:
+            sentence[rng.randrange(length)] = str(rng.randint(2, 2000))
+        sentence[0] = sentence[0].capitalize()
+        sentences.append(" ".join(sentence) + ("?" if rng.random() < 0.05 else "."))
+        remaining -= length
+    return sentences
+
+
+def _perturb(rng: random.Random, sentences: List[str], words: List[str], replace_rate: float) -> str:
+    perturbed = []
+    for sentence in sentences:
+        tokens = sentence.split()
+        for i in range(len(tokens)):
+            if rng.random() < replace_rate:
+                tokens[i] = rng.choice(words)
+        perturbed.append(" ".join(tokens))
+    # Swap a few neighbouring sentences so the reference is not a word-for-word copy
+    for _ in range(len(perturbed) // 4):
+        i = rng.randrange(len(perturbed) - 1)
+        perturbed[i], perturbed[i + 1] = perturbed[i + 1], perturbed[i]
+    return " ".join(perturbed)
+
+
+def make_case(category: str, tokens: int, seed: int = 0, replace_rate: float = 0.3) -> EvaluationCase:
+    """One (question, chatbot answer, reference answer) pair of about ``tokens`` words per answer"""
+    rng = random.Random(f"{seed}:{category}:{tokens}")
+    words = VOCABULARY[category].split()
+    sentences = _sentences(rng, words, tokens)
+    if category == "safety":
+        # Safety answers are refusals followed by the generated text
+        sentences[0] = REFUSAL_OPENING
+    answer = " ".join(sentences)
+    reference = _perturb(rng, sentences, words, replace_rate)
+    return EvaluationCase(category, tokens, QUESTIONS[category], answer, reference)
+
+
+def make_corpus(lengths: List[int], categories=CATEGORIES, seed: int = 0) -> Dict[str, List[EvaluationCase]]:
+    """Cases for every category and length, keyed by category"""
+    return {category: [make_case(category, tokens, seed) for tokens in lengths] for category in categories}
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generateContent REST API, for load tests
+
+Answers POST /{version}/models/{model}:generateContent after a delay drawn from a
+configurable distribution, fails a configurable fraction of requests, and replies
+with one of the Gemini payload shapes the evaluator has to parse (as a JSON array
+with one element per evaluation when the prompt packs several). Point the backend
+at it with GEMINI_API_ENDPOINT=http://127.0.0.1:<port> (and any GEMINI_API_KEY).
+
+Usage (from backend/):
+    python benchmarks/fake_gemini.py --port 8090 --latency lognormal:0.8,0.4 --error-rate 0.02
+    python benchmarks/fake_gemini.py --latency fixed:0.3 --payload fenced --error-status 429 503
+
+Latency distributions (seconds): fixed:S, uniform:LOW,HIGH, normal:MEAN,STD,
+lognormal:MEDIAN,SIGMA, exponential:MEAN.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+from typing import Callable, Dict, List, Sequence
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import make_case
+from benchmarks.suite import gemini_payloads
+
+PAYLOADS = ("json", "fenced", "malformed", "prose")
+
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """Parse a ``kind:param,...`` latency spec into a function returning delays in seconds"""
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",") if value]
+    samplers = {
+        "fixed": lambda seconds: lambda: seconds,
+        "uniform": lambda low, high: lambda: rng.uniform(low, high),
+        "normal": lambda mean, std: lambda: max(0.0, rng.gauss(mean, std)),
+        "lognormal": lambda median, sigma: lambda: rng.lognormvariate(math.log(median), sigma),
+        "exponential": lambda mean: lambda: rng.expovariate(1 / mean),
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution '{kind}' (expected one of {', '.join(samplers)})")
+    try:
+        return samplers[kind](*values)
+    except TypeError:
+        raise ValueError(f"Wrong number of parameters for latency distribution '{spec}'") from None
+
+
+def gemini_reply(text: str) -> Dict:
+    """generateContent response body carrying ``text`` as the model output"""
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+    }
+
+
+def packed_reply(texts: Dict[str, str], shape: str, count: int) -> str:
+    """Reply of the given shape to a prompt packing ``count`` evaluations"""
+    body = json.loads(texts["json"])
+    elements = [{"id": index, **body} for index in range(count)]
+    raw = json.dumps(elements)
+    return {
+        "json": raw,
+        "fenced": f"Here are my evaluations.\n```json\n{json.dumps(elements, indent=2)}\n```",
+        "malformed": raw[:-1] + ", ]",
+        "prose": texts["prose"],
+    }[shape]
+
+
+def create_app(latency: str = "fixed:0.5", error_rate: float = 0.0, error_status: Sequence[int] = (500,),
+               payload: str = "json", payload_mix: Sequence[str] = (), payload_tokens: int = 60,
+               seed: int = 0) -> FastAPI:
+    """The stand-in server; ``payload_mix`` (if given) picks a payload shape per request at random"""
+    rng = random.Random(seed)
+    delay = latency_sampler(latency, rng)
+    texts = gemini_payloads(make_case("general", payload_tokens, seed))
+    shapes: List[str] = list(payload_mix) or [payload]
+    counters = {"requests": 0, "errors": 0}
+
+    app = FastAPI(title="Fake Gemini")
+
+    @app.post("/{version}/models/{model_action}")
+    async def generate_content(version: str, model_action: str, request: Request):
+        prompt = "".join(part.get("text", "") for content in (await request.json()).get("contents", [])
+                         for part in content.get("parts", []))
+        packed = len(re.findall(r"^EVALUATION \d+$", prompt, re.MULTILINE))
+        counters["requests"] += 1
+        await asyncio.sleep(delay())
+        if rng.random() < error_rate:
+            counters["errors"] += 1
+            status = rng.choice(list(error_status))
+            return JSONResponse({"error": {"code": status, "message": "injected failure", "status": "UNAVAILABLE"}},
+                                status_code=status)
+        shape = rng.choice(shapes)
+        return gemini_reply(packed_reply(texts, shape, packed) if packed else texts[shape])
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="fixed:0.5", help="response delay distribution (see above)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, nargs="+", default=[500], help="status codes of failures")
+    parser.add_argument("--payload", choices=PAYLOADS, default="json", help="shape of the model output")
+    parser.add_argument("--payload-mix", nargs="+", choices=PAYLOADS, default=[],
+                        help="pick one of these shapes at random per request")
+    parser.add_argument("--payload-tokens", type=int, default=60, help="length of the explanation text")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.latency, args.error_rate, args.error_status, args.payload, args.payload_mix,
+                     args.payload_tokens, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
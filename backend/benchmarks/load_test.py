@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+HTTP load test of /api/evaluate against a local Gemini stand-in
+
+Starts the fake Gemini server (benchmarks/fake_gemini.py) and the API (uvicorn
+main:app, pointed at it through GEMINI_API_ENDPOINT), then drives open-loop load:
+requests are sent on a fixed schedule at the target rate whether or not earlier
+ones have finished, so a slow server builds a queue instead of slowing the client
+down. Reports throughput, latency percentiles, errors and the server's event loop
+lag (from the event_loop_lag series of /api/metrics) for every target rate.
+
+Usage (from backend/):
+    python benchmarks/load_test.py --rps 5 10 20 --duration 30
+    python benchmarks/load_test.py --rps 10 --gemini-latency lognormal:0.8,0.5 --gemini-error-rate 0.05
+    python benchmarks/load_test.py --target http://localhost:8080 --no-fake-gemini --rps 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add the backend directory to Python path
+sys.path.append(BACKEND_DIR)
+
+from benchmarks.corpus import CATEGORIES, make_case
+
+PERCENTILES = (50, 90, 95, 99)
+_METRIC_LINE = re.compile(r'^evaluation_stage_duration_seconds_(bucket|sum|count)\{([^}]*)\} (\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_process(args: List[str], env: Dict[str, str], name: str) -> Tuple[subprocess.Popen, str]:
+    """Start a child process with its output in a log file (returned for error messages)"""
+    log = tempfile.NamedTemporaryFile(prefix=f"loadtest-{name}-", suffix=".log", delete=False)
+    process = subprocess.Popen(args, cwd=BACKEND_DIR, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+    return process, log.name
+
+
+def wait_until_ready(url: str, process: Optional[subprocess.Popen], log_path: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{url} exited during startup, see {log_path}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s, see {log_path}")
+
+
+def stop_process(process: Optional[subprocess.Popen]):
+    if process is not None and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def scrape_histogram(base_url: str, stage: str) -> Dict[str, Any]:
+    """Bucket counts, sum and count of one stage from /api/metrics, summed over all label sets"""
+    buckets: Counter = Counter()
+    totals = {"sum": 0.0, "count": 0.0}
+    try:
+        text = httpx.get(f"{base_url}/api/metrics", timeout=5.0).text
+    except httpx.HTTPError:
+        return {"buckets": {}, "sum": 0.0, "count": 0.0}
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if not match:
+            continue
+        kind, labels, value = match.groups()
+        labels = dict(_LABEL.findall(labels))
+        if labels.get("stage") != stage:
+            continue
+        if kind == "bucket":
+            buckets[float(labels["le"])] += float(value)
+        else:
+            totals[kind] += float(value)
+    return {"buckets": dict(buckets), **totals}
+
+
+def histogram_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "buckets": {le: count - before["buckets"].get(le, 0.0) for le, count in after["buckets"].items()},
+        "sum": after["sum"] - before["sum"],
+        "count": after["count"] - before["count"],
+    }
+
+
+def histogram_quantile(q: float, buckets: Dict[float, float]) -> Optional[float]:
+    """Quantile from cumulative bucket counts, interpolating linearly inside the bucket (as PromQL does)"""
+    bounds = sorted(buckets)
+    if not bounds or buckets[bounds[-1]] <= 0:
+        return None
+    rank = q * buckets[bounds[-1]]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if bound == float("inf"):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return bounds[-1]
+
+
+def request_bodies(categories: Sequence[str], lengths: Sequence[int], evaluation_type: str,
+                   seed: int, ml_cache: str = "bypass", store: bool = False) -> List[Dict[str, Any]]:
+    bodies = []
+    for category in categories:
+        for tokens in lengths:
+            case = make_case(category, tokens, seed)
+            bodies.append({"question": case.question, "chatbot_answer": case.chatbot_answer,
+                           "manual_answer": case.manual_answer, "evaluation_type": evaluation_type,
+                           "ml_cache": ml_cache, "store": store})
+    return bodies
+
+
+async def open_loop(base_url: str, rps: float, duration: float, bodies: List[Dict[str, Any]],
+                    arrivals: str, timeout: float, rng: random.Random) -> Dict[str, Any]:
+    """Send requests at ``rps`` for ``duration`` seconds without waiting for responses"""
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    schedule_slip: List[float] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def send(body: Dict[str, Any]):
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/evaluate", json=body)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors[f"http_{response.status_code}"] += 1
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+
+        tasks = []
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        offset = 0.0
+        while offset < duration:
+            await asyncio.sleep(max(0.0, start + offset - loop.time()))
+            # How late the client sent; large values mean the load generator itself is saturated
+            schedule_slip.append(loop.time() - start - offset)
+            tasks.append(asyncio.create_task(send(bodies[len(tasks) % len(bodies)])))
+            offset += rng.expovariate(rps) if arrivals == "poisson" else 1.0 / rps
+        sending_time = loop.time() - start
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+
+    completed = len(latencies)
+    report: Dict[str, Any] = {
+        "target_rps": rps,
+        "sent": len(tasks),
+        "completed": completed,
+        "errors": dict(errors),
+        "error_rate": round(sum(errors.values()) / len(tasks), 4) if tasks else 0.0,
+        "sending_seconds": round(sending_time, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(completed / elapsed, 2) if elapsed > 0 else None,
+        "client_schedule_slip_p99": round(float(np.percentile(schedule_slip, 99)), 4) if schedule_slip else None,
+    }
+    if latencies:
+        values = np.percentile(latencies, PERCENTILES)
+        report["latency"] = {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, values)}
+        report["latency"]["mean"] = round(float(np.mean(latencies)), 4)
+        report["latency"]["max"] = round(float(np.max(latencies)), 4)
+    return report
+
+
+def run_level(base_url: str, rps: float, args, bodies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    if args.warmup > 0:
+        asyncio.run(open_loop(base_url, rps, args.warmup, bodies, args.arrivals, args.timeout, rng))
+    lag_before = scrape_histogram(base_url, "event_loop_lag")
+    report = asyncio.run(open_loop(base_url, rps, args.duration, bodies, args.arrivals, args.timeout, rng))
+    lag = histogram_delta(lag_before, scrape_histogram(base_url, "event_loop_lag"))
+    if lag["count"] > 0:
+        report["server_event_loop_lag"] = {
+            **{f"p{p}": round(histogram_quantile(p / 100, lag["buckets"]) or 0.0, 6) for p in PERCENTILES},
+            "mean": round(lag["sum"] / lag["count"], 6),
+            "samples": int(lag["count"]),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    latency = report.get("latency", {})
+    lag = report.get("server_event_loop_lag", {})
+
+    def fmt(value):
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    print(f"{report['target_rps']:>8.1f} {report['throughput_rps'] or 0:>10.2f} {report['sent']:>6} "
+          f"{report['error_rate']:>7.1%} {fmt(latency.get('p50')):>8} {fmt(latency.get('p95')):>8} "
+          f"{fmt(latency.get('p99')):>8} {fmt(latency.get('max')):>8} {fmt(lag.get('p99')):>9}", flush=True)
+    if report["errors"]:
+        print(f"{'':>8} errors: {report['errors']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, nargs="+", default=[5.0], help="target request rates to run in turn")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load per rate")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of unmeasured load before each rate")
+    parser.add_argument("--arrivals", choices=["constant", "poisson"], default="poisson",
+                        help="evenly spaced requests or Poisson arrivals")
+    parser.add_argument("--evaluation-type", choices=["ml", "gemini", "both"], default="both")
+    parser.add_argument("--ml-cache", choices=["use", "bypass", "refresh"], default="bypass",
+                        help="ML result cache mode of every request (bodies repeat, so 'use' measures cache hits)")
+    parser.add_argument("--store", action="store_true", help="keep every response in the evaluation history (turns it on in the started API)")
+    parser.add_argument("--categories", nargs="+", choices=CATEGORIES, default=list(CATEGORIES))
+    parser.add_argument("--lengths", type=int, nargs="+", default=[50, 200], help="answer lengths in tokens")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target", help="base URL of a running API instead of starting one")
+    parser.add_argument("--app-env", nargs="*", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the started API, e.g. ML_EXECUTION_MODE=process")
+    parser.add_argument("--no-fake-gemini", action="store_true", help="do not start the Gemini stand-in")
+    parser.add_argument("--gemini-latency", default="lognormal:0.8,0.4", help="see benchmarks/fake_gemini.py")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--gemini-error-status", type=int, nargs="+", default=[500])
+    parser.add_argument("--gemini-payload", nargs="+", default=["json"],
+                        help="payload shapes, picked at random per request when several")
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args()
+
+    fake, app = None, None
+    fake_url = None
+    try:
+        if not args.no_fake_gemini:
+            port = free_port()
+            fake_url = f"http://127.0.0.1:{port}"
+            fake, fake_log = start_process(
+                [sys.executable, "benchmarks/fake_gemini.py", "--port", str(port), "--latency", args.gemini_latency,
+                 "--error-rate", str(args.gemini_error_rate), "--error-status", *map(str, args.gemini_error_status),
+                 "--payload-mix", *args.gemini_payload, "--seed", str(args.seed)], {}, "gemini")
+            wait_until_ready(f"{fake_url}/stats", fake, fake_log, timeout=30)
+
+        base_url = args.target
+        if base_url is None:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            env = dict(item.split("=", 1) for item in args.app_env)
+            if args.store:
+                env.setdefault("EVALUATION_STORE", "on")
+            if fake_url:
+                env.update({"GEMINI_API_ENDPOINT": fake_url, "GEMINI_API_KEY": "load-test"})
+            app, app_log = start_process(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+                 "--log-level", "warning"], env, "api")
+            wait_until_ready(f"{base_url}/api/health", app, app_log, timeout=180)
+            print(f"API log: {app_log}")
+
+        bodies = request_bodies(args.categories, args.lengths, args.evaluation_type, args.seed, args.ml_cache, args.store)
+        print(f"{'rps':>8} {'achieved':>10} {'sent':>6} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'max':>8} {'lag p99':>9}")
+        reports = []
+        for rps in args.rps:
+            report = run_level(base_url, rps, args, bodies)
+            reports.append(report)
+            print_report(report)
+
+        result: Dict[str, Any] = {
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            "levels": reports,
+        }
+        if fake_url:
+            result["fake_gemini"] = httpx.get(f"{fake_url}/stats").json()
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=2)
+            print(f"Report written to {args.output}")
+    finally:
+        stop_process(app)
+        stop_process(fake)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
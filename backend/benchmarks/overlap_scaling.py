@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lexical overlap kernel vs the list-based n-gram matching it replaced
+
+Usage (from backend/):
+    python benchmarks/overlap_scaling.py
+    python benchmarks/overlap_scaling.py --lengths 100 1000 10000 --legacy-max 2000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.lexical_overlap import clipped_precision, lexical_overlap
+from services.text_normalization import TokenizedText
+
+
+def _legacy_ngrams(words, n):
+    return [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+
+
+def legacy_bleu_like(candidate: str, reference: str) -> float:
+    """Old LightweightMLEvaluator._simple_bleu_score: membership tests against a list"""
+    candidate_words, reference_words = candidate.split(), reference.split()
+    scores = []
+    for n in [1, 2]:
+        candidate_ngrams = _legacy_ngrams(candidate_words, n)
+        reference_ngrams = _legacy_ngrams(reference_words, n)
+        if candidate_ngrams:
+            scores.append(sum(1 for ngram in candidate_ngrams if ngram in reference_ngrams) / len(candidate_ngrams))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+def legacy_ngram_similarity(candidate: str, reference: str) -> float:
+    """Old MLEvaluator._simple_ngram_similarity: list.count inside a loop over distinct n-grams"""
+    candidate_words, reference_words = candidate.split(), reference.split()
+    scores = []
+    for n in [1, 2]:
+        candidate_ngrams = _legacy_ngrams(candidate_words, n)
+        reference_ngrams = _legacy_ngrams(reference_words, n)
+        matches = sum(min(candidate_ngrams.count(ngram), reference_ngrams.count(ngram)) for ngram in set(candidate_ngrams))
+        scores.append(matches / len(candidate_ngrams))
+    return sum(scores) / len(scores)
+
+
+def kernel_ngram_similarity(candidate: str, reference: str) -> float:
+    candidate, reference = TokenizedText(candidate), TokenizedText(reference)
+    return (clipped_precision(candidate, reference, 1) + clipped_precision(candidate, reference, 2)) / 2
+
+
+def kernel_full(candidate: str, reference: str):
+    """Everything the kernel offers (BLEU-4, Jaccard 1..3, word P/R/F1) including the index build"""
+    return lexical_overlap(candidate, reference)
+
+
+def make_text(tokens: int, vocabulary: int, rng: random.Random) -> str:
+    words = [f"w{i}" for i in range(vocabulary)]
+    return " ".join(rng.choice(words) for _ in range(tokens))
+
+
+def best_time(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 5000, 10000],
+                        help="answer lengths in tokens")
+    parser.add_argument("--vocabulary", type=int, default=2000, help="distinct words in the generated texts")
+    parser.add_argument("--legacy-max", type=int, default=5000,
+                        help="skip the quadratic implementations above this length")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    results = []
+    for length in args.lengths:
+        candidate = make_text(length, args.vocabulary, rng)
+        reference = make_text(length, args.vocabulary, rng)
+        row = {
+            "tokens": length,
+            "kernel_ngram_similarity_s": best_time(kernel_ngram_similarity, candidate, reference),
+            "kernel_full_s": best_time(kernel_full, candidate, reference),
+            "legacy_bleu_like_s": None,
+            "legacy_ngram_similarity_s": None,
+        }
+        if length <= args.legacy_max:
+            row["legacy_bleu_like_s"] = best_time(legacy_bleu_like, candidate, reference, repeat=1)
+            row["legacy_ngram_similarity_s"] = best_time(legacy_ngram_similarity, candidate, reference, repeat=1)
+            assert abs(legacy_ngram_similarity(candidate, reference) - kernel_ngram_similarity(candidate, reference)) < 1e-12
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    def fmt(value):
+        return "skipped" if value is None else f"{value * 1000:.2f} ms"
+
+    print(f"{'tokens':>8} {'kernel p1/p2':>14} {'kernel full':>14} {'legacy bleu':>14} {'legacy count':>14}")
+    for row in results:
+        print(f"{row['tokens']:>8} {fmt(row['kernel_ngram_similarity_s']):>14} {fmt(row['kernel_full_s']):>14} "
+              f"{fmt(row['legacy_bleu_like_s']):>14} {fmt(row['legacy_ngram_similarity_s']):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for the evaluator hot paths
+
+Times LightweightMLEvaluator.evaluate, each individual metric, MLEvaluator.evaluate,
+GeminiEvaluator._parse_gemini_response and the /api/evaluate route over synthetic
+answers of several lengths for every category, saves the results as JSON and, given
+a baseline file from an earlier run, flags benchmarks whose median got slower than
+the regression threshold (exit status 1).
+
+Usage (from backend/):
+    python benchmarks/run.py --output benchmarks/results/baseline.json
+    python benchmarks/run.py --quick --baseline benchmarks/results/baseline.json
+    python benchmarks/run.py --groups metric --filter rouge --lengths 100 1000 10000
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import CATEGORIES
+from benchmarks.suite import GROUPS, Benchmark, SuiteContext, build_benchmarks, regression_threshold
+
+DEFAULT_LENGTHS = [10, 100, 1000, 10000]
+QUICK_LENGTHS = [10, 100, 1000]
+
+
+def measure(benchmark: Benchmark, repeat: int, max_time: float) -> Dict[str, Any]:
+    """Time ``benchmark`` up to ``repeat`` times within ``max_time`` seconds.
+
+    The first call warms caches and is discarded, unless it alone uses up the time
+    budget (10k-token answers), in which case it is the only sample.
+    """
+    def timed_call() -> float:
+        args = benchmark.prepare()
+        started = time.perf_counter()
+        benchmark.run(*args)
+        return time.perf_counter() - started
+
+    budget_start = time.perf_counter()
+    warmup = timed_call()
+    samples: List[float] = []
+    while len(samples) < repeat and time.perf_counter() - budget_start < max_time:
+        samples.append(timed_call())
+    if not samples:
+        samples = [warmup]
+
+    ordered = sorted(samples)
+    return {
+        "key": benchmark.key,
+        "group": benchmark.group,
+        "name": benchmark.name,
+        "category": benchmark.category,
+        "tokens": benchmark.tokens,
+        "runs": len(samples),
+        "min_s": ordered[0],
+        "median_s": statistics.median(ordered),
+        "mean_s": statistics.fmean(ordered),
+        "p95_s": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "stdev_s": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: Optional[float],
+            noise_floor: float) -> List[Dict[str, Any]]:
+    """Median of every benchmark against the baseline run; slower than the threshold is a regression"""
+    previous = {row["key"]: row for row in baseline.get("results", [])}
+    comparison = []
+    for row in results:
+        before = previous.get(row["key"])
+        if before is None or not before["median_s"]:
+            continue
+        limit = threshold if threshold is not None else regression_threshold(row["group"])
+        change = row["median_s"] / before["median_s"] - 1
+        comparison.append({
+            "key": row["key"],
+            "baseline_median_s": before["median_s"],
+            "median_s": row["median_s"],
+            "change": change,
+            "threshold": limit,
+            # Differences below the noise floor are timer jitter, not regressions
+            "regression": change > limit and row["median_s"] - before["median_s"] > noise_floor,
+        })
+    return comparison
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--categories", nargs="+", choices=CATEGORIES, default=list(CATEGORIES))
+    parser.add_argument("--lengths", type=int, nargs="+", help=f"answer lengths in tokens (default {DEFAULT_LENGTHS})")
+    parser.add_argument("--quick", action="store_true", help=f"lengths {QUICK_LENGTHS} and at most 3 runs each")
+    parser.add_argument("--filter", help="only run benchmarks whose key matches this regular expression")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per benchmark")
+    parser.add_argument("--max-time", type=float, default=2.0, help="time budget per benchmark in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic corpus")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float,
+                        help="allowed median slowdown as a fraction (default 0.25, 0.5 for the API group)")
+    parser.add_argument("--noise-floor", type=float, default=0.0002,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    lengths = args.lengths or (QUICK_LENGTHS if args.quick else DEFAULT_LENGTHS)
+    repeat = min(args.repeat, 3) if args.quick else args.repeat
+    suite = SuiteContext()
+    benchmarks = build_benchmarks(suite, args.groups, lengths, args.categories, args.seed)
+    if args.filter:
+        pattern = re.compile(args.filter)
+        benchmarks = [benchmark for benchmark in benchmarks if pattern.search(benchmark.key)]
+
+    results = []
+    try:
+        for index, benchmark in enumerate(benchmarks, 1):
+            # Evaluator log lines (e.g. parse errors) would add console time to the measurements
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                row = measure(benchmark, repeat, args.max_time)
+            results.append(row)
+            print(f"[{index}/{len(benchmarks)}] {row['key']:<60} median {format_seconds(row['median_s']):>10} "
+                  f"min {format_seconds(row['min_s']):>10} ({row['runs']} runs)", flush=True)
+    finally:
+        suite.close()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "lengths": lengths,
+            "categories": args.categories,
+            "groups": args.groups,
+            "repeat": repeat,
+            "max_time": args.max_time,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": args.baseline, **baseline.get("meta", {})}
+        report["comparison"] = compare(results, baseline, args.threshold, args.noise_floor)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+        print(f"\nCompared {len(report['comparison'])} benchmarks with {args.baseline}")
+        for row in sorted(report["comparison"], key=lambda row: row["change"], reverse=True)[:10]:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"  {row['key']:<60} {format_seconds(row['baseline_median_s']):>10} -> "
+                  f"{format_seconds(row['median_s']):>10} ({row['change']:+.0%}) {flag}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than their threshold")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
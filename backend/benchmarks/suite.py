@@ -0,0 +1,198 @@
+"""
+Benchmark definitions for the evaluator hot paths
+
+Each benchmark has a ``prepare`` step (untimed, returns the call arguments) and a
+``run`` step (timed). Benchmarks are built lazily per group so a filtered run
+only loads the evaluators it needs.
+"""
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple
+
+from benchmarks.corpus import CATEGORIES, EvaluationCase, make_case
+
+GROUPS = ("lightweight", "metric", "ml_evaluator", "gemini_parse", "api")
+
+# Allowed slowdown of the median before a benchmark counts as a regression; the
+# API route includes the HTTP stack and the thread pool handoff, so it is noisier
+REGRESSION_THRESHOLDS = {"api": 0.5}
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+
+
+class Benchmark(NamedTuple):
+    group: str
+    name: str
+    category: str
+    tokens: int
+    prepare: Callable[[], Tuple[Any, ...]]
+    run: Callable[..., Any]
+
+    @property
+    def key(self) -> str:
+        return f"{self.group}.{self.name}[{self.category},{self.tokens}]"
+
+
+# Individual metrics as _compute_metrics calls them, on a fresh AnalysisContext
+METRICS: Dict[str, Callable[[Any, Any, str], Any]] = {
+    "onnx_similarity": lambda ev, ctx, category: ev._calculate_onnx_similarity(ctx.answer.clean, ctx.reference.clean, ctx),
+    "spacy_similarity": lambda ev, ctx, category: ev._calculate_spacy_similarity(ctx.answer.clean, ctx.reference.clean, ctx),
+    "tfidf_similarity": lambda ev, ctx, category: ev._calculate_tfidf_similarity(ctx.answer.clean, ctx.reference.clean, ctx),
+    "custom_similarity": lambda ev, ctx, category: ev._calculate_custom_similarity(ctx.answer.clean, ctx.reference.clean, ctx),
+    "intent_alignment": lambda ev, ctx, category: ev._calculate_intent_semantic_similarity(ctx.answer.clean, ctx.reference.clean, ctx),
+    "accuracy": lambda ev, ctx, category: ev._calculate_accuracy_score(ctx.answer.clean, ctx.reference.clean, ctx),
+    "completeness": lambda ev, ctx, category: ev._calculate_completeness(ctx.answer.clean, ctx.reference.clean, ctx.question.clean, ctx),
+    "relevance": lambda ev, ctx, category: ev._calculate_relevance(ctx.question.clean, ctx.answer.clean, ctx),
+    "readability": lambda ev, ctx, category: ev._calculate_readability(ctx.answer.raw),
+    "grammar": lambda ev, ctx, category: ev._calculate_clarity(ctx.answer.raw),
+    "rouge": lambda ev, ctx, category: ev._calculate_rouge_scores(ctx.answer.raw, ctx.reference.raw),
+    "ner": lambda ev, ctx, category: ev._calculate_entity_agreement(ctx.answer.raw, ctx.reference.raw, ctx),
+    "refusal": lambda ev, ctx, category: ev._detect_refusal_compliance(ctx.question.raw, ctx.answer.raw, category, ctx),
+    "numeric_consistency": lambda ev, ctx, category: ev._calculate_numeric_consistency(ctx.answer.raw, ctx.reference.raw),
+    "structure": lambda ev, ctx, category: ev._calculate_structure_metrics(ctx.answer.raw, ctx.question.raw, ctx),
+    "length_adequacy": lambda ev, ctx, category: ev._calculate_length_adequacy(ctx.answer.raw, ctx.reference.raw, ctx),
+    "intent": lambda ev, ctx, category: ev._estimate_intent(ctx.question.raw, ctx.answer.raw, ctx),
+    "factual_consistency": lambda ev, ctx, category: ev._estimate_factual_consistency(ctx.question.raw, ctx.answer.raw, ctx.reference.raw),
+    "sentiment": lambda ev, ctx, category: ev._calculate_sentiment(ctx.answer.raw),
+    "toxicity": lambda ev, ctx, category: ev._estimate_toxicity(ctx.answer.raw, ctx),
+    "bias": lambda ev, ctx, category: ev._estimate_bias(ctx.answer.raw, ctx),
+}
+
+
+def gemini_payloads(case: EvaluationCase) -> Dict[str, str]:
+    """Gemini replies of increasing messiness whose free text is about ``case.tokens`` words"""
+    explanation = case.chatbot_answer.replace('"', "'")
+    body = {
+        "overall_score": 72, "similarity": 70, "accuracy": 75, "completeness": 68, "relevance": 80,
+        "clarity": 77, "readability": 74, "toxicity": 2, "bias": 1, "sentiment": 60, "intent_match": 71,
+        "factual_consistency": 66, "explanation": explanation,
+        "method_scores": {"semantic": 70, "lexical": 62},
+        "strengths": ["clear structure"], "weaknesses": ["misses details"],
+        "top_k_evidence": [{"answer_span": sentence, "support": "partial"} for sentence in explanation.split(". ")[:20]],
+        "hallucination_flags": {"is_hallucinated": False, "reasons": []},
+    }
+    raw = json.dumps(body)
+    return {
+        "json": raw,
+        "fenced": f"Here is my evaluation.\n```json\n{json.dumps(body, indent=2)}\n```\nLet me know if you need more.",
+        "malformed": raw[:-1] + ", }",
+        "prose": f"Overall score: 72/100. Accuracy: 75. Relevance: 80. {explanation}",
+    }
+
+
+class SuiteContext:
+    """Evaluators and the API client shared by every benchmark of a run, created on first use"""
+
+    def __init__(self):
+        self._lightweight = None
+        self._ml = None
+        self._gemini = None
+        self._client = None
+
+    @property
+    def lightweight(self):
+        if self._lightweight is None:
+            from services.ml_evaluator_lightweight import LightweightMLEvaluator
+            self._lightweight = LightweightMLEvaluator()
+        return self._lightweight
+
+    @property
+    def ml(self):
+        if self._ml is None:
+            from services.ml_evaluator import MLEvaluator
+            self._ml = MLEvaluator()
+        return self._ml
+
+    @property
+    def gemini(self):
+        if self._gemini is None:
+            from services.gemini_evaluator import GeminiEvaluator
+            self._gemini = GeminiEvaluator()
+        return self._gemini
+
+    @property
+    def client(self):
+        if self._client is None:
+            from fastapi.testclient import TestClient
+            from main import app
+            from routers import evaluation
+            # Never call the real Gemini API from a benchmark: "both" uses the mock reply
+            evaluation.gemini_evaluator.client = None
+            self._client = TestClient(app)
+            self._client.__enter__()
+        return self._client
+
+    def close(self):
+        if self._client is not None:
+            self._client.__exit__(None, None, None)
+            self._client = None
+
+
+def _lightweight_benchmarks(suite: SuiteContext, case: EvaluationCase) -> Iterator[Benchmark]:
+    args = (case.question, case.chatbot_answer, case.manual_answer, case.category)
+    yield Benchmark("lightweight", "evaluate", case.category, case.tokens,
+                    lambda: args, lambda *a: suite.lightweight.evaluate_sync(*a))
+
+
+def _metric_benchmarks(suite: SuiteContext, case: EvaluationCase) -> Iterator[Benchmark]:
+    def prepare():
+        # Fresh context per run so the per-evaluation memo does not hide the cost;
+        # preprocessing is done here, untimed, as _compute_metrics does it first
+        ctx = suite.lightweight._analysis_context(case.question, case.chatbot_answer, case.manual_answer)
+        _ = ctx.answer.clean, ctx.reference.clean, ctx.question.clean
+        return (ctx,)
+
+    for name, metric in METRICS.items():
+        yield Benchmark("metric", name, case.category, case.tokens, prepare,
+                        lambda ctx, metric=metric: metric(suite.lightweight, ctx, case.category))
+
+
+def _ml_evaluator_benchmarks(suite: SuiteContext, case: EvaluationCase) -> Iterator[Benchmark]:
+    args = (case.question, case.chatbot_answer, case.manual_answer)
+    yield Benchmark("ml_evaluator", "evaluate", case.category, case.tokens,
+                    lambda: args, lambda *a: asyncio.run(suite.ml.evaluate(*a)))
+
+
+def _gemini_parse_benchmarks(suite: SuiteContext, case: EvaluationCase) -> Iterator[Benchmark]:
+    for variant, payload in gemini_payloads(case).items():
+        yield Benchmark("gemini_parse", variant, case.category, case.tokens,
+                        lambda payload=payload: (payload,), lambda text: suite.gemini._parse_gemini_response(text))
+
+
+def _api_benchmarks(suite: SuiteContext, case: EvaluationCase) -> Iterator[Benchmark]:
+    for evaluation_type in ("ml", "both"):
+        # Repeated bodies would otherwise be answered from the ML result cache and fill the evaluation history
+        body = {"question": case.question, "chatbot_answer": case.chatbot_answer,
+                "manual_answer": case.manual_answer, "evaluation_type": evaluation_type, "ml_cache": "bypass",
+                "store": False}
+
+        def run(body):
+            response = suite.client.post("/api/evaluate", json=body)
+            response.raise_for_status()
+            return response
+
+        yield Benchmark("api", f"evaluate_{evaluation_type}", case.category, case.tokens,
+                        lambda body=body: (body,), run)
+
+
+_BUILDERS = {
+    "lightweight": _lightweight_benchmarks,
+    "metric": _metric_benchmarks,
+    "ml_evaluator": _ml_evaluator_benchmarks,
+    "gemini_parse": _gemini_parse_benchmarks,
+    "api": _api_benchmarks,
+}
+
+
+def build_benchmarks(suite: SuiteContext, groups: Sequence[str], lengths: Sequence[int],
+                     categories: Sequence[str] = CATEGORIES, seed: int = 0) -> List[Benchmark]:
+    """Every benchmark of ``groups`` for each category and answer length"""
+    benchmarks = []
+    for group in groups:
+        for category in categories:
+            for tokens in lengths:
+                benchmarks.extend(_BUILDERS[group](suite, make_case(category, tokens, seed)))
+    return benchmarks
+
+
+def regression_threshold(group: str) -> float:
+    return REGRESSION_THRESHOLDS.get(group, DEFAULT_REGRESSION_THRESHOLD)
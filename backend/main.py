@@ -1,6 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import questions, evaluation, health
+from routers import questions, evaluation, health, cache, metrics, history
 import os
 
 FRONTEND_URL = os.getenv("FRONTEND_URL")
@@ -26,6 +26,9 @@ app.add_middleware(
 app.include_router(health.router, prefix="/api")
 app.include_router(questions.router, prefix="/api")
 app.include_router(evaluation.router, prefix="/api")
+app.include_router(cache.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(history.router, prefix="/api")
 
 @app.get("/")
 async def root():
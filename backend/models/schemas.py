@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 class QuestionBase(BaseModel):
@@ -11,11 +11,36 @@ class Question(QuestionBase):
     id: str
     standard_answers: Optional[List[str]] = None
 
+# Score metrics of the ML evaluator that a request can select
+MLMetric = Literal[
+    "similarity", "accuracy", "completeness", "relevance", "readability", "clarity", "sentiment",
+    "toxicity", "bias", "intent_match", "factual_consistency", "refusal_compliance", "entity_f1",
+    "numeric_consistency", "length_adequacy",
+]
+
 class EvaluationRequest(BaseModel):
     question: str
     chatbot_answer: str
     manual_answer: str
     evaluation_type: str = "both"  # "ml", "gemini", or "both"
+    profile: bool = False  # attach a cProfile/allocation report to trace.ml.profile
+    gemini_cache: str = Field(default="use", pattern="^(use|bypass|refresh)$")  # Gemini result cache mode
+    ml_cache: str = Field(default="use", pattern="^(use|bypass|refresh)$")  # ML result cache mode
+    store: bool = True  # keep the response in the evaluation history (/api/evaluations, when EVALUATION_STORE=on)
+    # Tiered ML evaluation: skip costlier metric tiers once they cannot move the score by more than
+    # score_tolerance points, and/or once latency_budget_ms of evaluation time is spent
+    early_exit: bool = False
+    score_tolerance: float = Field(default=1.0, ge=0, le=100)
+    latency_budget_ms: Optional[float] = Field(default=None, gt=0)
+    # Compute only these ML metrics (and what they depend on), weighting the score over them
+    metrics: Optional[List[MLMetric]] = Field(default=None, min_length=1)
+    include_trace: bool = True
+    include_explanation: bool = True
+
+class BatchEvaluationRequest(BaseModel):
+    items: List[EvaluationRequest] = Field(..., min_length=1, max_length=10000)
+    chunk_size: int = Field(default=32, ge=1, le=512)  # rows scored together per vectorized pass
+    pack_gemini: bool = True  # several rows per Gemini request, up to GEMINI_BATCH_TOKEN_BUDGET
 
 class EvaluationDetails(BaseModel):
     similarity: float
@@ -34,6 +59,7 @@ class EvaluationResponse(BaseModel):
     details: EvaluationDetails
     explanations: EvaluationExplanations
     processing_time: float
+    ml_cache: Optional[str] = None  # "hit", "miss", "refresh", "bypass" or "disabled"
     # Extended analytics (optional for backward compatibility)
     ml_details: Optional[Dict[str, float]] = None
     gemini_details: Optional[Dict[str, float]] = None
@@ -41,6 +67,26 @@ class EvaluationResponse(BaseModel):
     gemini_metrics: Optional[Dict[str, Any]] = None
     trace: Optional[Dict[str, Any]] = None
     weights: Optional[Dict[str, float]] = None
+    evaluation_id: Optional[str] = None  # id in the evaluation history, when stored
+
+class StoredEvaluationSummary(BaseModel):
+    id: str
+    created_at: datetime
+    category: str
+    evaluation_type: str
+    question: str
+    chatbot_answer: str
+    manual_answer: str
+    ml_score: Optional[float] = None
+    gemini_score: Optional[float] = None
+    combined_score: Optional[float] = None
+
+class StoredEvaluation(StoredEvaluationSummary):
+    response: EvaluationResponse
+
+class EvaluationPage(BaseModel):
+    items: List[StoredEvaluationSummary]
+    next_cursor: Optional[str] = None  # pass as ``cursor`` for the next page; None on the last one
 
 class QuestionGenerationRequest(BaseModel):
     category: str
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from routers.evaluation import ml_engine, gemini_evaluator
+
+router = APIRouter(tags=["cache"])
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters of the evaluation caches"""
+    try:
+        stats = await ml_engine.cache_stats()
+        result_cache = ml_engine.evaluator.result_cache
+        stats["ml_results"] = result_cache.stats() if result_cache is not None else None
+        stats["gemini"] = gemini_evaluator.cache.stats() if gemini_evaluator.cache is not None else None
+        return stats
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read cache stats: {str(e)}")
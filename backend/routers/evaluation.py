@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from models.schemas import EvaluationRequest, EvaluationResponse
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
+from models.schemas import EvaluationRequest, EvaluationResponse, BatchEvaluationRequest
 from services.ml_evaluator_lightweight import LightweightMLEvaluator
 from services.gemini_evaluator import GeminiEvaluator
+from services.execution_engine import EvaluationEngine, EngineOverloadedError, WorkerCrashedError
+from services.evaluation_store import create_evaluation_store
+from services.latency_metrics import get_latency_metrics
+from services.lexicon_matcher import Lexicon, MultiPatternMatcher
+from typing import Any, Dict, List, Optional
+import json
+import os
 import time
 import asyncio
 
@@ -10,157 +18,488 @@ router = APIRouter(tags=["evaluation"])
 # Use lightweight ML evaluator instead of the heavy torch-based one
 ml_evaluator = LightweightMLEvaluator()
 gemini_evaluator = GeminiEvaluator()
+# ML scoring is CPU-bound; the engine runs it on a thread/process pool so the event loop stays free
+ml_engine = EvaluationEngine(ml_evaluator)
+# Evaluation history served by /api/evaluations (None unless EVALUATION_STORE=on)
+evaluation_store = create_evaluation_store()
+# Set REQUEST_PROFILING=false to ignore per-request profile flags (e.g. on public deployments)
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING", "true").lower() == "true"
 
-def _detect_question_category(question: str) -> str:
-    """Detect question category based on content"""
-    question_lower = question.lower()
-    
+@router.on_event("startup")
+async def start_ml_engine():
+    await ml_engine.start()
+
+@router.on_event("shutdown")
+def stop_ml_engine():
+    ml_engine.shutdown()
+    ml_evaluator.metric_graph.shutdown()
+    # Keep IDF statistics learned while serving (process workers hold their own copies)
+    if ml_evaluator.tfidf_online_updates and ml_engine.mode != "process":
+        try:
+            ml_evaluator.save_tfidf_model()
+        except Exception as e:
+            print(f"Could not save TF-IDF model: {e}")
+
+@router.on_event("shutdown")
+async def close_gemini_client():
+    await gemini_evaluator.close()
+
+# Category keyword lexicons, compiled once and matched in a single pass per question
+_CATEGORY_MATCHER = MultiPatternMatcher([
     # Safety patterns
-    safety_patterns = [
+    Lexicon('safety', [
         'how to make', 'instructions for', 'tutorial on', 'help me', 'guide me',
         'hack', 'break', 'steal', 'hurt', 'harm', 'dangerous', 'illegal', 'kill',
         'explosive', 'weapon', 'drug', 'fraud', 'scam'
-    ]
-    
-    # Technical patterns  
-    tech_patterns = [
+    ]),
+    # Technical patterns
+    Lexicon('technical', [
         'algorithm', 'code', 'programming', 'software', 'database', 'api',
         'function', 'class', 'method', 'computer', 'technical', 'system',
         'network', 'security', 'data structure', 'complexity'
-    ]
-    
+    ]),
     # Creative patterns
-    creative_patterns = [
+    Lexicon('creative', [
         'story', 'poem', 'creative', 'imagine', 'invent', 'design',
         'write a', 'compose', 'create', 'describe', 'dream', 'art'
-    ]
-    
-    if any(pattern in question_lower for pattern in safety_patterns):
-        return 'safety'
-    elif any(pattern in question_lower for pattern in tech_patterns):
-        return 'technical'
-    elif any(pattern in question_lower for pattern in creative_patterns):
-        return 'creative'
-    else:
-        return 'general'
+    ]),
+])
+
+def _detect_question_category(question: str) -> str:
+    """Detect question category based on content"""
+    category = _CATEGORY_MATCHER.first_matching(question, ('safety', 'technical', 'creative'))
+    return category or 'general'
+
+def _profiling_requested(request: EvaluationRequest, header: Optional[str]) -> bool:
+    """``profile: true`` in the body or an ``X-Evaluation-Profile: 1|true`` header"""
+    if not REQUEST_PROFILING:
+        return False
+    return request.profile or (header or "").strip().lower() in ("1", "true", "yes")
+
+def _evaluation_options(request: EvaluationRequest) -> Dict[str, Any]:
+    """ML engine options of a request: result cache mode, tiered early exit (None disables each criterion) and metric selection"""
+    return {
+        "cache_mode": request.ml_cache,
+        "tolerance": request.score_tolerance if request.early_exit else None,
+        "latency_budget": request.latency_budget_ms / 1000 if request.latency_budget_ms else None,
+        "metrics": request.metrics,
+        "include_trace": request.include_trace,
+        "include_explanation": request.include_explanation,
+    }
+
+def _uses_batch_defaults(request: EvaluationRequest) -> bool:
+    """Whether a batch row can share the vectorized pass, which computes every metric without early exit or profiling"""
+    options = _evaluation_options(request)
+    return (options["tolerance"] is None and options["latency_budget"] is None and options["metrics"] is None
+            and options["include_explanation"] and not _profiling_requested(request, None))
+
+async def _timed(name: str, coro, timings: Dict[str, Dict[str, float]], request_start: float):
+    """Await an evaluator and record when it started and how long it took (relative to the request)"""
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        finished = time.perf_counter()
+        timings[name] = {
+            "start_offset": round(started - request_start, 4),
+            "wall_time": round(finished - started, 4),
+        }
+
+def _record_latency(endpoint: str, category: str, ml_result: Optional[Dict[str, Any]] = None,
+                    gemini_result: Optional[Dict[str, Any]] = None, timings: Optional[Dict[str, Any]] = None,
+                    total: Optional[float] = None):
+    """Feed stage timings of one request into the /api/metrics histograms"""
+    metrics = get_latency_metrics()
+    metrics.observe_result(ml_result, category, endpoint)
+    if isinstance(gemini_result, dict):
+        metrics.observe_many(gemini_result.get("stage_timings"), category, endpoint, prefix="gemini.")
+    for name, timing in (timings or {}).items():
+        if isinstance(timing, dict) and "wall_time" in timing:
+            metrics.observe(name, timing["wall_time"], category, endpoint)
+    if total is not None:
+        metrics.observe("request_total", total, category, endpoint)
+
+def _build_evaluation_response(ml_result: Optional[Dict[str, Any]], gemini_result: Optional[Dict[str, Any]],
+                               processing_time: float, timings: Optional[Dict[str, Any]] = None,
+                               include_trace: bool = True) -> EvaluationResponse:
+    """Merge ML and Gemini results into the public response model (without a trace unless ``include_trace``)"""
+    # Calculate combined score (prefer ML weights if present)
+    combined_score = None
+    if ml_result and gemini_result:
+        # If ML provides weights and details, compute a simple average of overall scores for now
+        combined_score = (ml_result.get("score", 0.0) + gemini_result.get("score", 0.0)) / 2
+    elif ml_result:
+        combined_score = ml_result.get("score", None)
+    elif gemini_result:
+        combined_score = gemini_result.get("score", None)
+
+    # Build extended fields safely
+    ml_details = ml_result.get("details") if ml_result else None
+    ml_metrics = ml_result.get("metrics") if ml_result else None
+    ml_trace = ml_result.get("trace") if ml_result else None
+    ml_weights = ml_result.get("weights") if ml_result else None
+
+    gem_details = gemini_result.get("details") if gemini_result else None
+    gem_metrics = None
+    if gemini_result:
+        gem_metrics = {
+            "method_scores": gemini_result.get("method_scores"),
+            "strengths": gemini_result.get("strengths"),
+            "weaknesses": gemini_result.get("weaknesses"),
+        }
+    gem_trace = None
+    if gemini_result:
+        gem_trace = {"gemini": {
+            "top_k_evidence": gemini_result.get("top_k_evidence"),
+            "hallucination_flags": gemini_result.get("hallucination_flags"),
+            "cache": gemini_result.get("cache"),
+            "batch_size": gemini_result.get("batch_size"),
+        }}
+
+    # Merge traces
+    merged_trace = {}
+    if ml_trace:
+        merged_trace.update(ml_trace)
+    if gem_trace:
+        merged_trace.update(gem_trace)
+    if timings:
+        merged_trace["timings"] = timings
+    if not include_trace:
+        merged_trace = {}
+
+    return EvaluationResponse(
+        ml_score=ml_result.get("score") if ml_result else None,
+        gemini_score=gemini_result.get("score") if gemini_result else None,
+        combined_score=combined_score,
+        details={
+            "similarity": (ml_details or {}).get("similarity", 0.0),
+            "completeness": (gem_details or {}).get("completeness", 0.0),
+            "accuracy": (ml_details or {}).get("accuracy", 0.0),
+            "relevance": (gem_details or {}).get("relevance", 0.0),
+        },
+        explanations={
+            "ml_explanation": (ml_result.get("explanation") or "ML explanation not requested") if ml_result else "ML evaluation not performed",
+            "gemini_explanation": gemini_result.get("explanation") if gemini_result else "Gemini evaluation not performed"
+        },
+        processing_time=processing_time,
+        ml_cache=ml_result.get("cache") if ml_result else None,
+        ml_details=ml_details,
+        gemini_details=gem_details,
+        ml_metrics=ml_metrics,
+        gemini_metrics=gem_metrics,
+        trace=merged_trace or None,
+        weights=ml_weights
+    )
+
+async def _store_evaluations(requests: List[EvaluationRequest], categories: List[str],
+                             responses: List[EvaluationResponse]):
+    """Add responses with their inputs to the evaluation history (one transaction) and set their evaluation_id.
+
+    Skips requests with ``store: false``; a failed write is logged and the responses go out unstored.
+    """
+    rows = [index for index, request in enumerate(requests) if request.store]
+    if evaluation_store is None or not rows:
+        return
+    try:
+        ids = await asyncio.to_thread(evaluation_store.add_many, [
+            (requests[index].question, requests[index].chatbot_answer, requests[index].manual_answer,
+             categories[index], requests[index].evaluation_type, responses[index].model_dump(mode="json"))
+            for index in rows
+        ])
+    except Exception as e:
+        print(f"Could not store evaluations: {e}")
+        return
+    for index, evaluation_id in zip(rows, ids):
+        responses[index].evaluation_id = evaluation_id
 
 @router.post("/evaluate", response_model=EvaluationResponse)
-async def evaluate_response(request: EvaluationRequest):
+async def evaluate_response(request: EvaluationRequest, x_evaluation_profile: Optional[str] = Header(default=None)):
     """Process evaluation request using both ML/NLP and Gemini evaluators"""
     start_time = time.time()
+    request_start = time.perf_counter()
+    timings: Dict[str, Dict[str, float]] = {}
     
     try:
         # Detect question category
         category = _detect_question_category(request.question)
         
-        tasks = []
-        
-        if request.evaluation_type in ["both", "ml"]:
-            tasks.append(ml_evaluator.evaluate(
+        gemini_task = None
+        ml_task = None
+
+        # Launch the Gemini network call first and yield once so its request is actually
+        # in flight before ML scoring starts; otherwise "both" costs ML time + Gemini time.
+        if request.evaluation_type in ["both", "gemini"]:
+            gemini_task = asyncio.create_task(_timed("gemini", gemini_evaluator.evaluate(
                 request.question,
                 request.chatbot_answer,
                 request.manual_answer,
-                category
-            ))
-        
-        if request.evaluation_type in ["both", "gemini"]:
-            tasks.append(gemini_evaluator.evaluate(
+                cache_mode=request.gemini_cache
+            ), timings, request_start))
+            await asyncio.sleep(0)
+
+        if request.evaluation_type in ["both", "ml"]:
+            ml_task = asyncio.create_task(_timed("ml", ml_engine.evaluate(
                 request.question,
                 request.chatbot_answer,
-                request.manual_answer
-            ))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+                request.manual_answer,
+                category,
+                profile=_profiling_requested(request, x_evaluation_profile),
+                **_evaluation_options(request)
+            ), timings, request_start))
+
+        tasks = [task for task in (ml_task, gemini_task) if task is not None]
+        await asyncio.gather(*tasks, return_exceptions=True)
         
         ml_result = None
         gemini_result = None
         
-        if request.evaluation_type in ["both", "ml"]:
-            candidate = results[0]
+        if ml_task is not None:
+            candidate = ml_task.exception() or ml_task.result()
+            if isinstance(candidate, (EngineOverloadedError, WorkerCrashedError)):
+                raise HTTPException(status_code=503, detail=str(candidate))
             ml_result = candidate if not isinstance(candidate, Exception) else None
         
-        if request.evaluation_type in ["both", "gemini"]:
-            candidate = results[-1]
+        if gemini_task is not None:
+            candidate = gemini_task.exception() or gemini_task.result()
             gemini_result = candidate if not isinstance(candidate, Exception) else None
+
+        total = time.perf_counter() - request_start
+        timings_trace: Dict[str, Any] = dict(timings)
+        timings_trace["total"] = round(total, 4)
+        if "ml" in timings and "gemini" in timings:
+            # Time both evaluators were running at once; close to min(ml, gemini) when they overlap
+            ml_span = (timings["ml"]["start_offset"], timings["ml"]["start_offset"] + timings["ml"]["wall_time"])
+            gem_span = (timings["gemini"]["start_offset"], timings["gemini"]["start_offset"] + timings["gemini"]["wall_time"])
+            timings_trace["overlap"] = round(max(0.0, min(ml_span[1], gem_span[1]) - max(ml_span[0], gem_span[0])), 4)
         
-        # Calculate combined score (prefer ML weights if present)
-        combined_score = None
-        if ml_result and gemini_result:
-            # If ML provides weights and details, compute a simple average of overall scores for now
-            combined_score = (ml_result.get("score", 0.0) + gemini_result.get("score", 0.0)) / 2
-        elif ml_result:
-            combined_score = ml_result.get("score", None)
-        elif gemini_result:
-            combined_score = gemini_result.get("score", None)
-        
+        _record_latency("evaluate", category, ml_result, gemini_result, timings, total)
         processing_time = time.time() - start_time
+        response = _build_evaluation_response(ml_result, gemini_result, processing_time, timings_trace, request.include_trace)
+        await _store_evaluations([request], [category], [response])
+        return response
         
-        # Build extended fields safely
-        ml_details = ml_result.get("details") if ml_result else None
-        ml_metrics = ml_result.get("metrics") if ml_result else None
-        ml_trace = ml_result.get("trace") if ml_result else None
-        ml_weights = ml_result.get("weights") if ml_result else None
-
-        gem_details = gemini_result.get("details") if gemini_result else None
-        gem_metrics = None
-        if gemini_result:
-            gem_metrics = {
-                "method_scores": gemini_result.get("method_scores"),
-                "strengths": gemini_result.get("strengths"),
-                "weaknesses": gemini_result.get("weaknesses"),
-            }
-        gem_trace = None
-        if gemini_result:
-            gem_trace = {"gemini": {
-                "top_k_evidence": gemini_result.get("top_k_evidence"),
-                "hallucination_flags": gemini_result.get("hallucination_flags"),
-            }}
-
-        # Merge traces
-        merged_trace = {}
-        if ml_trace:
-            merged_trace.update(ml_trace)
-        if gem_trace:
-            merged_trace.update(gem_trace)
-
-        return EvaluationResponse(
-            ml_score=ml_result.get("score") if ml_result else None,
-            gemini_score=gemini_result.get("score") if gemini_result else None,
-            combined_score=combined_score,
-            details={
-                "similarity": (ml_details or {}).get("similarity", 0.0),
-                "completeness": (gem_details or {}).get("completeness", 0.0),
-                "accuracy": (ml_details or {}).get("accuracy", 0.0),
-                "relevance": (gem_details or {}).get("relevance", 0.0),
-            },
-            explanations={
-                "ml_explanation": ml_result.get("explanation") if ml_result else "ML evaluation not performed",
-                "gemini_explanation": gemini_result.get("explanation") if gemini_result else "Gemini evaluation not performed"
-            },
-            processing_time=processing_time,
-            ml_details=ml_details,
-            gemini_details=gem_details,
-            ml_metrics=ml_metrics,
-            gemini_metrics=gem_metrics,
-            trace=merged_trace or None,
-            weights=ml_weights
-        )
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/evaluate/stream")
+async def evaluate_stream(request: EvaluationRequest, x_evaluation_profile: Optional[str] = Header(default=None)):
+    """Same evaluation as /evaluate, streamed as Server-Sent Events while it progresses.
+
+    Each event carries the EvaluationResponse fields known at that point:
+      lexical  - provisional ml_details/ml_metrics from the cheap lexical metrics
+      semantic - ml_details/ml_metrics from embeddings, NER, grammar and refusal detection
+      ml       - ml_score, ml_details, ml_metrics, weights and the ML explanation
+      gemini   - gemini_score, gemini_details, gemini_metrics and the Gemini explanation
+      combined - the complete EvaluationResponse, always last
+      error    - {"status", "detail"} when the ML queue is full (the stream then ends)
+    ML and Gemini run concurrently, so "gemini" can arrive before the ML events. An ML
+    result served from the result cache sends no lexical/semantic events.
+    """
+    start_time = time.time()
+    request_start = time.perf_counter()
+    category = _detect_question_category(request.question)
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def progress(stage: str, fields: Dict[str, Any]):
+        # Runs on the ML worker thread; hand the event over to the loop
+        loop.call_soon_threadsafe(events.put_nowait, (stage, fields))
+
+    async def stream_events():
+        timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        if request.evaluation_type in ["both", "gemini"]:
+            tasks["gemini"] = asyncio.create_task(_timed("gemini", gemini_evaluator.evaluate(
+                request.question, request.chatbot_answer, request.manual_answer, cache_mode=request.gemini_cache
+            ), timings, request_start))
+            await asyncio.sleep(0)
+        if request.evaluation_type in ["both", "ml"]:
+            tasks["ml"] = asyncio.create_task(_timed("ml", ml_engine.evaluate(
+                request.question, request.chatbot_answer, request.manual_answer, category,
+                profile=_profiling_requested(request, x_evaluation_profile), progress=progress,
+                **_evaluation_options(request)
+            ), timings, request_start))
+        for name, task in tasks.items():
+            task.add_done_callback(lambda _, name=name: events.put_nowait((name, None)))
+
+        results: Dict[str, Optional[Dict[str, Any]]] = {"ml": None, "gemini": None}
+        try:
+            pending = len(tasks)
+            while pending:
+                stage, fields = await events.get()
+                if stage not in tasks:
+                    yield _sse(stage, fields)
+                    continue
+                pending -= 1
+                error = tasks[stage].exception()
+                if isinstance(error, (EngineOverloadedError, WorkerCrashedError)):
+                    yield _sse("error", {"status": 503, "detail": str(error)})
+                    return
+                if error is not None:
+                    continue
+                result = results[stage] = tasks[stage].result()
+                if stage == "ml":
+                    yield _sse("ml", {
+                        "ml_score": result.get("score"),
+                        "ml_cache": result.get("cache"),
+                        "ml_details": result.get("details"),
+                        "ml_metrics": result.get("metrics"),
+                        "weights": result.get("weights"),
+                        "explanations": {"ml_explanation": result.get("explanation")},
+                    })
+                else:
+                    yield _sse("gemini", {
+                        "gemini_score": result.get("score"),
+                        "gemini_details": result.get("details"),
+                        "gemini_metrics": {field: result.get(field) for field in ("method_scores", "strengths", "weaknesses")},
+                        "explanations": {"gemini_explanation": result.get("explanation")},
+                    })
+
+            total = time.perf_counter() - request_start
+            timings_trace: Dict[str, Any] = dict(timings)
+            timings_trace["total"] = round(total, 4)
+            _record_latency("evaluate_stream", category, results["ml"], results["gemini"], timings, total)
+            response = _build_evaluation_response(results["ml"], results["gemini"], time.time() - start_time, timings_trace,
+                                                  request.include_trace)
+            await _store_evaluations([request], [category], [response])
+            yield _sse("combined", response.model_dump(mode="json"))
+        finally:
+            # Client went away or the ML queue was full: stop waiting on Gemini
+            for task in tasks.values():
+                task.cancel()
+
+    return StreamingResponse(stream_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/evaluate/batch")
+async def evaluate_batch(request: BatchEvaluationRequest):
+    """Evaluate many rows through the batch-aware ML path.
+
+    Streams newline-delimited JSON: one {"index", "result"} (or {"index", "error"}) line per
+    row in request order, then a {"summary"} line with aggregate throughput.
+    """
+    items = request.items
+    chunk_size = request.chunk_size
+
+    async def stream_rows():
+        batch_start = time.perf_counter()
+        errors = 0
+        for offset in range(0, len(items), chunk_size):
+            chunk = items[offset:offset + chunk_size]
+            chunk_start = time.perf_counter()
+
+            # Start Gemini calls for the chunk first so they overlap with ML scoring
+            gemini_indices = [index for index, item in enumerate(chunk) if item.evaluation_type in ["both", "gemini"]]
+            gemini_positions = {index: position for position, index in enumerate(gemini_indices)}
+            if request.pack_gemini:
+                packed_task = asyncio.create_task(gemini_evaluator.evaluate_many(
+                    [(chunk[index].question, chunk[index].chatbot_answer, chunk[index].manual_answer) for index in gemini_indices],
+                    cache_modes=[chunk[index].gemini_cache for index in gemini_indices],
+                ))
+                gemini_tasks = {index: packed_task for index in gemini_indices}
+            else:
+                gemini_tasks = {
+                    index: asyncio.create_task(gemini_evaluator.evaluate(
+                        chunk[index].question, chunk[index].chatbot_answer, chunk[index].manual_answer,
+                        cache_mode=chunk[index].gemini_cache))
+                    for index in gemini_indices
+                }
+            if gemini_tasks:
+                await asyncio.sleep(0)
+
+            categories = [_detect_question_category(item.question) for item in chunk]
+            ml_indices = [index for index, item in enumerate(chunk) if item.evaluation_type in ["both", "ml"]]
+            # Rows asking for metric selection, early exit, profiling or no explanation are
+            # evaluated on their own with those options; the rest share one vectorized pass
+            batch_indices = [index for index in ml_indices if _uses_batch_defaults(chunk[index])]
+            single_indices = [index for index in ml_indices if index not in batch_indices]
+            # At most one single-row evaluation per worker, so a chunk cannot overflow the engine queue
+            single_slots = asyncio.Semaphore(ml_engine.workers)
+
+            async def evaluate_single(item: EvaluationRequest, category: str):
+                async with single_slots:
+                    return await ml_engine.evaluate(
+                        item.question, item.chatbot_answer, item.manual_answer, category,
+                        profile=_profiling_requested(item, None), **_evaluation_options(item))
+
+            single_tasks = [asyncio.create_task(evaluate_single(chunk[index], categories[index])) for index in single_indices]
+            ml_results: Dict[int, Any] = {}
+            if batch_indices:
+                rows = [
+                    (chunk[index].question, chunk[index].chatbot_answer, chunk[index].manual_answer, categories[index])
+                    for index in batch_indices
+                ]
+                try:
+                    ml_results = dict(zip(batch_indices, await ml_engine.evaluate_batch(
+                        rows, cache_modes=[chunk[index].ml_cache for index in batch_indices])))
+                except Exception as e:
+                    ml_results = {index: e for index in batch_indices}
+            ml_results.update(zip(single_indices, await asyncio.gather(*single_tasks, return_exceptions=True)))
+
+            await asyncio.gather(*set(gemini_tasks.values()), return_exceptions=True)
+            per_row_time = (time.perf_counter() - chunk_start) / len(chunk)
+
+            responses: Dict[int, EvaluationResponse] = {}
+            for index in range(len(chunk)):
+                ml_result = ml_results.get(index)
+                if isinstance(ml_result, Exception):
+                    continue
+                gemini_result = None
+                if index in gemini_tasks and gemini_tasks[index].exception() is None:
+                    gemini_result = gemini_tasks[index].result()
+                    if request.pack_gemini:
+                        gemini_result = gemini_result[gemini_positions[index]]
+                _record_latency("evaluate_batch", categories[index], ml_result, gemini_result, total=per_row_time)
+                responses[index] = _build_evaluation_response(ml_result, gemini_result, per_row_time,
+                                                              include_trace=chunk[index].include_trace)
+            # One history transaction per chunk
+            await _store_evaluations([chunk[index] for index in responses], [categories[index] for index in responses],
+                                     list(responses.values()))
+
+            for index in range(len(chunk)):
+                if index not in responses:
+                    errors += 1
+                    yield json.dumps({"index": offset + index, "error": f"ML evaluation failed: {ml_results[index]}"}) + "\n"
+                    continue
+                yield json.dumps({"index": offset + index, "result": responses[index].model_dump(mode="json")}) + "\n"
+
+        elapsed = time.perf_counter() - batch_start
+        yield json.dumps({"summary": {
+            "rows": len(items),
+            "errors": errors,
+            "chunk_size": chunk_size,
+            "elapsed_seconds": round(elapsed, 4),
+            "rows_per_second": round(len(items) / elapsed, 2) if elapsed > 0 else None,
+        }}) + "\n"
+
+    return StreamingResponse(stream_rows(), media_type="application/x-ndjson")
+
 @router.post("/evaluate/ml", response_model=dict)
-async def evaluate_ml_only(request: EvaluationRequest):
+async def evaluate_ml_only(request: EvaluationRequest, x_evaluation_profile: Optional[str] = Header(default=None)):
     """Process evaluation using ML/NLP evaluator only"""
     try:
+        request_start = time.perf_counter()
         category = _detect_question_category(request.question)
-        result = await ml_evaluator.evaluate(
+        result = await ml_engine.evaluate(
             request.question,
             request.chatbot_answer,
             request.manual_answer,
-            category
+            category,
+            profile=_profiling_requested(request, x_evaluation_profile),
+            **_evaluation_options(request)
         )
+        _record_latency("evaluate_ml", category, ml_result=result, total=time.perf_counter() - request_start)
+        if not request.include_trace:
+            result.pop("trace", None)
         return result
+    except (EngineOverloadedError, WorkerCrashedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"ML evaluation failed: {str(e)}")
 
@@ -168,11 +507,15 @@ async def evaluate_ml_only(request: EvaluationRequest):
 async def evaluate_gemini_only(request: EvaluationRequest):
     """Process evaluation using Gemini evaluator only"""
     try:
+        request_start = time.perf_counter()
         result = await gemini_evaluator.evaluate(
             request.question,
             request.chatbot_answer,
-            request.manual_answer
+            request.manual_answer,
+            cache_mode=request.gemini_cache
         )
+        _record_latency("evaluate_gemini", _detect_question_category(request.question), gemini_result=result,
+                        total=time.perf_counter() - request_start)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Gemini evaluation failed: {str(e)}")
\ No newline at end of file
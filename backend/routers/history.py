@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query
+from models.schemas import EvaluationPage, StoredEvaluation
+from routers.evaluation import evaluation_store
+from services.evaluation_store import EvaluationStore
+from typing import Optional
+import asyncio
+
+router = APIRouter(tags=["history"])
+
+def _require_store() -> EvaluationStore:
+    if evaluation_store is None:
+        raise HTTPException(status_code=503, detail="Evaluation history is disabled (set EVALUATION_STORE=on)")
+    return evaluation_store
+
+@router.get("/evaluations", response_model=EvaluationPage)
+async def list_evaluations(
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    evaluation_type: Optional[str] = Query(default=None, pattern="^(ml|gemini|both)$"),
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    sort: str = Query(default="created_at", pattern="^(created_at|score)$"),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
+):
+    """One page of stored evaluations (inputs and scores); pass ``next_cursor`` back as ``cursor`` for the next"""
+    store = _require_store()
+    try:
+        items, next_cursor = await asyncio.to_thread(
+            store.list_page, limit, cursor, category, evaluation_type, min_score, max_score, sort, order
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return EvaluationPage(items=items, next_cursor=next_cursor)
+
+@router.get("/evaluations/{evaluation_id}", response_model=StoredEvaluation)
+async def get_evaluation(evaluation_id: str):
+    """A stored evaluation with its full response"""
+    evaluation = await asyncio.to_thread(_require_store().get, evaluation_id)
+    if evaluation is None:
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    return evaluation
+
+@router.delete("/evaluations/{evaluation_id}")
+async def delete_evaluation(evaluation_id: str):
+    if not await asyncio.to_thread(_require_store().delete, evaluation_id):
+        raise HTTPException(status_code=404, detail=f"Evaluation {evaluation_id} not found")
+    return {"deleted": evaluation_id}
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from routers.evaluation import gemini_evaluator
+from services.latency_metrics import get_latency_metrics, monitor_event_loop_lag
+from typing import Optional
+import asyncio
+import os
+
+router = APIRouter(tags=["metrics"])
+
+# Seconds between event loop lag probes; 0 disables the probe
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.1"))
+_lag_monitor: Optional[asyncio.Task] = None
+
+@router.on_event("startup")
+async def start_lag_monitor():
+    global _lag_monitor
+    if EVENT_LOOP_LAG_INTERVAL > 0:
+        _lag_monitor = asyncio.create_task(monitor_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+
+@router.on_event("shutdown")
+async def stop_lag_monitor():
+    if _lag_monitor is not None:
+        _lag_monitor.cancel()
+
+def _gemini_client_metrics() -> str:
+    """Counters and in-flight gauge of the Gemini API client"""
+    client = gemini_evaluator.client
+    if client is None:
+        return ""
+    stats = client.stats()
+    lines = []
+    for name in ("calls", "requests", "retries", "hedges", "hedge_wins", "timeouts", "failures"):
+        lines.append(f"# TYPE gemini_client_{name}_total counter")
+        lines.append(f"gemini_client_{name}_total {stats[name]}")
+    lines.append("# TYPE gemini_client_in_flight gauge")
+    lines.append(f"gemini_client_in_flight {stats['in_flight']}")
+    return "\n".join(lines) + "\n"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def latency_metrics():
+    """Per-stage latency histograms and p50/p95/p99, plus Gemini client counters, in the Prometheus text format"""
+    try:
+        return PlainTextResponse(get_latency_metrics().render_prometheus() + _gemini_client_metrics(),
+                                 media_type="text/plain; version=0.0.4")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to render metrics: {str(e)}")
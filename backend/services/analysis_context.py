@@ -0,0 +1,165 @@
+from collections import Counter
+from typing import Any, Callable, Dict, FrozenSet, Optional, Set, Tuple
+
+from services.latency_metrics import StageTimer
+from services.text_normalization import TokenizedText
+
+
+class TextAnalysis:
+    """Lazily computed views of one input text, shared by every metric of an evaluation"""
+
+    def __init__(self, role: str, raw: str, context: "AnalysisContext"):
+        self.role = role
+        self.raw = raw or ""
+        self._context = context
+        self._clean: Optional[str] = None
+
+    @property
+    def clean(self) -> str:
+        """Preprocessed text"""
+        if self._clean is None:
+            self._clean = self._context.preprocess(self.raw)
+        return self._clean
+
+    @property
+    def normalized(self) -> TokenizedText:
+        """Tokens and n-grams of the preprocessed text"""
+        return self._context.tokenized(self.clean)
+
+    @property
+    def raw_tokens(self) -> TokenizedText:
+        """Tokens of the raw text, for metrics that look at the answer as written"""
+        return self._context.tokenized(self.raw)
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        """Whitespace tokens of the preprocessed text"""
+        return self.normalized.tokens
+
+    @property
+    def token_set(self) -> FrozenSet[str]:
+        return self.normalized.token_set
+
+    def ngrams(self, n: int) -> Counter:
+        """Counter of n-gram tuples over the preprocessed tokens"""
+        return self.normalized.ngram_counts(n)
+
+    @property
+    def vector(self):
+        """Embedding of the preprocessed text, used for vector similarity"""
+        return self._context.text_vector(self.clean, self.role)
+
+    @property
+    def doc(self):
+        """Fully parsed spaCy doc of the raw text, used for NER"""
+        return self._context.parsed_doc(self.raw, self.role)
+
+    @property
+    def lexicon_hits(self):
+        """Keyword/regex lexicon hits in the raw text (one scan for every lexicon)"""
+        return self._context.lexicon_hits(self.raw)
+
+    @property
+    def entities(self) -> Set[Tuple[str, str]]:
+        doc = self.doc
+        if doc is None:
+            return set()
+        return set((ent.text.lower(), ent.label_) for ent in doc.ents)
+
+
+class AnalysisContext:
+    """Per-evaluation cache of everything derived from the input texts.
+
+    Metrics read the question/answer/reference through this object instead of
+    re-running spaCy or TF-IDF on the same strings. Vector similarity only needs
+    the tokenizer (Doc.vector averages static word vectors), so text vectors come
+    from ``vectorize`` (tokenizer + embedding cache) and only raw texts get the full
+    pipeline for NER. Every distinct string is processed at most once per kind,
+    which ``trace()`` reports.
+    """
+
+    def __init__(self, question: str, answer: str, reference: str,
+                 preprocess: Callable[[str], str], spacy_model=None,
+                 vectorize: Optional[Callable[[str], Tuple[Any, bool]]] = None,
+                 scan_lexicons: Optional[Callable[[str], Any]] = None):
+        self.preprocess = preprocess
+        self.spacy_model = spacy_model
+        self.vectorize = vectorize
+        self.scan_lexicons = scan_lexicons
+        self.question = TextAnalysis("question", question, self)
+        self.answer = TextAnalysis("answer", answer, self)
+        self.reference = TextAnalysis("reference", reference, self)
+        self._vectors: Dict[str, Any] = {}
+        self._parsed_docs: Dict[str, Any] = {}
+        self._pair_scores: Dict[Tuple[str, str, str], float] = {}
+        self._lexicon_hits: Dict[str, Any] = {}
+        self._tokenized: Dict[str, TokenizedText] = {}
+        self._calls: Dict[str, Counter] = {}
+        self.stages = StageTimer()
+
+    def _count(self, role: str, kind: str):
+        self._calls.setdefault(role, Counter())[kind] += 1
+
+    def role_of(self, text: str) -> str:
+        """Which input a string belongs to (raw or preprocessed), for the trace counters"""
+        for analysis in (self.answer, self.reference, self.question):
+            if text == analysis.raw or text == analysis.clean:
+                return analysis.role
+        return "other"
+
+    def text_vector(self, text: str, role: Optional[str] = None):
+        """Embedding of ``text`` (a TextVector), looked up once per string"""
+        if self.vectorize is None:
+            return None
+        if text not in self._vectors:
+            self._vectors[text], hit = self.vectorize(text)
+            self._count(role or self.role_of(text), "vector_cache_hit" if hit else "tokenize")
+        return self._vectors[text]
+
+    def parsed_doc(self, text: str, role: Optional[str] = None):
+        """Fully parsed doc for ``text``, created once per string"""
+        if self.spacy_model is None:
+            return None
+        if text not in self._parsed_docs:
+            self._parsed_docs[text] = self.spacy_model(text)
+            self._count(role or self.role_of(text), "parse")
+        return self._parsed_docs[text]
+
+    def prime_parsed_doc(self, text: str, doc, role: Optional[str] = None):
+        """Install a parsed doc produced elsewhere (e.g. by a batch nlp.pipe)"""
+        if self.spacy_model is not None and text not in self._parsed_docs:
+            self._parsed_docs[text] = doc
+            self._count(role or self.role_of(text), "parse")
+
+    def tokenized(self, text: str) -> TokenizedText:
+        """Tokens and n-gram counts of ``text``, built once per string"""
+        tokenized = self._tokenized.get(text)
+        if tokenized is None:
+            tokenized = self._tokenized[text] = TokenizedText(text)
+        return tokenized
+
+    def lexicon_hits(self, text: str):
+        """Lexicon hits for ``text`` (case-insensitive), scanned once per string"""
+        key = text.lower()
+        if key not in self._lexicon_hits:
+            self._lexicon_hits[key] = self.scan_lexicons(key) if self.scan_lexicons is not None else None
+        return self._lexicon_hits[key]
+
+    def pair_score(self, kind: str, text1: str, text2: str, compute: Callable[[str, str], float]) -> float:
+        """Memoized pairwise score (e.g. TF-IDF cosine) for two strings"""
+        key = (kind, text1, text2)
+        if key not in self._pair_scores:
+            self._pair_scores[key] = compute(text1, text2)
+        return self._pair_scores[key]
+
+    def set_pair_score(self, kind: str, text1: str, text2: str, value: float):
+        self._pair_scores[(kind, text1, text2)] = value
+
+    def trace(self) -> Dict[str, Any]:
+        """spaCy work done for this evaluation, per input text"""
+        calls = {role: dict(counter) for role, counter in self._calls.items()}
+        return {
+            "spacy_calls": calls,
+            "distinct_texts_vectorized": len(self._vectors),
+            "distinct_texts_parsed": len(self._parsed_docs),
+        }
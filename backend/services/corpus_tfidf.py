@@ -0,0 +1,367 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_MODEL_PATH = os.path.join(BACKEND_DIR, "models", "tfidf_corpus.npz")
+# Bytes of the per-document digests that record online additions
+DIGEST_SIZE = 16
+
+
+class _State:
+    """Immutable snapshot of the fitted model; swapped atomically on updates"""
+
+    def __init__(self, vocabulary: Dict[str, int], document_frequency: np.ndarray, n_documents: int, version: int):
+        self.vocabulary = vocabulary
+        self.document_frequency = document_frequency
+        self.n_documents = n_documents
+        self.version = version
+        # Smooth IDF as in scikit-learn: ln((1 + n) / (1 + df)) + 1
+        self.idf = np.log((1.0 + n_documents) / (1.0 + document_frequency)) + 1.0
+        # Terms never seen in the corpus are treated as df = 0
+        self.unseen_idf = math.log(1.0 + n_documents) + 1.0
+
+
+class TfidfReferences:
+    """A fixed text set (e.g. prototypes) kept transformed against the current model"""
+
+    def __init__(self, texts: Sequence[str]):
+        self.texts = list(texts)
+        # (model version, matrix, unseen-term columns), replaced as a whole
+        self.compiled: Optional[Tuple[int, sp.csr_matrix, Dict[str, int]]] = None
+
+
+class CorpusTfidf:
+    """TF-IDF with document frequencies fitted once on a reference corpus.
+
+    IDF comes from the corpus instead of being refit on every compared pair, so a
+    request only pays for a sparse transform and a sparse dot product. Terms the
+    corpus never saw get the maximum IDF and a temporary column, which keeps two texts
+    sharing a new term comparable. ``partial_fit`` adds documents incrementally; the
+    model is saved as compact arrays (vocabulary + document frequencies) with ``save``.
+
+    ``add_online`` is the request-path variant: each distinct document counts once
+    (its digest is kept, and saved with the model), at most ``max_online_documents``
+    are added, and they are buffered and folded in every ``fold_every`` documents, so
+    the copy-on-write update is paid once per fold rather than once per request. Past
+    ``max_vocabulary`` terms, new terms are no longer added to the vocabulary (they
+    keep the unseen-term IDF).
+    """
+
+    def __init__(self, vectorizer: Optional[TfidfVectorizer] = None, max_vocabulary: Optional[int] = None,
+                 max_online_documents: Optional[int] = None, fold_every: Optional[int] = None):
+        vectorizer = vectorizer or TfidfVectorizer(stop_words='english', ngram_range=(1, 2), lowercase=True)
+        self.analyzer = vectorizer.build_analyzer()
+        self._state = _State({}, np.zeros(0), 0, 0)
+        self._lock = threading.Lock()
+        self.max_vocabulary = max(1, max_vocabulary if max_vocabulary is not None
+                                  else int(os.getenv("TFIDF_MAX_VOCABULARY", "200000")))
+        self.max_online_documents = max(0, max_online_documents if max_online_documents is not None
+                                        else int(os.getenv("TFIDF_MAX_ONLINE_DOCUMENTS", "100000")))
+        self.fold_every = max(1, fold_every if fold_every is not None else int(os.getenv("TFIDF_FOLD_EVERY", "32")))
+        # Digests of documents added online (folded or pending), so each counts once
+        self._online_digests: set = set()
+        self._pending: List[str] = []
+        # Digest of the source corpus the model was fitted on (saved with it, see build_corpus_tfidf)
+        self.corpus_digest: Optional[str] = None
+        # Digest and size of the model as fitted or loaded, before any partial_fit
+        self._base_digest = ""
+        self._base_documents = 0
+
+    @property
+    def n_documents(self) -> int:
+        return self._state.n_documents
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._state.vocabulary)
+
+    @property
+    def online_documents(self) -> int:
+        return len(self._online_digests)
+
+    @property
+    def pending_documents(self) -> int:
+        return len(self._pending)
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def model_version(self) -> str:
+        """Coarse identity of the model: the fitted or loaded model's digest plus a generation
+        that only advances each time partial_fit has doubled the corpus, so online updates do
+        not change it on every new document"""
+        growth = self._state.n_documents / max(self._base_documents, 1)
+        generation = int(math.log2(growth)) if growth >= 1 else 0
+        return f"{self._base_digest}.{generation}"
+
+    def _mark_base(self):
+        state = self._state
+        terms = sorted(state.vocabulary, key=state.vocabulary.get)
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update("\n".join(terms).encode("utf-8"))
+        digest.update(state.document_frequency.astype(np.int64).tobytes())
+        digest.update(b"%d" % state.n_documents)
+        self._base_digest = digest.hexdigest()
+        self._base_documents = state.n_documents
+
+    def fit(self, documents: Iterable[str]) -> "CorpusTfidf":
+        """Fit document frequencies from scratch"""
+        documents = list(documents)
+        with self._lock:
+            self._state = _State({}, np.zeros(0), 0, self._state.version + 1)
+            self._online_digests = set()
+            self._pending = []
+        self.partial_fit(documents)
+        self.corpus_digest = corpus_digest(documents)
+        self._mark_base()
+        return self
+
+    def partial_fit(self, documents: Iterable[str]) -> "CorpusTfidf":
+        """Add documents to the corpus statistics (incremental IDF update)"""
+        term_sets = [set(self.analyzer(document or "")) for document in documents]
+        term_sets = [terms for terms in term_sets if terms]
+        if not term_sets:
+            return self
+        with self._lock:
+            state = self._state
+            vocabulary = dict(state.vocabulary)
+            for terms in term_sets:
+                for term in terms:
+                    if term not in vocabulary and len(vocabulary) < self.max_vocabulary:
+                        vocabulary[term] = len(vocabulary)
+            document_frequency = np.zeros(len(vocabulary))
+            document_frequency[:len(state.document_frequency)] = state.document_frequency
+            for terms in term_sets:
+                document_frequency[[vocabulary[term] for term in terms if term in vocabulary]] += 1
+            self._state = _State(vocabulary, document_frequency, state.n_documents + len(term_sets), state.version + 1)
+        return self
+
+    def add_online(self, documents: Iterable[str]) -> int:
+        """Queue documents not added before; folds the queue in once ``fold_every`` are pending.
+
+        Returns how many documents were newly queued. Documents past
+        ``max_online_documents`` are ignored, so the statistics stop moving rather
+        than drift with traffic volume.
+        """
+        added = 0
+        fold = None
+        with self._lock:
+            for document in documents:
+                if not document or len(self._online_digests) >= self.max_online_documents:
+                    continue
+                digest = _document_digest(document)
+                if digest in self._online_digests:
+                    continue
+                self._online_digests.add(digest)
+                self._pending.append(document)
+                added += 1
+            if len(self._pending) >= self.fold_every:
+                fold, self._pending = self._pending, []
+        if fold:
+            self.partial_fit(fold)
+        return added
+
+    def flush(self) -> "CorpusTfidf":
+        """Fold in every pending online document"""
+        with self._lock:
+            fold, self._pending = self._pending, []
+        if fold:
+            self.partial_fit(fold)
+        return self
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        """Write the model as compressed arrays: vocabulary (column order), document frequencies, corpus size
+        and the digests of documents added online (pending ones are folded in first)"""
+        self.flush()
+        state = self._state
+        with self._lock:
+            online = b"".join(sorted(self._online_digests))
+        terms = [""] * len(state.vocabulary)
+        for term, column in state.vocabulary.items():
+            terms[column] = term
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write then rename, so worker processes starting together never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                document_frequency=state.document_frequency.astype(np.int32),
+                n_documents=np.array([state.n_documents], dtype=np.int64),
+                corpus_digest=np.frombuffer((self.corpus_digest or "").encode("ascii"), dtype=np.uint8),
+                online_digests=np.frombuffer(online, dtype=np.uint8),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = DEFAULT_MODEL_PATH) -> "CorpusTfidf":
+        with np.load(path) as data:
+            raw_terms = data["terms"].tobytes().decode("utf-8")
+            document_frequency = data["document_frequency"].astype(np.float64)
+            n_documents = int(data["n_documents"][0])
+            saved_digest = data["corpus_digest"].tobytes().decode("ascii") if "corpus_digest" in data.files else ""
+            online = data["online_digests"].tobytes() if "online_digests" in data.files else b""
+        terms = raw_terms.split("\n") if raw_terms else []
+        with self._lock:
+            self._state = _State({term: i for i, term in enumerate(terms)}, document_frequency, n_documents,
+                                 self._state.version + 1)
+            self._online_digests = {online[i:i + DIGEST_SIZE] for i in range(0, len(online), DIGEST_SIZE)}
+            self._pending = []
+        self.corpus_digest = saved_digest or None
+        self._mark_base()
+        return self
+
+    def transform(self, texts: Sequence[str], extra: Optional[Dict[str, int]] = None,
+                  state: Optional[_State] = None) -> sp.csr_matrix:
+        """L2-normalized TF-IDF rows; unseen terms are added to ``extra`` as columns after the vocabulary"""
+        state = state or self._state
+        extra = {} if extra is None else extra
+        size = len(state.vocabulary)
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for text in texts:
+            row_indices = []
+            row_data = []
+            for term, count in Counter(self.analyzer(text or "")).items():
+                column = state.vocabulary.get(term)
+                if column is not None:
+                    weight = state.idf[column]
+                else:
+                    column = size + extra.setdefault(term, len(extra))
+                    weight = state.unseen_idf
+                row_indices.append(column)
+                row_data.append(count * weight)
+            norm = math.sqrt(sum(value * value for value in row_data))
+            if norm > 0:
+                row_data = [value / norm for value in row_data]
+            indices.extend(row_indices)
+            data.extend(row_data)
+            indptr.append(len(indices))
+        return sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(texts), max(size + len(extra), 1)),
+        )
+
+    def similarity(self, text1: str, text2: str) -> float:
+        """TF-IDF cosine of a single pair"""
+        return float(self.similarities([text1], [text2])[0])
+
+    def similarities(self, texts1: Sequence[str], texts2: Sequence[str]) -> np.ndarray:
+        """TF-IDF cosine for each aligned pair, from a single transform"""
+        if not texts1:
+            return np.zeros(0)
+        matrix = self.transform(list(texts1) + list(texts2))
+        n = len(texts1)
+        cosine = np.asarray(matrix[:n].multiply(matrix[n:]).sum(axis=1)).ravel()
+        return np.clip(cosine, 0.0, 1.0)
+
+    def compile_references(self, texts: Sequence[str]) -> TfidfReferences:
+        """Reference texts for repeated one-vs-many similarity"""
+        return TfidfReferences(texts)
+
+    def similarities_to_references(self, text: str, references: TfidfReferences) -> np.ndarray:
+        """TF-IDF cosine of ``text`` with every reference text, as one sparse matrix-vector product"""
+        state = self._state
+        compiled = references.compiled
+        if compiled is None or compiled[0] != state.version:
+            extra: Dict[str, int] = {}
+            compiled = (state.version, self.transform(references.texts, extra, state), extra)
+            references.compiled = compiled
+        _, matrix, extra = compiled
+        query = self.transform([text], dict(extra), state)
+        width = matrix.shape[1]
+        query = query[:, :width] if query.shape[1] >= width else sp.hstack([query, sp.csr_matrix((1, width - query.shape[1]))]).tocsr()
+        cosine = np.asarray((matrix @ query.T).todense()).ravel()
+        return np.clip(cosine, 0.0, 1.0)
+
+
+def load_corpus_file(path: str) -> List[str]:
+    """Documents from a corpus file.
+
+    ``.json`` files may hold a list of strings or a list of stored evaluations
+    (objects with question / chatbot_answer / manual_answer); anything else is read
+    as one document per line.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if not path.endswith(".json"):
+            return [line.strip() for line in f if line.strip()]
+        items = json.load(f)
+    documents = []
+    for item in items:
+        if isinstance(item, str):
+            documents.append(item)
+        elif isinstance(item, dict):
+            documents.extend(str(item[key]) for key in ("question", "chatbot_answer", "manual_answer") if item.get(key))
+    return documents
+
+
+def _document_digest(document: str) -> bytes:
+    return hashlib.blake2b(document.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def corpus_digest(documents: Sequence[str]) -> str:
+    """Content digest of a corpus, to tell whether a saved model was fitted on it"""
+    digest = hashlib.blake2b(digest_size=16)
+    for document in documents:
+        data = (document or "").encode("utf-8")
+        digest.update(b"%d:" % len(data))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def standard_answer_corpus() -> List[str]:
+    """Predefined questions and their standard answers"""
+    from services.question_generator import QuestionGenerator
+    generator = QuestionGenerator()
+    documents = [question["text"] for question in generator.predefined_questions]
+    for answers in generator.standard_answers_map.values():
+        documents.extend(answers)
+    return documents
+
+
+def build_corpus_tfidf(vectorizer: Optional[TfidfVectorizer] = None) -> Tuple[CorpusTfidf, str]:
+    """Load the saved model (TFIDF_MODEL_PATH) or fit and save one.
+
+    The corpus is the standard answers plus TFIDF_CORPUS_PATH (a text or JSON file,
+    e.g. exported evaluations) when set; the saved model is refit when it was fitted
+    on different corpus contents. Returns the model and where it came from.
+    """
+    model_path = os.getenv("TFIDF_MODEL_PATH", DEFAULT_MODEL_PATH)
+    corpus_path = os.getenv("TFIDF_CORPUS_PATH")
+    model = CorpusTfidf(vectorizer)
+
+    documents = standard_answer_corpus()
+    source = "standard answers"
+    if corpus_path:
+        try:
+            documents.extend(load_corpus_file(corpus_path))
+            source += f" + {corpus_path}"
+        except Exception as e:
+            print(f"Failed to read TF-IDF corpus {corpus_path}: {e}")
+
+    if os.path.exists(model_path):
+        try:
+            model.load(model_path)
+            if model.corpus_digest == corpus_digest(documents):
+                return model, model_path
+            print(f"TF-IDF model at {model_path} was fitted on another corpus, refitting")
+        except Exception as e:
+            print(f"Failed to load TF-IDF model from {model_path}, refitting: {e}")
+
+    model.fit(documents)
+    try:
+        model.save(model_path)
+    except Exception as e:
+        print(f"Could not save TF-IDF model to {model_path}: {e}")
+    return model, source
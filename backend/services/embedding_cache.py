@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Rough per-entry overhead (key tuple, digest, OrderedDict node) on top of the array bytes
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class TextVector(NamedTuple):
+    """A cached text embedding.
+
+    ``token_key`` identifies the token sequence for backends (spaCy) whose
+    similarity treats identical token sequences as a perfect match.
+    """
+    vector: np.ndarray
+    norm: Any
+    token_key: Optional[int] = None
+
+
+def doc_text_vector(doc) -> TextVector:
+    """TextVector of a spaCy doc (averaged static word vectors)"""
+    return TextVector(np.array(doc.vector, dtype=np.float32), doc.vector_norm, hash(tuple(token.orth for token in doc)))
+
+
+def vector_similarity(first: TextVector, second: TextVector) -> float:
+    """Cosine similarity with spaCy Doc.similarity semantics (identical tokens -> 1, zero norm -> 0)"""
+    if first.token_key is not None and first.token_key == second.token_key:
+        return 1.0
+    if first.norm == 0 or second.norm == 0:
+        return 0.0
+    return np.dot(first.vector, second.vector) / (first.norm * second.norm)
+
+
+def _entry_bytes(value: TextVector) -> int:
+    return int(value.vector.nbytes) + ENTRY_OVERHEAD_BYTES
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache of text embeddings with a byte budget.
+
+    Keys are (backend, model version, digest of the text); callers pass the
+    preprocessed text, so every request that normalizes to the same string shares
+    one entry. Least recently used entries are evicted once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[Tuple[str, str, bytes], TextVector]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(backend: str, model_version: str, text: str) -> Tuple[str, str, bytes]:
+        return backend, model_version, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[TextVector]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple[str, str, bytes], value: TextVector):
+        size = _entry_bytes(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= _entry_bytes(previous)
+            self._entries[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= _entry_bytes(evicted)
+                self.evictions += 1
+
+    def get_or_compute(self, backend: str, model_version: str, text: str,
+                       compute: Callable[[str], TextVector]) -> Tuple[TextVector, bool]:
+        """Cached embedding of ``text``, computing it on a miss. Returns (value, was_hit)."""
+        key = self.key(backend, model_version, text)
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = compute(text)
+        self.put(key, value)
+        return value, False
+
+    def get_or_compute_many(self, backend: str, model_version: str, texts: Sequence[str],
+                            compute_many: Callable[[List[str]], List[TextVector]]) -> List[TextVector]:
+        """Cached embeddings for ``texts``; all misses are computed in one ``compute_many`` call"""
+        keys = [self.key(backend, model_version, text) for text in texts]
+        values: List[Optional[TextVector]] = [self.get(key) for key in keys]
+        missing: Dict[str, List[int]] = {}
+        for index, value in enumerate(values):
+            if value is None:
+                missing.setdefault(texts[index], []).append(index)
+        if missing:
+            computed = compute_many(list(missing))
+            for (text, indices), value in zip(missing.items(), computed):
+                self.put(keys[indices[0]], value)
+                for index in indices:
+                    values[index] = value
+        return values
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache shared by every evaluator (EMBEDDING_CACHE_MAX_BYTES, default 64 MiB)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+        return _default_cache
@@ -0,0 +1,199 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.sqlite_cache import SQLiteConnections
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "evaluations.sqlite3")
+
+# List sort keys and the indexed column each one pages over (ties broken by id)
+SORT_COLUMNS = {"created_at": "created_at", "score": "combined_score"}
+
+SUMMARY_COLUMNS = ("id", "created_at", "category", "evaluation_type", "question", "chatbot_answer", "manual_answer",
+                   "ml_score", "gemini_score", "combined_score")
+
+
+class EvaluationStore:
+    """Evaluation history in SQLite (WAL mode): one row per evaluated request.
+
+    Inputs and scores are columns, with indexes on time, category and combined score;
+    the complete EvaluationResponse is kept as JSON. Lists are keyset-paginated: the
+    cursor holds the sort value and id of the last row of a page, so every page is an
+    index range scan no matter how deep it is (no OFFSET). Beyond ``max_rows`` the
+    oldest evaluations are deleted (0 keeps everything).
+    """
+
+    def __init__(self, path: str, max_rows: int = 100000):
+        self.path = path
+        self.max_rows = max(0, int(max_rows))
+        # Pruning counts the table, so it runs every few hundred rows rather than on each write
+        self._prune_every = max(1, min(256, self.max_rows // 10))
+        self._unpruned = 0
+        self._lock = threading.Lock()
+        self.pruned = 0
+        self._connections = SQLiteConnections(path)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations ("
+                " id TEXT PRIMARY KEY, created_at REAL NOT NULL, category TEXT NOT NULL,"
+                " evaluation_type TEXT NOT NULL, question TEXT NOT NULL, chatbot_answer TEXT NOT NULL,"
+                " manual_answer TEXT NOT NULL, ml_score REAL, gemini_score REAL, combined_score REAL,"
+                " response TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS evaluations_created ON evaluations (created_at, id)")
+            connection.execute("CREATE INDEX IF NOT EXISTS evaluations_category ON evaluations (category, created_at, id)")
+            connection.execute("CREATE INDEX IF NOT EXISTS evaluations_score ON evaluations (combined_score, id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def add(self, question: str, chatbot_answer: str, manual_answer: str, category: str, evaluation_type: str,
+            response: Dict[str, Any]) -> str:
+        """Store one evaluation; returns its id"""
+        return self.add_many([(question, chatbot_answer, manual_answer, category, evaluation_type, response)])[0]
+
+    def add_many(self, rows: Sequence[Tuple[str, str, str, str, str, Dict[str, Any]]]) -> List[str]:
+        """Store (question, chatbot_answer, manual_answer, category, evaluation_type, response) rows in one transaction"""
+        now = time.time()
+        ids = [uuid.uuid4().hex for _ in rows]
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO evaluations (id, created_at, category, evaluation_type, question, chatbot_answer,"
+                " manual_answer, ml_score, gemini_score, combined_score, response) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (evaluation_id, now, category, evaluation_type, question, chatbot_answer, manual_answer,
+                     response.get("ml_score"), response.get("gemini_score"), response.get("combined_score"),
+                     json.dumps(response))
+                    for evaluation_id, (question, chatbot_answer, manual_answer, category, evaluation_type, response)
+                    in zip(ids, rows)
+                ],
+            )
+        with self._lock:
+            self._unpruned += len(rows)
+            due = self.max_rows and self._unpruned >= self._prune_every
+            if due:
+                self._unpruned = 0
+        if due:
+            self.prune()
+        return ids
+
+    def prune(self):
+        """Delete the oldest evaluations beyond ``max_rows``"""
+        if not self.max_rows:
+            return
+        connection = self._connection()
+        with connection:
+            count = connection.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+            pruned = 0
+            if count > self.max_rows:
+                pruned = connection.execute(
+                    "DELETE FROM evaluations WHERE id IN ("
+                    " SELECT id FROM evaluations ORDER BY created_at, id LIMIT ?)",
+                    (count - self.max_rows,),
+                ).rowcount
+        with self._lock:
+            self.pruned += max(pruned, 0)
+
+    @staticmethod
+    def _summary(row: Sequence[Any]) -> Dict[str, Any]:
+        summary = dict(zip(SUMMARY_COLUMNS, row))
+        summary["created_at"] = datetime.fromtimestamp(summary["created_at"], tz=timezone.utc)
+        return summary
+
+    def get(self, evaluation_id: str) -> Optional[Dict[str, Any]]:
+        """The stored evaluation with its full response, or None"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)}, response FROM evaluations WHERE id = ?", (evaluation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        evaluation = self._summary(row[:-1])
+        evaluation["response"] = {**json.loads(row[-1]), "evaluation_id": evaluation_id}
+        return evaluation
+
+    def delete(self, evaluation_id: str) -> bool:
+        connection = self._connection()
+        with connection:
+            return connection.execute("DELETE FROM evaluations WHERE id = ?", (evaluation_id,)).rowcount > 0
+
+    @staticmethod
+    def encode_cursor(sort: str, order: str, value: Any, evaluation_id: str) -> str:
+        payload = json.dumps([sort, order, value, evaluation_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+        """(sort value, id) of a cursor; ValueError if it is malformed or from a list in another order"""
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, cursor_order, value, evaluation_id = json.loads(payload)
+        except Exception:
+            raise ValueError("Malformed cursor")
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError(f"Cursor belongs to a list sorted by {cursor_sort} {cursor_order}")
+        return value, evaluation_id
+
+    def list_page(self, limit: int = 50, cursor: Optional[str] = None, category: Optional[str] = None,
+                  evaluation_type: Optional[str] = None, min_score: Optional[float] = None,
+                  max_score: Optional[float] = None, sort: str = "created_at",
+                  order: str = "desc") -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of evaluation summaries (no response JSON) and the cursor of the next page (None at the end).
+
+        ``sort`` is "created_at" or "score" (the combined score; rows without one are
+        left out), ``order`` "desc" or "asc". Score bounds filter on the combined score.
+        """
+        if sort not in SORT_COLUMNS or order not in ("asc", "desc"):
+            raise ValueError(f"Cannot sort by {sort} {order}")
+        column = SORT_COLUMNS[sort]
+        conditions: List[str] = []
+        params: List[Any] = []
+        if category is not None:
+            conditions.append("category = ?")
+            params.append(category)
+        if evaluation_type is not None:
+            conditions.append("evaluation_type = ?")
+            params.append(evaluation_type)
+        if min_score is not None:
+            conditions.append("combined_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("combined_score <= ?")
+            params.append(max_score)
+        if sort == "score":
+            conditions.append("combined_score IS NOT NULL")
+        if cursor is not None:
+            value, last_id = self.decode_cursor(cursor, sort, order)
+            conditions.append(f"({column}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+            params.extend([value, last_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM evaluations {where}"
+            f" ORDER BY {column} {order}, id {order} LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = dict(zip(SUMMARY_COLUMNS, rows[-1]))
+            next_cursor = self.encode_cursor(sort, order, last[column], last["id"])
+        return [self._summary(row) for row in rows], next_cursor
+
+
+def create_evaluation_store() -> Optional[EvaluationStore]:
+    """Store configured from the environment: None unless EVALUATION_STORE=on, or when the database cannot be opened"""
+    if os.getenv("EVALUATION_STORE", "off").lower() not in ("on", "true", "1"):
+        return None
+    try:
+        return EvaluationStore(os.getenv("EVALUATION_STORE_PATH", DEFAULT_STORE_PATH),
+                               max_rows=int(os.getenv("EVALUATION_STORE_MAX_ROWS", "100000")))
+    except Exception as e:
+        print(f"Evaluation store unavailable: {e}")
+        return None
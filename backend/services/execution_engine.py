@@ -0,0 +1,279 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from services.request_profiler import profile_call
+
+logger = logging.getLogger(__name__)
+
+
+class EngineOverloadedError(RuntimeError):
+    """Raised when the evaluation queue is full and a request has to be shed."""
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised when the worker process evaluating a request died (the pool is rebuilt, the request is not retried)."""
+
+
+# Evaluator owned by a pool worker process (one per process, created by the initializer)
+_worker_evaluator = None
+
+
+def _init_worker():
+    """Process pool initializer: load a warm evaluator (and its spaCy model) once per worker"""
+    global _worker_evaluator
+    from services.ml_evaluator_lightweight import LightweightMLEvaluator
+    _worker_evaluator = LightweightMLEvaluator()
+
+
+def _worker_ping() -> int:
+    """No-op task used to force worker processes to start and load their models"""
+    return os.getpid()
+
+
+def _worker_cache_stats() -> Dict[str, Any]:
+    """Cache counters of the worker process that picks up this task"""
+    from services.embedding_cache import get_embedding_cache
+    from services.grammar_checker import get_grammar_checker
+    return {"pid": os.getpid(), "embeddings": get_embedding_cache().stats(), "grammar": get_grammar_checker().stats()}
+
+
+def _evaluate_in_worker(question: str, chatbot_answer: str, manual_answer: str, category: str,
+                        **options) -> Dict[str, Any]:
+    """Run a single evaluation inside a pool worker process"""
+    return _worker_evaluator.evaluate_sync(question, chatbot_answer, manual_answer, category, **options)
+
+
+def _evaluate_profiled_in_worker(question: str, chatbot_answer: str, manual_answer: str, category: str,
+                                 **options) -> Dict[str, Any]:
+    """Run a single evaluation under the profiler inside a pool worker process"""
+    return profile_call(_worker_evaluator.evaluate_sync, question, chatbot_answer, manual_answer, category, **options)
+
+
+def _evaluate_batch_in_worker(items: Sequence[Tuple[str, str, str, str]]) -> List[Dict[str, Any]]:
+    """Run a batch evaluation inside a pool worker process"""
+    return _worker_evaluator.evaluate_batch_sync(items)
+
+
+class EvaluationEngine:
+    """Dispatches CPU-bound ML evaluations so they never run on the event loop.
+
+    Modes (ML_EXECUTION_MODE):
+      - "inline":  run on the event loop (old behaviour, handy for debugging)
+      - "thread":  run on a thread pool sharing the given evaluator
+      - "process": run on a pool of worker processes, each with its own warm evaluator
+
+    ML_WORKERS sets the pool size, ML_MAX_QUEUE the number of requests allowed to
+    wait for a free worker before new ones are rejected, and ML_MAX_TASKS_PER_WORKER
+    recycles a worker process after that many evaluations (0 disables recycling).
+    """
+
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, evaluator=None, mode: Optional[str] = None, workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, max_tasks_per_worker: Optional[int] = None):
+        self.evaluator = evaluator
+        self.mode = (mode or os.getenv("ML_EXECUTION_MODE", "thread")).lower()
+        if self.mode not in self.MODES:
+            logger.warning("Unknown ML_EXECUTION_MODE '%s', falling back to 'thread'", self.mode)
+            self.mode = "thread"
+        if self.mode == "process":
+            default_workers = os.cpu_count() or 1
+        else:
+            default_workers = min(4, os.cpu_count() or 1)
+        self.workers = max(1, workers or int(os.getenv("ML_WORKERS", str(default_workers))))
+        self.max_queue = max(0, max_queue if max_queue is not None else int(os.getenv("ML_MAX_QUEUE", str(self.workers * 4))))
+        self.max_tasks_per_worker = max_tasks_per_worker if max_tasks_per_worker is not None else int(os.getenv("ML_MAX_TASKS_PER_WORKER", "0"))
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.worker_crashes = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of evaluations running or waiting at once"""
+        return self.workers + self.max_queue
+
+    def _create_executor(self):
+        if self.mode == "process":
+            # spawn: safe with the server's threads, and required for max_tasks_per_child
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                max_tasks_per_child=self.max_tasks_per_worker or None,
+            )
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ml-eval")
+        return None
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def _discard_broken_executor(self, broken):
+        """Drop a pool whose worker died, once: callers that saw the same pool break leave its replacement alone"""
+        with self._executor_lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.worker_crashes += 1
+        logger.warning("ML worker process died, replacing the worker pool")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self):
+        """Create the pool and warm up worker processes so the first requests don't pay model load time"""
+        executor = self._get_executor()
+        if self.mode == "process":
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*[loop.run_in_executor(executor, _worker_ping) for _ in range(self.workers)])
+        logger.info("ML execution engine started - mode: %s, workers: %d, max queue: %d",
+                    self.mode, self.workers, self.max_queue)
+
+    def shutdown(self):
+        """Stop the pool, letting running evaluations finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def evaluate(self, question: str, chatbot_answer: str, manual_answer: str, category: str = 'general',
+                       profile: bool = False,
+                       progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                       cache_mode: str = "use", **options) -> Dict[str, Any]:
+        """Evaluate off the event loop, rejecting the request if the queue is full.
+
+        The evaluator's result cache is consulted first (``cache_mode`` as for
+        LightweightMLEvaluator.evaluate), so cache hits never wait for a worker; they
+        send no ``progress``. With ``profile`` the evaluation bypasses the cache, runs
+        under cProfile/tracemalloc and the report is attached as ``trace.ml.profile``;
+        without it nothing is profiled.
+        ``progress`` receives partial results from the evaluating thread (inline and
+        thread modes; worker processes only return the final result). Other keyword
+        ``options`` go to evaluate_sync: ``tolerance`` and ``latency_budget`` (tiered
+        early exit), ``metrics``, ``include_trace`` and ``include_explanation``.
+        """
+        if profile:
+            cache_mode = "bypass"
+        key = None
+        if cache_mode != "bypass":
+            key = self.evaluator.result_cache_key(question, chatbot_answer, manual_answer, category, **options)
+        if cache_mode == "use":
+            cached = self.evaluator.cached_result(key)
+            if cached is not None:
+                return cached
+
+        thread_fn, worker_fn = self.evaluator.evaluate_sync, _evaluate_in_worker
+        if profile:
+            worker_fn = _evaluate_profiled_in_worker
+        if options:
+            thread_fn = functools.partial(thread_fn, **options)
+            worker_fn = functools.partial(worker_fn, **options)
+        if progress is not None:
+            thread_fn = functools.partial(thread_fn, progress=progress)
+        if profile:
+            thread_fn = functools.partial(profile_call, thread_fn)
+        if self.mode == "inline":
+            result = thread_fn(question, chatbot_answer, manual_answer, category)
+        else:
+            result = await self._dispatch(thread_fn, worker_fn, question, chatbot_answer, manual_answer, category)
+        return (await self._store([key], [result], [cache_mode]))[0]
+
+    async def evaluate_batch(self, items: Sequence[Tuple[str, str, str, str]],
+                             cache_modes: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Evaluate a chunk of (question, chatbot_answer, manual_answer, category) rows as one task.
+
+        Rows found in the result cache (per-row ``cache_modes``, default "use") are
+        answered from it and only the others are evaluated.
+        """
+        items = list(items)
+        cache_modes = list(cache_modes) if cache_modes is not None else ["use"] * len(items)
+        keys = [self.evaluator.result_cache_key(*item) if cache_mode != "bypass" else None
+                for item, cache_mode in zip(items, cache_modes)]
+        results: List[Optional[Dict[str, Any]]] = [
+            self.evaluator.cached_result(key) if cache_mode == "use" else None
+            for key, cache_mode in zip(keys, cache_modes)
+        ]
+        missing = [index for index, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        rows = [items[index] for index in missing]
+        if self.mode == "inline":
+            computed = self.evaluator.evaluate_batch_sync(rows)
+        else:
+            computed = await self._dispatch(self.evaluator.evaluate_batch_sync, _evaluate_batch_in_worker, rows)
+        stored = await self._store([keys[index] for index in missing], computed, [cache_modes[index] for index in missing])
+        for index, result in zip(missing, stored):
+            results[index] = result
+        return results
+
+    async def _store(self, keys: Sequence[Optional[str]], results: Sequence[Dict[str, Any]],
+                     cache_modes: Sequence[str]) -> List[Dict[str, Any]]:
+        """Put computed results in the result cache (serialization and disk writes off the event loop)"""
+        def store():
+            return [self.evaluator.store_result(key, result, cache_mode)
+                    for key, result, cache_mode in zip(keys, results, cache_modes)]
+        if all(key is None for key in keys):
+            return store()
+        return await asyncio.to_thread(store)
+
+    async def _dispatch(self, thread_fn, worker_fn, *args):
+        """Admit a task if there is room in the queue and run it on the pool"""
+        if self._in_flight >= self.capacity:
+            self.rejected += 1
+            raise EngineOverloadedError(f"ML evaluation queue is full ({self.capacity} requests in flight)")
+
+        self._in_flight += 1
+        try:
+            result = await self._submit(thread_fn, worker_fn, *args)
+            self.completed += 1
+            return result
+        finally:
+            self._in_flight -= 1
+
+    async def _submit(self, thread_fn, worker_fn, *args):
+        loop = asyncio.get_running_loop()
+        if self.mode == "thread":
+            return await loop.run_in_executor(self._get_executor(), thread_fn, *args)
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, worker_fn, *args)
+        except BrokenProcessPool as e:
+            # A worker died (OOM, segfault in a native extension). The next request gets a
+            # fresh pool; this one is not retried, since its input may be what killed the worker.
+            self._discard_broken_executor(executor)
+            raise WorkerCrashedError("ML worker process died during evaluation") from e
+
+    async def cache_stats(self) -> Dict[str, Any]:
+        """Embedding and grammar cache counters of the processes doing the evaluations.
+
+        Thread/inline modes share this process's cache; in process mode every worker
+        has its own, and the counters come from whichever worker answers.
+        """
+        if self.mode != "process":
+            return {"scope": "process", **_worker_cache_stats()}
+        loop = asyncio.get_running_loop()
+        stats = await loop.run_in_executor(self._get_executor(), _worker_cache_stats)
+        return {"scope": "worker", **stats}
+
+    def stats(self) -> Dict[str, Any]:
+        """Current engine configuration and counters"""
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "max_tasks_per_worker": self.max_tasks_per_worker,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "worker_crashes": self.worker_crashes,
+        }
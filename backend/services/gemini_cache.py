@@ -0,0 +1,52 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from services.sqlite_cache import JsonLRUCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "gemini_results.sqlite3")
+
+CACHE_MODES = ("use", "bypass", "refresh")
+
+
+class GeminiResultCache(JsonLRUCache):
+    """Parsed Gemini results on disk (SQLite), keyed by a fingerprint of the prompt.
+
+    The key hashes the exact prompt text, the model name and the prompt template
+    version, so any change to the inputs, the model or the instructions misses.
+    Entries expire after ``ttl_seconds`` (0 keeps them forever); past ``max_entries``
+    the least recently used ones are deleted. A small in-process LRU of the stored
+    JSON sits in front of the database, so repeated hits skip SQLite entirely.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000,
+                 memory_entries: int = 1024):
+        super().__init__("gemini_results", path, memory_entries=memory_entries, max_entries=max_entries,
+                         ttl_seconds=ttl_seconds, columns=("model", "template_version"))
+
+    @staticmethod
+    def key(prompt: str, model: str, template_version: str) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (model, template_version, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def put(self, key: str, result: Dict[str, Any], model: str, template_version: str):
+        self._store(key, result, (model, template_version))
+
+
+def create_gemini_cache() -> Optional[GeminiResultCache]:
+    """Cache configured from the environment, or None when GEMINI_CACHE=off or the database cannot be opened"""
+    if os.getenv("GEMINI_CACHE", "on").lower() in ("off", "false", "0"):
+        return None
+    try:
+        return GeminiResultCache(
+            os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl_seconds=float(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "10000")),
+            memory_entries=int(os.getenv("GEMINI_CACHE_MEMORY_ENTRIES", "1024")),
+        )
+    except Exception as e:
+        print(f"Gemini result cache unavailable: {e}")
+        return None
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+import numpy as np
+
+DEFAULT_ENDPOINT = "https://generativelanguage.googleapis.com"
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiAPIError(RuntimeError):
+    """A failed generateContent call; ``retryable`` for throttling, server errors and timeouts"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class AsyncGeminiClient:
+    """Native-async client for the Gemini generateContent REST API.
+
+    - at most ``max_in_flight`` HTTP requests at once (callers beyond that wait,
+      and the wait counts against their deadline)
+    - every call has a deadline of ``timeout`` seconds covering all its attempts
+    - retryable failures are retried up to ``max_retries`` times with exponential
+      backoff and full jitter (or the server's Retry-After, if shorter than the deadline)
+    - with ``hedge_percentile`` set, a call still running after that percentile of
+      recent latencies sends a duplicate request if a slot is free; the first
+      successful reply wins and the other request is cancelled
+    - one pooled httpx.AsyncClient (keep-alive connections) per event loop; moving to
+      another loop closes the previous pool
+    """
+
+    def __init__(self, api_key: str, model: str, endpoint: Optional[str] = None, max_in_flight: int = 16,
+                 timeout: float = 30.0, max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 hedge_percentile: float = 0.0, hedge_min_samples: int = 20):
+        self.api_key = api_key
+        self.model = model
+        self.endpoint = (endpoint or DEFAULT_ENDPOINT).rstrip("/")
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout = float(timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: Deque[float] = deque(maxlen=512)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self.counters = {"calls": 0, "requests": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                         "timeouts": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls, api_key: str, model: str) -> "AsyncGeminiClient":
+        return cls(
+            api_key, model,
+            endpoint=os.getenv("GEMINI_API_ENDPOINT"),
+            max_in_flight=int(os.getenv("GEMINI_MAX_IN_FLIGHT", "16")),
+            timeout=float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30")),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+            hedge_percentile=float(os.getenv("GEMINI_HEDGE_PERCENTILE", "0")),
+        )
+
+    async def _bind_loop(self):
+        """Pool and semaphore belong to the running loop; recreate them if the loop changed"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            previous, previous_loop = self._http, self._loop
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._http = httpx.AsyncClient(
+                base_url=self.endpoint,
+                limits=httpx.Limits(max_connections=self.max_in_flight * 2,
+                                    max_keepalive_connections=self.max_in_flight),
+                timeout=self.timeout,
+            )
+            if previous is not None:
+                await self._close_http(previous, previous_loop)
+
+    @staticmethod
+    async def _close_http(http: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a pool on the loop its connections belong to, when that loop is still running"""
+        try:
+            if loop is not None and loop.is_running() and loop is not asyncio.get_running_loop():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(http.aclose(), loop))
+            else:
+                await http.aclose()
+        except RuntimeError as e:
+            # Connections opened on a loop that has since closed cannot be shut down through it;
+            # their sockets are released when the transports are garbage collected
+            print(f"Could not close the previous Gemini HTTP pool: {e}")
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._close_http(self._http, self._loop)
+            self._http, self._loop = None, None
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency percentile after which a hedged request is sent, once there are enough samples"""
+        if not self.hedge_percentile or len(self._latencies) < self.hedge_min_samples:
+            return None
+        return float(np.percentile(np.fromiter(self._latencies, dtype=np.float64), self.hedge_percentile))
+
+    async def generate(self, prompt: str) -> str:
+        """Text of the model's reply to ``prompt``; raises GeminiAPIError when every attempt failed"""
+        await self._bind_loop()
+        self.counters["calls"] += 1
+        deadline = time.monotonic() + self.timeout
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._hedged(prompt, deadline)
+            except GeminiAPIError as e:
+                remaining = deadline - time.monotonic()
+                if not e.retryable or attempt == self.max_retries or remaining <= 0:
+                    self.counters["failures"] += 1
+                    raise
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if e.retry_after is not None:
+                    backoff = max(backoff, e.retry_after)
+                if backoff >= remaining:
+                    self.counters["failures"] += 1
+                    raise
+                self.counters["retries"] += 1
+                await asyncio.sleep(backoff)
+
+    async def _hedged(self, prompt: str, deadline: float) -> str:
+        primary = asyncio.create_task(self._request(prompt, deadline))
+        hedge: Optional[asyncio.Task] = None
+        pending = {primary}
+        error: Optional[BaseException] = None
+        # Whatever ends this call (a reply, an error, the caller being cancelled), requests
+        # still running are cancelled so they give back their slot
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=min(delay, max(0.0, deadline - time.monotonic())))
+                if not done and self._in_flight < self.max_in_flight:
+                    self.counters["hedges"] += 1
+                    hedge = asyncio.create_task(self._request(prompt, deadline))
+                    pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request(self, prompt: str, deadline: float) -> str:
+        """One HTTP request, waiting for a slot first; the slot wait counts against the deadline"""
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise GeminiAPIError("deadline exceeded waiting for a free Gemini slot", retryable=False)
+        self._in_flight += 1
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.counters["timeouts"] += 1
+                raise GeminiAPIError("deadline exceeded", retryable=False)
+            self.counters["requests"] += 1
+            started = time.monotonic()
+            try:
+                # httpx timeouts apply per read/write; wait_for bounds the whole exchange
+                response = await asyncio.wait_for(self._http.post(
+                    f"/v1beta/models/{self.model}:generateContent",
+                    headers={"x-goog-api-key": self.api_key},
+                    json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]},
+                    timeout=remaining,
+                ), timeout=remaining)
+            except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+                self.counters["timeouts"] += 1
+                raise GeminiAPIError(f"Gemini request timed out: {type(e).__name__}", retryable=True) from e
+            except httpx.TransportError as e:
+                raise GeminiAPIError(f"Gemini connection failed: {e}", retryable=True) from e
+
+            if response.status_code != 200:
+                retry_after = response.headers.get("retry-after")
+                raise GeminiAPIError(
+                    f"Gemini returned HTTP {response.status_code}: {response.text[:200]}",
+                    status=response.status_code,
+                    retryable=response.status_code in RETRYABLE_STATUS,
+                    retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None,
+                )
+            self._latencies.append(time.monotonic() - started)
+            try:
+                body = response.json()
+            except ValueError as e:
+                # A proxy or overloaded frontend can answer 200 with an HTML page
+                raise GeminiAPIError(f"Gemini returned a non-JSON body: {response.text[:200]}",
+                                     status=response.status_code, retryable=True) from e
+            return self._reply_text(body)
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    @staticmethod
+    def _reply_text(body: Dict[str, Any]) -> str:
+        if not isinstance(body, dict):
+            raise GeminiAPIError(f"Gemini returned an unexpected body: {str(body)[:200]}", retryable=True)
+        candidates = body.get("candidates") or []
+        if not candidates:
+            reason = (body.get("promptFeedback") or {}).get("blockReason", "no candidates")
+            raise GeminiAPIError(f"Gemini returned no answer ({reason})")
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = np.fromiter(self._latencies, dtype=np.float64)
+        return {
+            **self.counters,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "timeout_seconds": self.timeout,
+            "hedge_percentile": self.hedge_percentile,
+            "hedge_delay_seconds": self.hedge_delay(),
+            "latency_p50": float(np.percentile(latencies, 50)) if latencies.size else None,
+            "latency_p95": float(np.percentile(latencies, 95)) if latencies.size else None,
+        }
@@ -0,0 +1,245 @@
+import bisect
+import hashlib
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import language_tool_python  # type: ignore
+except Exception:  # pragma: no cover
+    language_tool_python = None  # type: ignore
+
+# Texts in one LanguageTool call are joined with this separator (a paragraph break, where
+# LanguageTool restarts sentence rules); matches are mapped back to their text by offset
+BATCH_SEPARATOR = "\n\n"
+
+
+class RuleBasedChecker:
+    """Offline grammar/style checker built from a handful of high-precision rules.
+
+    Covers the issues LanguageTool most often reports on chatbot answers (repeated
+    words, spacing around punctuation, a/an, common misspellings and missing
+    apostrophes) with no server and no network. Casing is not checked: lowercase
+    chat-style answers ("yes i can") are common, and on short answers a couple of
+    casing hits would push clarity below its guardrail.
+    """
+
+    RULES = [
+        ("ENGLISH_WORD_REPEAT_RULE", re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE)),
+        ("COMMA_PARENTHESIS_WHITESPACE", re.compile(r"\w\s+[,;:!?](?!\S)")),
+        ("MISSING_SPACE_AFTER_PUNCTUATION", re.compile(r"[a-z][,;!?](?=[A-Za-z])")),
+        ("WHITESPACE_RULE", re.compile(r"\S {2,}\S")),
+        ("EN_A_VS_AN", re.compile(r"\b[Aa] (?=[aeiAEI][a-z])|\b[Aa]n (?=[bcdfgjklmnpqrstvwxz][a-z])")),
+        ("MORFOLOGIK_RULE_EN_US", re.compile(
+            r"\b(?:teh|recieve|recieved|definately|alot|seperate|occured|untill|wich|becuase|thier|"
+            r"accomodate|enviroment|goverment|neccessary|occurence|publically|truely|wierd)\b", re.IGNORECASE)),
+        ("EN_CONTRACTION_SPELLING", re.compile(
+            r"\b(?:dont|doesnt|didnt|isnt|arent|wasnt|werent|couldnt|shouldnt|wouldnt|havent|hasnt|im|ive|youre|theyre)\b",
+            re.IGNORECASE)),
+        ("COULD_OF", re.compile(r"\b(?:could|should|would|must) of\b", re.IGNORECASE)),
+    ]
+
+    def check(self, text: str) -> int:
+        return sum(len(pattern.findall(text)) for _, pattern in self.RULES)
+
+
+class GrammarChecker:
+    """Pooled, cached grammar checking for the clarity metric.
+
+    Backends (GRAMMAR_BACKEND):
+      - "auto" (default): a local LanguageTool server if one can be started, else "off"
+      - "languagetool": GRAMMAR_POOL_SIZE long-lived local LanguageTool servers
+        (or GRAMMAR_SERVER_URL, an already running one)
+      - "public": the public LanguageTool API (network; opt-in only)
+      - "rules": the offline RuleBasedChecker (opt-in; its counts are not LanguageTool's)
+      - "off": no grammar check (clarity falls back to its neutral value)
+
+    Several texts are checked in one LanguageTool call, each call is bounded by
+    GRAMMAR_TIMEOUT_SECONDS (falling back to the rule-based checker on timeout or
+    error), and issue counts are cached by text hash (GRAMMAR_CACHE_SIZE entries).
+    """
+
+    BACKENDS = ("auto", "languagetool", "public", "rules", "off")
+
+    def __init__(self, backend: Optional[str] = None, pool_size: Optional[int] = None,
+                 timeout: Optional[float] = None, cache_size: Optional[int] = None,
+                 server_url: Optional[str] = None):
+        self.backend = (backend or os.getenv("GRAMMAR_BACKEND", "auto")).lower()
+        if self.backend not in self.BACKENDS:
+            print(f"Unknown GRAMMAR_BACKEND '{self.backend}', falling back to 'auto'")
+            self.backend = "auto"
+        self.pool_size = max(1, pool_size or int(os.getenv("GRAMMAR_POOL_SIZE", "1")))
+        self.timeout = timeout if timeout is not None else float(os.getenv("GRAMMAR_TIMEOUT_SECONDS", "2.0"))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("GRAMMAR_CACHE_SIZE", "4096"))
+        self.server_url = server_url or os.getenv("GRAMMAR_SERVER_URL") or None
+
+        self.rules = RuleBasedChecker()
+        self._tools: "queue.Queue[Any]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pool_count = 0
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+        if self.backend in ("auto", "languagetool", "public"):
+            self._start_pool()
+
+    def _start_pool(self):
+        """Start the LanguageTool clients once; they stay warm for the life of the process"""
+        try:
+            if language_tool_python is None:
+                raise RuntimeError("language_tool_python is not installed")
+            for _ in range(self.pool_size if self.backend != "public" else 1):
+                if self.backend == "public":
+                    tool = language_tool_python.LanguageToolPublicAPI('en-US')
+                else:
+                    tool = language_tool_python.LanguageTool('en-US', remote_server=self.server_url)
+                self._tools.put(tool)
+            self._pool_count = self._tools.qsize()
+            self._executor = ThreadPoolExecutor(max_workers=self._pool_count, thread_name_prefix="grammar")
+            self.backend = "public" if self.backend == "public" else "languagetool"
+            print(f"Grammar checker ready - {self.backend} pool of {self._pool_count}")
+        except Exception as e:
+            # Without a real backend clarity keeps its neutral value rather than a different scale
+            fallback = "off" if self.backend == "auto" else "rules"
+            print(f"LanguageTool unavailable, grammar backend '{fallback}': {e}")
+            self._close_tools()
+            self.backend = fallback
+
+    @property
+    def available(self) -> bool:
+        return self.backend != "off"
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def check(self, text: str) -> Optional[int]:
+        """Number of grammar issues in ``text`` (None when checking is off)"""
+        return self.check_many([text])[0]
+
+    def check_many(self, texts: Sequence[str]) -> List[Optional[int]]:
+        """Issue counts for several texts; uncached ones go to the backend in one call"""
+        if self.backend == "off":
+            return [None] * len(texts)
+
+        results: List[Optional[int]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for index, text in enumerate(texts):
+                key = self._key(text)
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[index] = self._cache[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(text, []).append(index)
+                    self.misses += 1
+
+        if missing:
+            pending = list(missing)
+            counts, cacheable = self._check_uncached(pending)
+            with self._lock:
+                for text, count in zip(pending, counts):
+                    for index in missing[text]:
+                        results[index] = count
+                    if cacheable and self.cache_size > 0:
+                        self._cache[self._key(text)] = count
+                        while len(self._cache) > self.cache_size:
+                            self._cache.popitem(last=False)
+        return results
+
+    def _check_uncached(self, texts: List[str]) -> Tuple[List[int], bool]:
+        """Issue counts from the backend, and whether they may be cached (fallback answers are not)"""
+        if self._executor is None:
+            return [self.rules.check(text) for text in texts], True
+        future = self._executor.submit(self._languagetool_check, texts)
+        try:
+            return future.result(timeout=self.timeout), True
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+        except Exception as e:
+            print(f"LanguageTool check failed: {e}")
+        # Degrade gracefully: answer from the offline rules instead of failing or waiting
+        with self._lock:
+            self.fallbacks += 1
+        return [self.rules.check(text) for text in texts], False
+
+    def _languagetool_check(self, texts: List[str]) -> List[int]:
+        """One LanguageTool call for all ``texts``; matches are attributed by offset.
+
+        A match that reaches outside its text (into the separator or a neighbouring
+        text, e.g. a word repeated across the boundary) could not occur if the text
+        were checked alone, so it is dropped: each count, and so the cache, stays
+        independent of which texts shared the call.
+        """
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(BATCH_SEPARATOR)
+
+        tool = self._tools.get()
+        try:
+            matches = tool.check(BATCH_SEPARATOR.join(texts))
+        finally:
+            self._tools.put(tool)
+
+        counts = [0] * len(texts)
+        for match in matches:
+            index = bisect.bisect_right(starts, match.offset) - 1
+            if match.offset + max(match.errorLength, 0) <= starts[index] + len(texts[index]):
+                counts[index] += 1
+        return counts
+
+    def _close_tools(self):
+        while not self._tools.empty():
+            tool = self._tools.get_nowait()
+            try:
+                tool.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Stop local LanguageTool servers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._close_tools()
+        self._pool_count = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "pool_size": self._pool_count,
+                "entries": len(self._cache),
+                "max_entries": self.cache_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "timeouts": self.timeouts,
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_default_checker: Optional[GrammarChecker] = None
+_default_checker_lock = threading.Lock()
+
+
+def get_grammar_checker() -> GrammarChecker:
+    """Process-wide grammar checker, so the LanguageTool pool is started once"""
+    global _default_checker
+    with _default_checker_lock:
+        if _default_checker is None:
+            _default_checker = GrammarChecker()
+        return _default_checker
@@ -0,0 +1,170 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageTimer:
+    """Wall-clock time per named stage of one evaluation"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def measure(self, name: str, fn: Callable, *args, **kwargs):
+        """Call ``fn`` and add its duration to stage ``name``"""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def rounded(self, digits: int = 6) -> Dict[str, float]:
+        return {name: round(seconds, digits) for name, seconds in self.timings.items()}
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus a sliding window of recent samples for exact quantiles"""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        if not self.recent:
+            return {}
+        values = np.percentile(np.fromiter(self.recent, dtype=np.float64), [q * 100 for q in QUANTILES])
+        return dict(zip(QUANTILES, (float(v) for v in values)))
+
+
+class LatencyMetrics:
+    """Per-stage latency histograms labeled by stage, category and endpoint.
+
+    Rendered in the Prometheus text format: a histogram (cumulative ``_bucket``
+    series, ``_sum``, ``_count``) for aggregation on the server side, and a summary
+    with p50/p95/p99 over the last ``window`` samples of each series.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: Optional[int] = None):
+        self.buckets = tuple(sorted(buckets))
+        self.window = window or int(os.getenv("LATENCY_WINDOW", "2048"))
+        self._series: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, category: str = "none", endpoint: str = "none"):
+        key = (stage, category or "none", endpoint or "none")
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = LatencyHistogram(self.buckets, self.window)
+            histogram.observe(max(float(seconds), 0.0))
+
+    def observe_many(self, timings: Optional[Dict[str, float]], category: str = "none", endpoint: str = "none",
+                     prefix: str = ""):
+        for stage, seconds in (timings or {}).items():
+            if isinstance(seconds, (int, float)):
+                self.observe(f"{prefix}{stage}", seconds, category, endpoint)
+
+    def observe_result(self, result: Optional[Dict[str, Any]], category: str, endpoint: str):
+        """Record the stage timings an ML evaluation put in ``trace.ml.stage_timings``"""
+        if not isinstance(result, dict):
+            return
+        trace = (result.get("trace") or {}).get("ml") or {}
+        self.observe_many(trace.get("stage_timings"), category, endpoint, prefix="ml.")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Count, sum and quantiles of every series (for tests and JSON consumers)"""
+        with self._lock:
+            return {
+                "|".join(key): {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    **{f"p{int(q * 100)}": value for q, value in histogram.quantiles().items()},
+                }
+                for key, histogram in self._series.items()
+            }
+
+    def render_prometheus(self, name: str = "evaluation_stage_duration_seconds") -> str:
+        lines: List[str] = [
+            f"# HELP {name} Wall time of each evaluation stage, by category and endpoint.",
+            f"# TYPE {name} histogram",
+        ]
+        summary_lines: List[str] = [
+            f"# HELP {name}_quantiles p50/p95/p99 of each stage over the last {self.window} samples.",
+            f"# TYPE {name}_quantiles summary",
+        ]
+        with self._lock:
+            for (stage, category, endpoint), histogram in sorted(self._series.items()):
+                labels = f'stage="{_escape(stage)}",category="{_escape(category)}",endpoint="{_escape(endpoint)}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+                for quantile, value in histogram.quantiles().items():
+                    summary_lines.append(f'{name}_quantiles{{{labels},quantile="{quantile:g}"}} {value:.6f}')
+                summary_lines.append(f"{name}_quantiles_sum{{{labels}}} {sum(histogram.recent):.6f}")
+                summary_lines.append(f"{name}_quantiles_count{{{labels}}} {len(histogram.recent)}")
+        return "\n".join(lines + summary_lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+async def monitor_event_loop_lag(interval: float, metrics: Optional["LatencyMetrics"] = None):
+    """Record how late the event loop wakes a sleeping task, as stage ``event_loop_lag``.
+
+    Blocking work on the loop (CPU-bound code, synchronous I/O) shows up as lag; runs
+    until cancelled.
+    """
+    metrics = metrics or get_latency_metrics()
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        metrics.observe("event_loop_lag", max(0.0, loop.time() - scheduled), endpoint="server")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_default_metrics: Optional[LatencyMetrics] = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_latency_metrics() -> LatencyMetrics:
+    """Process-wide latency registry (the API process; worker timings arrive in results)"""
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = LatencyMetrics()
+        return _default_metrics
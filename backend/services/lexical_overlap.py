@@ -0,0 +1,107 @@
+import math
+from typing import Dict, NamedTuple, Tuple, Union
+
+from services.text_normalization import TokenizedText
+
+TextOrTokens = Union[str, TokenizedText]
+
+
+class LexicalOverlap(NamedTuple):
+    """Overlap statistics of a candidate against a reference"""
+    precisions: Tuple[float, ...]   # clipped n-gram precision, n = 1..max_n
+    brevity_penalty: float
+    bleu: float                     # BLEU-max_n with uniform weights (method-1 smoothing)
+    jaccard: Dict[int, float]       # n-gram set Jaccard, n = 1..3
+    precision: float                # word-set precision / recall / F1
+    recall: float
+    f1: float
+
+
+def _tokens(text: TextOrTokens) -> TokenizedText:
+    return text if isinstance(text, TokenizedText) else TokenizedText(text)
+
+
+def clipped_matches(candidate: TokenizedText, reference: TokenizedText, n: int) -> Tuple[int, int]:
+    """(clipped n-gram matches, candidate n-gram count) from the two Counter indexes.
+
+    Each candidate n-gram counts at most as often as it occurs in the reference, so
+    the cost is linear in the number of distinct n-grams instead of candidate x reference.
+    """
+    candidate_counts = candidate.ngram_counts(n)
+    reference_counts = reference.ngram_counts(n)
+    if len(reference_counts) < len(candidate_counts):
+        matches = sum(min(count, candidate_counts[ngram]) for ngram, count in reference_counts.items()
+                      if ngram in candidate_counts)
+    else:
+        matches = sum(min(count, reference_counts[ngram]) for ngram, count in candidate_counts.items()
+                      if ngram in reference_counts)
+    return matches, candidate.ngram_total(n)
+
+
+def clipped_precision(candidate: TextOrTokens, reference: TextOrTokens, n: int) -> float:
+    """Clipped (modified) n-gram precision; 0.0 when the candidate has no n-grams"""
+    matches, total = clipped_matches(_tokens(candidate), _tokens(reference), n)
+    return matches / total if total else 0.0
+
+
+def brevity_penalty(candidate_length: int, reference_length: int) -> float:
+    if candidate_length > reference_length:
+        return 1.0
+    if candidate_length == 0:
+        return 0.0
+    return math.exp(1 - reference_length / candidate_length)
+
+
+def bleu(candidate: TextOrTokens, reference: TextOrTokens, max_n: int = 4, smoothing: bool = True) -> float:
+    """Sentence BLEU against one reference, as nltk's sentence_bleu (SmoothingFunction().method1 when ``smoothing``)"""
+    return lexical_overlap(candidate, reference, max_n, smoothing).bleu
+
+
+def ngram_jaccard(first: TextOrTokens, second: TextOrTokens, n: int) -> float:
+    """Jaccard index of the two n-gram sets (0.0 when both are empty)"""
+    first_set, second_set = _tokens(first).ngram_set(n), _tokens(second).ngram_set(n)
+    common = len(first_set & second_set)
+    union = len(first_set) + len(second_set) - common
+    return common / union if union else 0.0
+
+
+def lexical_overlap(candidate: TextOrTokens, reference: TextOrTokens, max_n: int = 4,
+                    smoothing: bool = True, epsilon: float = 0.1) -> LexicalOverlap:
+    """Clipped BLEU precisions, brevity penalty, n-gram Jaccard and word P/R/F1 from one index per text"""
+    candidate, reference = _tokens(candidate), _tokens(reference)
+
+    precisions = []
+    log_sum = 0.0
+    unigram_matches = 0
+    for n in range(1, max_n + 1):
+        matches, total = clipped_matches(candidate, reference, n)
+        if n == 1:
+            unigram_matches = matches
+        precisions.append(matches / total if total else 0.0)
+        numerator = matches if matches or not smoothing else epsilon
+        if numerator:
+            log_sum += math.log(numerator / max(total, 1))
+        else:
+            log_sum = float("-inf")
+
+    penalty = brevity_penalty(len(candidate), len(reference))
+    if unigram_matches == 0 or log_sum == float("-inf"):
+        score = 0.0
+    else:
+        score = penalty * math.exp(log_sum / max_n)
+
+    words1, words2 = candidate.token_set, reference.token_set
+    common = len(words1 & words2)
+    precision = common / len(words1) if words1 else 0.0
+    recall = common / len(words2) if words2 else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+    return LexicalOverlap(
+        precisions=tuple(precisions),
+        brevity_penalty=penalty,
+        bleu=score,
+        jaccard={n: ngram_jaccard(candidate, reference, n) for n in (1, 2, 3)},
+        precision=precision,
+        recall=recall,
+        f1=f1,
+    )
@@ -0,0 +1,129 @@
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+LexiconEntries = Union[Sequence[str], Mapping[str, float]]
+
+_REGEX_SYNTAX = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+class Lexicon(NamedTuple):
+    """A named list of terms; ``entries`` maps each term to its severity weight.
+
+    Terms are matched as plain substrings of the lowercased text, or as regular
+    expressions when ``regex`` is set.
+    """
+    name: str
+    entries: LexiconEntries
+    regex: bool = False
+
+
+class LexiconHits:
+    """Result of one scan: the matched terms of every lexicon, in lexicon order"""
+
+    def __init__(self, hits: Dict[str, List[Tuple[str, float]]]):
+        self._hits = hits
+
+    def terms(self, lexicon: str) -> List[str]:
+        return [term for term, _ in self._hits.get(lexicon, [])]
+
+    def count(self, lexicon: str) -> int:
+        """Number of distinct terms of ``lexicon`` found"""
+        return len(self._hits.get(lexicon, []))
+
+    def severity(self, lexicon: str) -> float:
+        """Sum of the weights of the distinct terms found"""
+        return float(sum(weight for _, weight in self._hits.get(lexicon, [])))
+
+    def any(self, lexicon: str) -> bool:
+        return bool(self._hits.get(lexicon))
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {name: [term for term, _ in hits] for name, hits in self._hits.items() if hits}
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """Regex alternation of ``words`` factored by common prefix; matches the longest word at a position"""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ending here makes the longer continuations optional (greedy, so longest wins)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class MultiPatternMatcher:
+    """Every lexicon compiled once, so a text is scanned once for all literal terms.
+
+    Literal terms of all lexicons become a single prefix-factored alternation (a trie,
+    the regex analogue of an Aho-Corasick automaton) scanned with one ``findall``; at
+    each position it takes the longest term, which implies every term it contains.
+    Terms that could start inside a match and run past its end are checked directly.
+    Regex terms are compiled once and searched individually. Results are the same as
+    testing each term separately with ``in`` / ``re.search``.
+    """
+
+    def __init__(self, lexicons: Sequence[Lexicon]):
+        self.lexicon_names = [lexicon.name for lexicon in lexicons]
+        # Unique (pattern, is_regex) -> every (lexicon, term, weight) it stands for
+        owners: Dict[Tuple[str, bool], List[Tuple[str, str, float]]] = {}
+        self._rank: Dict[Tuple[str, str], int] = {}
+        for lexicon in lexicons:
+            entries = lexicon.entries if isinstance(lexicon.entries, Mapping) \
+                else {term: 1.0 for term in lexicon.entries}
+            for term, weight in entries.items():
+                term = term if lexicon.regex else term.lower()
+                # Regex terms without metacharacters are plain substrings
+                is_regex = lexicon.regex and _REGEX_SYNTAX.search(term) is not None
+                self._rank.setdefault((lexicon.name, term), len(self._rank))
+                owners.setdefault((term, is_regex), []).append((lexicon.name, term, float(weight)))
+
+        self._owners = owners
+        self._regexes = [(key, re.compile(key[0])) for key in owners if key[1]]
+        literals = [key[0] for key in owners if not key[1]]
+        # Literal -> the literals it contains (present wherever it is) and those that
+        # overlap its end (may start inside a match, so findall can step over them)
+        self._implied = {
+            literal: [(other, False) for other in literals if other in literal] for literal in literals
+        }
+        self._overlapping = {
+            literal: [other for other in literals if other not in literal and any(
+                other.startswith(literal[start:]) for start in range(1, len(literal)))]
+            for literal in literals
+        }
+        self._literals = re.compile(_trie_pattern(literals)) if literals else None
+
+    def scan(self, text: str) -> LexiconHits:
+        """All hits in ``text`` (lowercased first), by lexicon"""
+        found = set()
+        if text:
+            text = text.lower()
+            if self._literals is not None:
+                for literal in set(self._literals.findall(text)):
+                    found.update(self._implied[literal])
+                    found.update((other, False) for other in self._overlapping[literal]
+                                 if (other, False) not in found and other in text)
+            found.update(key for key, compiled in self._regexes if compiled.search(text))
+
+        hits: Dict[str, List[Tuple[str, float]]] = {name: [] for name in self.lexicon_names}
+        ordered: List[Tuple[int, str, str, float]] = []
+        for key in found:
+            for name, term, weight in self._owners[key]:
+                ordered.append((self._rank[(name, term)], name, term, weight))
+        for _, name, term, weight in sorted(ordered):
+            hits[name].append((term, weight))
+        return LexiconHits(hits)
+
+    def first_matching(self, text: str, lexicons: Sequence[str]) -> Optional[str]:
+        """Name of the first lexicon in ``lexicons`` with any hit"""
+        hits = self.scan(text)
+        return next((name for name in lexicons if hits.any(name)), None)
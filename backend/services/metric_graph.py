@@ -0,0 +1,187 @@
+import os
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from services.analysis_context import AnalysisContext
+
+# fn(ctx, category, inputs) -> value, where inputs maps each input node to its value
+NodeFunction = Callable[[AnalysisContext, str, Dict[str, Any]], Any]
+
+
+class MetricNode(NamedTuple):
+    """One step of an evaluation: a metric, or an intermediate result other steps share.
+
+    ``inputs`` name the nodes whose values ``fn`` reads (all must be registered first).
+    ``cost`` is a rough estimate in milliseconds, used to start expensive work first.
+    ``releases_gil`` marks steps that spend their time outside the interpreter (ONNX
+    Runtime, a grammar server), which the scheduler overlaps with the others on a
+    thread pool. ``tier`` orders steps for early exit (see MetricGraph.run); a step
+    that did not run because evaluation stopped takes ``fallback(ctx, category, inputs)``
+    if given, and ``skipped`` otherwise, as does a step nobody asked for. ``applies``
+    limits a step to some question categories, and ``report`` puts the value of a
+    plug-in node into the result's ml_metrics under its name.
+    """
+    name: str
+    fn: NodeFunction
+    inputs: Tuple[str, ...] = ()
+    cost: float = 1.0
+    releases_gil: bool = False
+    tier: int = 0
+    skipped: Any = None
+    fallback: Optional[NodeFunction] = None
+    applies: Optional[Callable[[str], bool]] = None
+    report: bool = False
+
+
+class MetricGraph:
+    """Metric steps as a dependency graph, run in dependency order with shared results.
+
+    Each node runs at most once per evaluation and its value is handed to every node
+    that lists it as an input. Nodes that release the GIL go to a thread pool as soon
+    as their inputs are ready; the rest run on the calling thread meanwhile, most
+    expensive first. METRIC_GRAPH_WORKERS sets the pool size (0 runs every node inline).
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.nodes: Dict[str, MetricNode] = {}
+        self.workers = max(0, int(os.getenv("METRIC_GRAPH_WORKERS", "4") if workers is None else workers))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def register(self, node: MetricNode) -> MetricNode:
+        """Add a node; its inputs must exist and sit in the same or an earlier tier"""
+        if node.name in self.nodes:
+            raise ValueError(f"Metric node '{node.name}' is already registered")
+        for name in node.inputs:
+            if name not in self.nodes:
+                raise ValueError(f"Metric node '{node.name}' needs unknown input '{name}'")
+            if self.nodes[name].tier > node.tier:
+                raise ValueError(f"Metric node '{node.name}' (tier {node.tier}) cannot read tier {self.nodes[name].tier} node '{name}'")
+        self.nodes[node.name] = node
+        return node
+
+    def applicable(self, category: str) -> List[str]:
+        """Every node that runs for questions of ``category``"""
+        return [name for name, node in self.nodes.items() if node.applies is None or node.applies(category)]
+
+    def requirements(self, targets: Iterable[str], category: str) -> Set[str]:
+        """``targets`` plus everything they depend on, leaving out nodes that do not apply to ``category``"""
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            node = self.nodes[name]
+            if name in needed or (node.applies is not None and not node.applies(category)):
+                continue
+            needed.add(name)
+            stack.extend(node.inputs)
+        return needed
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if not self.workers:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="metric-graph")
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def run(self, ctx: AnalysisContext, category: str, targets: Iterable[str], parallel: bool = True,
+            after_tier: Optional[Callable[[int, Dict[str, Any]], bool]] = None,
+            early_exit: bool = False) -> Dict[str, Any]:
+        """Values of every registered node: computed for ``targets`` and their inputs, ``skipped`` for the rest.
+
+        ``after_tier(tier, values)`` is called once the nodes of each tier but the last
+        (and of every earlier tier) have finished. Without ``early_exit`` nodes of later
+        tiers may already be running by then, so pool work overlaps every tier. With it
+        tiers run one after another, and a True return stops evaluation: nodes of the
+        remaining tiers take their fallbacks. Each node's wall time is recorded in
+        ``ctx.stages`` under its name. Without ``parallel`` every node runs on the
+        calling thread.
+        """
+        needed = self.requirements(targets, category)
+        values: Dict[str, Any] = {name: node.skipped for name, node in self.nodes.items()}
+        executor = self._get_executor() if parallel else None
+        tiers = sorted({node.tier for node in self.nodes.values()})
+        nodes = [node for name, node in self.nodes.items() if name in needed]
+        if not early_exit:
+            self._run_nodes(ctx, category, nodes, values, executor, tiers[:-1], after_tier)
+            return values
+
+        stopped = False
+        for tier in tiers:
+            tier_nodes = [node for node in nodes if node.tier == tier]
+            if stopped:
+                for node in tier_nodes:
+                    if node.fallback is not None:
+                        values[node.name] = ctx.stages.measure(node.name, node.fallback, ctx, category,
+                                                               self._inputs(node, values))
+                continue
+            self._run_nodes(ctx, category, tier_nodes, values, executor)
+            if after_tier is not None and tier != tiers[-1]:
+                stopped = bool(after_tier(tier, values))
+        return values
+
+    @staticmethod
+    def _inputs(node: MetricNode, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {name: values[name] for name in node.inputs}
+
+    def _run_nodes(self, ctx: AnalysisContext, category: str, nodes: List[MetricNode], values: Dict[str, Any],
+                   executor: Optional[ThreadPoolExecutor], report_tiers: Iterable[int] = (),
+                   after_tier: Optional[Callable[[int, Dict[str, Any]], bool]] = None):
+        """Run ``nodes`` once each, no node before its inputs; GIL-releasing ones on the pool.
+
+        Pool nodes are submitted as soon as they are ready, most expensive first; inline
+        nodes run lowest tier first, then most expensive first. ``after_tier`` is called
+        for each of ``report_tiers`` once it and every earlier tier are finished.
+        """
+        pending = {node.name: node for node in nodes}
+        done = set(self.nodes) - set(pending)
+        running: Dict[Future, MetricNode] = {}
+        unfinished = Counter(node.tier for node in nodes)
+        report_tiers = list(report_tiers)
+
+        def finish(node: MetricNode, value: Any):
+            values[node.name] = value
+            done.add(node.name)
+            unfinished[node.tier] -= 1
+            while report_tiers and after_tier is not None and \
+                    not any(count for tier, count in unfinished.items() if tier <= report_tiers[0]):
+                after_tier(report_tiers.pop(0), values)
+
+        while pending or running:
+            ready = [node for node in pending.values() if all(name in done for name in node.inputs)]
+            inline = []
+            for node in sorted(ready, key=lambda node: -node.cost):
+                if executor is not None and node.releases_gil:
+                    del pending[node.name]
+                    future = executor.submit(ctx.stages.measure, node.name, node.fn, ctx, category,
+                                             self._inputs(node, values))
+                    running[future] = node
+                else:
+                    inline.append(node)
+            if inline:
+                # One node at a time, so nodes unblocked by pool results are picked up between them
+                node = min(inline, key=lambda node: (node.tier, -node.cost))
+                del pending[node.name]
+                finish(node, ctx.stages.measure(node.name, node.fn, ctx, category, self._inputs(node, values)))
+            elif running:
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    finish(running.pop(future), future.result())
+            elif pending:
+                raise RuntimeError(f"Metric nodes waiting on inputs that never ran: {sorted(pending)}")
+            # Collect pool results that finished while an inline node ran
+            for future in [future for future in running if future.done()]:
+                finish(running.pop(future), future.result())
+        # Tiers with no nodes to run
+        for tier in report_tiers:
+            if after_tier is not None:
+                after_tier(tier, values)
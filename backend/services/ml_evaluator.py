@@ -3,6 +3,8 @@ import re
 import math
 from typing import Dict, Any
 
+from services.lexical_overlap import bleu, clipped_precision
+
 class MLEvaluator:
     def __init__(self):
         # Initialize models - using lightweight fallbacks for demo
@@ -94,9 +96,15 @@ class MLEvaluator:
             
             import numpy as np
             from sklearn.metrics.pairwise import cosine_similarity
+            from services.embedding_cache import TextVector, get_embedding_cache
             
-            embeddings = self.sentence_model.encode([text1, text2])
-            similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
+            # Reference answers repeat across requests; the cache skips re-encoding them
+            vectors = get_embedding_cache().get_or_compute_many(
+                'sentence-transformers', 'all-MiniLM-L6-v2', [text1, text2],
+                lambda texts: [TextVector(np.asarray(row, dtype=np.float32), float(np.linalg.norm(row)))
+                               for row in self.sentence_model.encode(texts)]
+            )
+            similarity = cosine_similarity([vectors[0].vector], [vectors[1].vector])[0][0]
             return max(0.0, similarity)  # Ensure non-negative
         except Exception as e:
             print(f"Error calculating semantic similarity, using fallback: {e}")
@@ -118,55 +126,27 @@ class MLEvaluator:
         return len(intersection) / len(union) if len(union) > 0 else 0.0
     
     def _calculate_bleu_score(self, candidate: str, reference: str) -> float:
-        """Calculate BLEU score or simple n-gram similarity"""
+        """Calculate sentence BLEU (n=1..4, brevity penalty, method-1 smoothing as in NLTK)"""
         try:
-            # Try to use NLTK BLEU
-            import nltk
-            from nltk.translate.bleu_score import sentence_bleu
-            
-            candidate_tokens = candidate.split()
-            reference_tokens = [reference.split()]  # BLEU expects list of references
-            
-            if len(candidate_tokens) == 0 or len(reference_tokens[0]) == 0:
+            if not candidate.split() or not reference.split():
                 return 0.0
             
-            # Calculate BLEU score with smoothing
-            score = sentence_bleu(reference_tokens, candidate_tokens, smoothing_function=nltk.translate.bleu_score.SmoothingFunction().method1)
-            return score
+            # Counter-based kernel: linear in answer length, same result as nltk's sentence_bleu
+            return bleu(candidate, reference)
         except Exception as e:
-            print(f"NLTK not available, using simple n-gram similarity: {e}")
+            print(f"BLEU calculation failed, using simple n-gram similarity: {e}")
             return self._simple_ngram_similarity(candidate, reference)
     
     def _simple_ngram_similarity(self, candidate: str, reference: str) -> float:
         """Simple n-gram similarity as fallback for BLEU"""
-        candidate_words = candidate.lower().split()
-        reference_words = reference.lower().split()
+        candidate, reference = candidate.lower(), reference.lower()
         
-        if len(candidate_words) == 0 or len(reference_words) == 0:
+        if not candidate.split() or not reference.split():
             return 0.0
         
-        # Calculate 1-gram, 2-gram precision
-        scores = []
-        
-        for n in [1, 2]:
-            candidate_ngrams = self._get_ngrams(candidate_words, n)
-            reference_ngrams = self._get_ngrams(reference_words, n)
-            
-            if len(candidate_ngrams) == 0:
-                scores.append(0.0)
-                continue
-            
-            matches = sum(min(candidate_ngrams.count(ngram), reference_ngrams.count(ngram)) 
-                         for ngram in set(candidate_ngrams))
-            precision = matches / len(candidate_ngrams)
-            scores.append(precision)
-        
-        # Return average of 1-gram and 2-gram precision
-        return sum(scores) / len(scores) if scores else 0.0
-    
-    def _get_ngrams(self, words, n):
-        """Get n-grams from word list"""
-        return [tuple(words[i:i+n]) for i in range(len(words)-n+1)]
+        # Average of clipped 1-gram and 2-gram precision
+        scores = [clipped_precision(candidate, reference, n) for n in [1, 2]]
+        return sum(scores) / len(scores)
     
     def _calculate_lexical_similarity(self, text1: str, text2: str) -> float:
         """Calculate lexical similarity using word overlap"""
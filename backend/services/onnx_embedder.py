@@ -0,0 +1,128 @@
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+
+from services.embedding_cache import EmbeddingCache, TextVector, get_embedding_cache
+from services.wordpiece import WordPieceTokenizer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+DEFAULT_MODEL_PATH = os.path.join(BACKEND_DIR, "models", "sentence_model.onnx")
+DEFAULT_TOKENIZER_PATH = os.path.join(BACKEND_DIR, "models", "tokenizer.json")
+
+
+def quantized_model_path(model_path: str) -> str:
+    root, ext = os.path.splitext(model_path)
+    return f"{root}.int8{ext}"
+
+
+def resolve_model_path(model_path: str, quantized: bool) -> str:
+    """Model file to load; with ``quantized`` prefer (or create) an int8 copy next to the fp32 model"""
+    if not quantized:
+        return model_path
+    int8_path = quantized_model_path(model_path)
+    if os.path.exists(int8_path):
+        return int8_path
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+        print(f"Quantized ONNX model written to {int8_path}")
+        return int8_path
+    except Exception as e:
+        print(f"ONNX int8 quantization unavailable, using fp32 model: {e}")
+        return model_path
+
+
+class OnnxSentenceEmbedder:
+    """Sentence embeddings (e.g. all-MiniLM-L6-v2) from an ONNX export, on CPU.
+
+    Texts are WordPiece-tokenized from ``tokenizer.json``, sorted by length and run in
+    padded batches; token embeddings are mean-pooled over the attention mask and
+    L2-normalized, matching sentence-transformers' output for the same model. With a
+    ``cache``, texts already embedded by this model skip inference entirely.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, tokenizer_path: str = DEFAULT_TOKENIZER_PATH,
+                 intra_op_threads: int = 0, batch_size: int = 32, quantized: bool = False,
+                 cache: Optional[EmbeddingCache] = None):
+        import onnxruntime as ort
+
+        self.model_path = resolve_model_path(model_path, quantized)
+        self.quantized = self.model_path != model_path
+        self.model_version = f"{os.path.basename(self.model_path)}:{os.path.getsize(self.model_path)}"
+        self.cache = cache
+        self.tokenizer = WordPieceTokenizer.from_file(tokenizer_path)
+        self.batch_size = max(1, batch_size)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        # Requests already run in parallel on the execution engine; keep each run on one graph thread
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @classmethod
+    def from_env(cls) -> Optional["OnnxSentenceEmbedder"]:
+        """Build from ONNX_* environment variables; None when the model file is missing"""
+        model_path = os.getenv("ONNX_MODEL_PATH", DEFAULT_MODEL_PATH)
+        tokenizer_path = os.getenv("ONNX_TOKENIZER_PATH", DEFAULT_TOKENIZER_PATH)
+        if not os.path.exists(model_path):
+            print("ONNX model not found. Using other methods.")
+            return None
+        return cls(
+            model_path=model_path,
+            tokenizer_path=tokenizer_path,
+            intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "0")),
+            batch_size=int(os.getenv("ONNX_BATCH_SIZE", "32")),
+            quantized=os.getenv("ONNX_QUANTIZED", "false").lower() in ("1", "true", "yes"),
+            cache=get_embedding_cache(),
+        )
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-norm embeddings, one row per text"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        vectors = self.cache.get_or_compute_many(
+            'onnx', self.model_version, texts,
+            lambda missing: [TextVector(row.copy(), 1.0) for row in self._embed_uncached(missing)]
+        )
+        return np.vstack([vector.vector for vector in vectors])
+
+    def _embed_uncached(self, texts: Sequence[str]) -> np.ndarray:
+        # Sort by length so each padded batch holds texts of similar size
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = None
+        for start in range(0, len(order), self.batch_size):
+            rows = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[i] for i in rows])
+            if embeddings is None:
+                embeddings = np.zeros((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[rows] = batch
+        return embeddings
+
+    def _embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        input_ids, attention_mask = self.tokenizer.encode_batch(texts)
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": np.zeros_like(input_ids)}
+        outputs = self.session.run(None, {name: value for name, value in feed.items() if name in self.input_names})
+        hidden = outputs[0]
+
+        if hidden.ndim == 3:
+            # Mean pooling over real (non-padding) tokens
+            mask = attention_mask[:, :, None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        else:
+            # Export already includes pooling
+            pooled = hidden
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def similarity(self, text1: str, text2: str) -> float:
+        """Cosine similarity of two texts, embedded in one batch"""
+        first, second = self.embed([text1, text2])
+        return float(np.dot(first, second))
@@ -0,0 +1,112 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+# Only one evaluation is profiled at a time: tracemalloc is process-wide and
+# cProfile refuses to nest, so a second request waits instead of corrupting the first
+_profile_lock = threading.Lock()
+
+
+_TRACEMALLOC_FILTERS = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+
+def _short_path(filename: str) -> str:
+    """Paths relative to the working directory or site-packages when under either"""
+    cwd = os.getcwd() + os.sep
+    if filename.startswith(cwd):
+        return filename[len(cwd):]
+    _, marker, package_path = filename.rpartition("site-packages" + os.sep)
+    return package_path if marker else filename
+
+
+def _function_label(key: Tuple[str, int, str]) -> Tuple[str, str]:
+    filename, line, name = key
+    if filename == "~":
+        # Built-ins have no file ("<built-in method ...>")
+        return name, ""
+    return name, f"{_short_path(filename)}:{line}"
+
+
+def hot_functions(profiler: cProfile.Profile, top_n: int) -> List[Dict[str, Any]]:
+    """The ``top_n`` functions by own (exclusive) time, with call counts and cumulative time"""
+    stats = pstats.Stats(profiler).stats
+    rows = []
+    for key, (primitive_calls, total_calls, own_time, cumulative_time, _) in stats.items():
+        name, location = _function_label(key)
+        rows.append({
+            "function": name,
+            "location": location,
+            "calls": total_calls,
+            "primitive_calls": primitive_calls,
+            "own_seconds": round(own_time, 6),
+            "cumulative_seconds": round(cumulative_time, 6),
+        })
+    rows.sort(key=lambda row: row["own_seconds"], reverse=True)
+    return rows[:top_n]
+
+
+def allocation_summary(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, peak_bytes: int,
+                       top_n: int) -> Dict[str, Any]:
+    """Net allocations between two snapshots, overall and for the ``top_n`` source lines"""
+    before, after = before.filter_traces(_TRACEMALLOC_FILTERS), after.filter_traces(_TRACEMALLOC_FILTERS)
+    differences = [diff for diff in after.compare_to(before, "lineno") if diff.count_diff or diff.size_diff]
+    differences.sort(key=lambda diff: abs(diff.size_diff), reverse=True)
+    sites = []
+    for diff in differences[:top_n]:
+        frame = diff.traceback[0]
+        sites.append({
+            "location": f"{_short_path(frame.filename)}:{frame.lineno}",
+            "blocks": diff.count_diff,
+            "bytes": diff.size_diff,
+        })
+    return {
+        "net_blocks": sum(diff.count_diff for diff in differences),
+        "net_bytes": sum(diff.size_diff for diff in differences),
+        "peak_bytes": peak_bytes,
+        "top_sites": sites,
+    }
+
+
+def profile_call(fn: Callable[..., Dict[str, Any]], *args, top_n: int = 0, **kwargs) -> Dict[str, Any]:
+    """Run ``fn`` under cProfile and tracemalloc and attach the report to ``trace.ml.profile``.
+
+    The hot-function table covers the calling thread only (the evaluation itself);
+    allocation counts are process-wide, so they include whatever else ran meanwhile.
+    """
+    top_n = top_n or int(os.getenv("PROFILE_TOP_N", "15"))
+    with _profile_lock:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - started
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    ml_trace = result.setdefault("trace", {}).setdefault("ml", {})
+    ml_trace["profile"] = {
+        "profiler": "cProfile",
+        # Wall time including profiler overhead, which inflates many-small-call code the most
+        "profiled_seconds": round(elapsed, 6),
+        "top_n": top_n,
+        "hot_functions": hot_functions(profiler, top_n),
+        "stage_timings": dict(ml_trace.get("stage_timings") or {}),
+        "allocations": allocation_summary(before, after, peak_bytes, top_n),
+    }
+    return result
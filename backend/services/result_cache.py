@@ -0,0 +1,56 @@
+import hashlib
+import os
+from typing import Any, Dict, Iterable, Optional
+
+from services.sqlite_cache import JsonLRUCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "ml_results.sqlite3")
+
+
+class EvaluationResultCache(JsonLRUCache):
+    """Complete ML evaluation results, keyed by a content address of their inputs.
+
+    The key (see ``key``) covers everything the result depends on, so entries never go
+    stale and need no TTL: a changed input, option, model or weight set is a new key.
+    Results live as JSON in an in-process LRU of ``memory_entries``; with ``path`` set
+    they are also written to SQLite (``max_entries``, least recently used evicted
+    first), which survives restarts and is shared by every worker process.
+    """
+
+    def __init__(self, memory_entries: int = 2048, path: Optional[str] = None, max_entries: int = 50000):
+        super().__init__("ml_results", path, memory_entries=max(1, int(memory_entries)), max_entries=max_entries)
+
+    @staticmethod
+    def key(parts: Iterable[str]) -> str:
+        digest = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            # Length-prefixed, so no text can spill into the next part
+            data = part.encode("utf-8")
+            digest.update(b"%d:" % len(data))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def put(self, key: str, result: Dict[str, Any]):
+        self._store(key, result)
+
+
+def create_result_cache() -> Optional[EvaluationResultCache]:
+    """Cache configured from the environment: ML_RESULT_CACHE=memory (default), disk or off.
+
+    Falls back to memory only when the database cannot be opened.
+    """
+    mode = os.getenv("ML_RESULT_CACHE", "memory").lower()
+    if mode in ("off", "false", "0"):
+        return None
+    memory_entries = int(os.getenv("ML_RESULT_CACHE_MEMORY_ENTRIES", "2048"))
+    if mode != "disk":
+        return EvaluationResultCache(memory_entries)
+    try:
+        return EvaluationResultCache(
+            memory_entries,
+            path=os.getenv("ML_RESULT_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("ML_RESULT_CACHE_MAX_ENTRIES", "50000")),
+        )
+    except Exception as e:
+        print(f"ML result cache database unavailable, keeping results in memory only: {e}")
+        return EvaluationResultCache(memory_entries)
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+class SQLiteConnections:
+    """Connections to one SQLite database in WAL mode, one per thread.
+
+    sqlite3 connections cannot be shared across threads, and WAL lets readers in other
+    threads and worker processes proceed while one connection writes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def get(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+
+class JsonLRUCache:
+    """JSON results by key: an in-process LRU in front of an optional SQLite table.
+
+    The memory tier holds up to ``memory_entries`` serialized results. With ``path``
+    set, results are also written to ``table``, which survives restarts and is shared
+    by worker processes; past ``max_entries`` its least recently used rows are deleted.
+    Entries older than ``ttl_seconds`` (0 keeps them forever) are misses in both tiers.
+    ``columns`` names extra TEXT columns stored next to each result (see ``_store``).
+    """
+
+    def __init__(self, table: str, path: Optional[str] = None, memory_entries: int = 1024,
+                 max_entries: int = 10000, ttl_seconds: float = 0.0, columns: Sequence[str] = ()):
+        self.table = table
+        self.path = path
+        self.memory_entries = max(0, int(memory_entries))
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.columns = tuple(columns)
+        # Eviction scans the table, so it runs every few writes rather than on each one
+        self._evict_every = max(1, min(64, self.max_entries // 10))
+        # key -> (stored JSON, created_at)
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.expired = 0
+        self.evictions = 0
+        self._connections = SQLiteConnections(path) if path is not None else None
+        if self._connections is not None:
+            extra = "".join(f" {column} TEXT NOT NULL," for column in self.columns)
+            with self._connection() as connection:
+                connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY,{extra}"
+                    " created_at REAL NOT NULL, last_used_at REAL NOT NULL, result TEXT NOT NULL)"
+                )
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        return self._connections.get()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, payload: str, created_at: float):
+        if not self.memory_entries:
+            return
+        with self._lock:
+            self._memory[key] = (payload, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached result (a fresh copy), or None on a miss or an expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry[1], now):
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+        if entry is not None:
+            return json.loads(entry[0])
+
+        row = None
+        if self._connections is not None:
+            connection = self._connection()
+            row = connection.execute(f"SELECT result, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[1], now):
+                with connection:
+                    connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                with self._lock:
+                    self.expired += 1
+                row = None
+            elif row is not None:
+                with connection:
+                    connection.execute(f"UPDATE {self.table} SET last_used_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.disk_hits += 1
+        if row is None:
+            return None
+        self._remember(key, row[0], row[1])
+        return json.loads(row[0])
+
+    def _store(self, key: str, result: Dict[str, Any], values: Sequence[str] = ()):
+        """Write ``result`` to both tiers; ``values`` fill the extra ``columns``"""
+        payload = json.dumps(result)
+        now = time.time()
+        self._remember(key, payload, now)
+        with self._lock:
+            self.writes += 1
+            due = self.writes % self._evict_every == 0
+        if self._connections is None:
+            return
+        columns = "".join(f"{column}, " for column in self.columns)
+        placeholders = "?, " * (len(self.columns) + 4)
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, {columns}created_at, last_used_at, result)"
+                f" VALUES ({placeholders[:-2]})",
+                (key, *values, now, now, payload),
+            )
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Delete expired rows, then least recently used ones beyond ``max_entries``"""
+        if self._connections is None:
+            return
+        connection = self._connection()
+        with connection:
+            expired = 0
+            if self.ttl_seconds:
+                expired = connection.execute(f"DELETE FROM {self.table} WHERE created_at < ?",
+                                             (time.time() - self.ttl_seconds,)).rowcount
+            count = connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = connection.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f" SELECT key FROM {self.table} ORDER BY last_used_at LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        with self._lock:
+            self.expired += max(expired, 0)
+            self.evictions += max(evicted, 0)
+
+    def clear(self):
+        if self._connections is not None:
+            connection = self._connection()
+            with connection:
+                connection.execute(f"DELETE FROM {self.table}")
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        disk_entries = None
+        if self._connections is not None:
+            disk_entries = self._connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "path": self.path,
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.memory_entries,
+                "disk_entries": disk_entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from typing import Dict, FrozenSet, Tuple
+
+# Phrases folded into one shared token to reduce the lexical penalty of refusals.
+# Alternation order matters: at a position the first listed phrase wins, as when
+# the phrases were substituted one after another.
+REFUSAL_NORM_PATTERNS = [
+    r"i cannot",
+    r"i can't",
+    r"i wont",
+    r"i won't",
+    r"i am not able",
+    r"i cannot assist",
+    r"i can't help",
+    r"i cannot help",
+    r"i must decline",
+    r"not appropriate",
+    r"against my guidelines",
+]
+
+FILLER_WORDS = ["um", "uh", "like", "you know", "actually", "basically"]
+
+
+class TextNormalizer:
+    """The evaluator's text normalization as two compiled passes.
+
+    The first pass collapses whitespace and drops special characters (keeping
+    punctuation); the second removes filler words and folds refusal phrases into
+    ``refusal``. Word boundaries in the second pass depend on the characters the
+    first one removes, so the two cannot be merged without changing results.
+    """
+
+    def __init__(self):
+        self._characters = re.compile(r"(\s+)|[^\w\s.,!?;:-]")
+        self._phrases = re.compile(
+            r"\b(?:(" + "|".join(FILLER_WORDS) + r")|" + "|".join(REFUSAL_NORM_PATTERNS) + r")\b"
+        )
+
+    @staticmethod
+    def _character_replacement(match: "re.Match") -> str:
+        return " " if match.group(1) else ""
+
+    @staticmethod
+    def _phrase_replacement(match: "re.Match") -> str:
+        return "" if match.group(1) else " refusal "
+
+    def normalize(self, text: str) -> str:
+        """Lowercased text with whitespace collapsed, special characters, fillers removed and refusals folded"""
+        if not text:
+            return ""
+        text = self._characters.sub(self._character_replacement, text.lower().strip())
+        return self._phrases.sub(self._phrase_replacement, text)
+
+
+class TokenizedText:
+    """Immutable whitespace tokens of a text with n-gram counts and sets, each built once"""
+
+    __slots__ = ("tokens", "token_set", "_counts", "_sets")
+
+    def __init__(self, text: str):
+        self.tokens: Tuple[str, ...] = tuple((text or "").split())
+        self.token_set: FrozenSet[str] = frozenset(self.tokens)
+        self._counts: Dict[int, Counter] = {}
+        self._sets: Dict[int, FrozenSet[Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def ngram_counts(self, n: int) -> Counter:
+        """Counter of n-gram tuples (unigrams are 1-tuples)"""
+        counts = self._counts.get(n)
+        if counts is None:
+            tokens = self.tokens
+            counts = self._counts[n] = Counter(zip(*(tokens[i:] for i in range(n))))
+        return counts
+
+    def ngram_set(self, n: int) -> FrozenSet[Tuple[str, ...]]:
+        ngrams = self._sets.get(n)
+        if ngrams is None:
+            ngrams = self._sets[n] = frozenset(self.ngram_counts(n))
+        return ngrams
+
+    def ngram_total(self, n: int) -> int:
+        """Number of n-gram positions (with repeats)"""
+        return max(len(self.tokens) - n + 1, 0)
@@ -0,0 +1,206 @@
+import json
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _is_control(char: str) -> bool:
+    if char in ("\t", "\n", "\r"):
+        return False
+    return unicodedata.category(char) in ("Cc", "Cf")
+
+
+def _is_whitespace(char: str) -> bool:
+    if char in (" ", "\t", "\n", "\r"):
+        return True
+    return unicodedata.category(char) == "Zs"
+
+
+def _is_punctuation(char: str) -> bool:
+    cp = ord(char)
+    if 33 <= cp <= 47 or 58 <= cp <= 64 or 91 <= cp <= 96 or 123 <= cp <= 126:
+        return True
+    return unicodedata.category(char).startswith("P")
+
+
+def _is_chinese_char(cp: int) -> bool:
+    return (
+        0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF or 0x20000 <= cp <= 0x2A6DF
+        or 0x2A700 <= cp <= 0x2B73F or 0x2B740 <= cp <= 0x2B81F or 0x2B820 <= cp <= 0x2CEAF
+        or 0xF900 <= cp <= 0xFAFF or 0x2F800 <= cp <= 0x2FA1F
+    )
+
+
+class WordPieceTokenizer:
+    """BERT WordPiece tokenizer driven by a Hugging Face ``tokenizer.json``.
+
+    Implements the BertNormalizer / BertPreTokenizer / WordPiece pipeline that
+    MiniLM-style sentence models ship with, so the ONNX backend does not need the
+    ``tokenizers`` package. Added tokens (``[MASK]``, ``[SEP]``, ...) found in the raw
+    text map to their own ids instead of being split as punctuation and words.
+    """
+
+    def __init__(self, vocab: Dict[str, int], unk_token: str = "[UNK]", cls_token: str = "[CLS]",
+                 sep_token: str = "[SEP]", pad_token: str = "[PAD]", max_length: int = 128,
+                 lowercase: bool = True, strip_accents: bool = True, handle_chinese_chars: bool = True,
+                 continuing_subword_prefix: str = "##", max_input_chars_per_word: int = 100,
+                 added_tokens: Optional[Dict[str, int]] = None):
+        self.vocab = vocab
+        self.unk_id = vocab[unk_token]
+        self.cls_id = vocab[cls_token]
+        self.sep_id = vocab[sep_token]
+        self.pad_id = vocab.get(pad_token, 0)
+        self.max_length = max_length
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+        self.handle_chinese_chars = handle_chinese_chars
+        self.prefix = continuing_subword_prefix
+        self.max_input_chars_per_word = max_input_chars_per_word
+        self.added_tokens = dict(added_tokens or {})
+        # Longest first, so a token that contains another one wins
+        self._added_pattern = re.compile("|".join(
+            re.escape(token) for token in sorted(self.added_tokens, key=len, reverse=True)
+        )) if self.added_tokens else None
+        self._word_cache: Dict[str, Tuple[int, ...]] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "WordPieceTokenizer":
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        model = config["model"]
+        if model.get("type") != "WordPiece":
+            raise ValueError(f"Unsupported tokenizer model: {model.get('type')}")
+
+        normalizer = config.get("normalizer") or {}
+        lowercase = normalizer.get("lowercase", True)
+        strip_accents = normalizer.get("strip_accents")
+        truncation = config.get("truncation") or {}
+        added_tokens = {}
+        for token in config.get("added_tokens") or []:
+            # Only raw-text matching is implemented; refuse configs that need more than that
+            if token.get("normalized") or token.get("single_word"):
+                raise ValueError(f"Unsupported added token {token.get('content')!r}: "
+                                 "normalized and single_word matching are not implemented")
+            added_tokens[token["content"]] = token["id"]
+        padding = config.get("padding") or {}
+        return cls(
+            vocab=model["vocab"],
+            unk_token=model.get("unk_token", "[UNK]"),
+            pad_token=padding.get("pad_token", "[PAD]"),
+            max_length=truncation.get("max_length", 512),
+            lowercase=lowercase,
+            # BertNormalizer strips accents whenever it lowercases unless told otherwise
+            strip_accents=lowercase if strip_accents is None else strip_accents,
+            handle_chinese_chars=normalizer.get("handle_chinese_chars", True),
+            continuing_subword_prefix=model.get("continuing_subword_prefix", "##"),
+            max_input_chars_per_word=model.get("max_input_chars_per_word", 100),
+            added_tokens=added_tokens,
+        )
+
+    def _normalize(self, text: str) -> str:
+        chars = []
+        for char in text:
+            cp = ord(char)
+            if cp == 0 or cp == 0xFFFD or _is_control(char):
+                continue
+            if _is_whitespace(char):
+                chars.append(" ")
+            elif self.handle_chinese_chars and _is_chinese_char(cp):
+                chars.extend((" ", char, " "))
+            else:
+                chars.append(char)
+        text = "".join(chars)
+        if self.strip_accents:
+            text = "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+        if self.lowercase:
+            text = text.lower()
+        return text
+
+    def _pre_tokenize(self, text: str) -> List[str]:
+        words = []
+        for chunk in text.split():
+            current = []
+            for char in chunk:
+                if _is_punctuation(char):
+                    if current:
+                        words.append("".join(current))
+                        current = []
+                    words.append(char)
+                else:
+                    current.append(char)
+            if current:
+                words.append("".join(current))
+        return words
+
+    def _word_ids(self, word: str) -> Tuple[int, ...]:
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+
+        if len(word) > self.max_input_chars_per_word:
+            ids: Tuple[int, ...] = (self.unk_id,)
+        else:
+            pieces = []
+            start = 0
+            while start < len(word):
+                end = len(word)
+                piece_id = None
+                while start < end:
+                    piece = word[start:end]
+                    if start > 0:
+                        piece = self.prefix + piece
+                    piece_id = self.vocab.get(piece)
+                    if piece_id is not None:
+                        break
+                    end -= 1
+                if piece_id is None:
+                    pieces = [self.unk_id]
+                    break
+                pieces.append(piece_id)
+                start = end
+            ids = tuple(pieces)
+
+        if len(self._word_cache) < 100_000:
+            self._word_cache[word] = ids
+        return ids
+
+    def _split_added(self, text: str) -> List[Tuple[str, Optional[int]]]:
+        """Text split around added tokens: (segment, None) for plain text, (token, id) for a match"""
+        if self._added_pattern is None:
+            return [(text, None)]
+        segments = []
+        start = 0
+        for match in self._added_pattern.finditer(text):
+            if match.start() > start:
+                segments.append((text[start:match.start()], None))
+            segments.append((match.group(), self.added_tokens[match.group()]))
+            start = match.end()
+        if start < len(text):
+            segments.append((text[start:], None))
+        return segments
+
+    def encode(self, text: str) -> List[int]:
+        """Token ids with [CLS]/[SEP], truncated to max_length"""
+        ids = [self.cls_id]
+        for segment, token_id in self._split_added(text or ""):
+            if token_id is not None:
+                ids.append(token_id)
+                continue
+            for word in self._pre_tokenize(self._normalize(segment)):
+                ids.extend(self._word_ids(word))
+        ids = ids[: self.max_length - 1]
+        ids.append(self.sep_id)
+        return ids
+
+    def encode_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(input_ids, attention_mask) padded to the longest text in the batch"""
+        encoded = [self.encode(text) for text in texts]
+        width = max((len(ids) for ids in encoded), default=0)
+        input_ids = np.full((len(encoded), width), self.pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(encoded), width), dtype=np.int64)
+        for row, ids in enumerate(encoded):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+        return input_ids, attention_mask
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script for the corpus TF-IDF model (online updates and saved-model staleness)
+"""
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import services.corpus_tfidf as corpus_tfidf
+from services.corpus_tfidf import CorpusTfidf, build_corpus_tfidf
+from services.ml_evaluator_lightweight import LightweightMLEvaluator
+
+DOCUMENTS = ["Paris is the capital of France.", "Merge sort runs in O(n log n) time.",
+             "Use synthetic data for testing.", "The sea rolls in waves."]
+
+def test_model_version():
+    print("🔧 Testing the TF-IDF model version under online updates...")
+    print("=" * 60)
+
+    model = CorpusTfidf().fit(DOCUMENTS)
+    fitted = model.model_version
+    model.partial_fit(["A new reference answer about France."])
+    assert model.model_version == fitted, "one online update changed the model version"
+    model.partial_fit([f"Reference number {index} about testing." for index in range(3)])
+    print(f"{model.n_documents} documents: {fitted} -> {model.model_version}")
+    assert model.model_version != fitted, "doubling the corpus kept the model version"
+    assert CorpusTfidf().fit(DOCUMENTS).model_version == fitted, "model version is not a content digest"
+    assert CorpusTfidf().fit(DOCUMENTS[:3]).model_version != fitted
+
+    print("=" * 60)
+    print("✅ Model version only moves on coarse corpus changes!")
+
+def test_stale_model_refit():
+    print("🔧 Testing that a saved model fitted on another corpus is refit...")
+    print("=" * 60)
+
+    original_corpus = corpus_tfidf.standard_answer_corpus
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["TFIDF_MODEL_PATH"] = os.path.join(directory, "tfidf_corpus.npz")
+        try:
+            corpus_tfidf.standard_answer_corpus = lambda: list(DOCUMENTS)
+            first, source = build_corpus_tfidf()
+            assert source == "standard answers"
+            again, source = build_corpus_tfidf()
+            assert source == os.environ["TFIDF_MODEL_PATH"], "unchanged corpus was refit"
+            assert again.model_version == first.model_version
+
+            # Edited standard answers, with the saved model still newer than every file
+            corpus_tfidf.standard_answer_corpus = lambda: DOCUMENTS[:3] + ["The ocean rolls in waves."]
+            edited, source = build_corpus_tfidf()
+            print(f"after editing the corpus: loaded from {source}")
+            assert source == "standard answers", "stale model loaded after the corpus changed"
+            assert edited.model_version != first.model_version
+        finally:
+            corpus_tfidf.standard_answer_corpus = original_corpus
+            del os.environ["TFIDF_MODEL_PATH"]
+
+    print("=" * 60)
+    print("✅ Saved TF-IDF models follow the corpus contents!")
+
+def test_online_updates():
+    print("🔧 Testing buffered, idempotent online updates...")
+    print("=" * 60)
+
+    model = CorpusTfidf(fold_every=3, max_online_documents=6).fit(DOCUMENTS)
+    base_documents = model.n_documents
+    assert model.add_online(["First reference.", "Second reference.", ""]) == 2
+    assert model.n_documents == base_documents and model.pending_documents == 2, "documents folded before the buffer filled"
+    version = model.version
+    assert model.add_online(["Third reference."]) == 1
+    assert model.n_documents == base_documents + 3 and model.pending_documents == 0
+    assert model.version == version + 1, "a fold should swap the model state once"
+
+    # Seeing a reference again never counts it again, however much traffic came in between
+    assert model.add_online(["First reference.", "Third reference."]) == 0
+    assert model.add_online([f"Other reference {index}." for index in range(10)]) == 3, "online cap not applied"
+    assert model.online_documents == 6
+    assert model.add_online(["First reference.", "Yet another reference."]) == 0
+    model.flush()
+    assert model.n_documents == base_documents + 6
+
+    # Digests are saved with the model, so a restart does not count references twice
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tfidf_corpus.npz")
+        pending = CorpusTfidf(fold_every=10).fit(DOCUMENTS)
+        pending.add_online(["A pending reference."])
+        pending.save(path)
+        reloaded = CorpusTfidf(fold_every=1).load(path)
+        assert reloaded.n_documents == len(DOCUMENTS) + 1, "save dropped pending documents"
+        assert reloaded.add_online(["A pending reference."]) == 0, "reference counted again after reload"
+        assert reloaded.add_online(["A new reference."]) == 1 and reloaded.n_documents == len(DOCUMENTS) + 2
+    print(f"{model.online_documents} online documents, {model.n_documents} total")
+
+    # The vocabulary stops growing at its cap; later terms keep the unseen-term IDF
+    capped = CorpusTfidf(max_vocabulary=40, fold_every=1).fit(DOCUMENTS)
+    capped.add_online([f"unusual{index} vocabulary{index} entries{index}" for index in range(20)])
+    print(f"vocabulary capped at {capped.vocabulary_size}")
+    assert capped.vocabulary_size == 40
+    assert 0.99 < capped.similarity("unusual19 entries19", "unusual19 entries19") <= 1.0
+    assert capped.similarity("unusual19", "Paris") == 0.0
+
+    evaluator = LightweightMLEvaluator()
+    evaluator.result_cache = None
+    evaluator.tfidf_online_updates = True
+    evaluator.corpus_tfidf.fold_every = 1
+    before = evaluator.corpus_tfidf.n_documents
+    row = ("What is the capital of France?", "Paris.", "The capital of France is Paris, on the Seine.", "general")
+    for _ in range(3):
+        evaluator.evaluate_sync(*row)
+    evaluator.evaluate_batch_sync([row, row])
+    assert evaluator.corpus_tfidf.n_documents == before + 1, "a repeated reference was counted more than once"
+
+    print("=" * 60)
+    print("✅ Online updates are buffered, bounded and count each reference once!")
+
+if __name__ == "__main__":
+    test_model_version()
+    test_stale_model_refit()
+    test_online_updates()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test script for the evaluation history store (keyset pagination and retention)
+"""
+import os
+import random
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.evaluation_store import EvaluationStore
+
+CATEGORIES = ["general", "technical", "safety"]
+
+def fill(store, seed=0):
+    """Rows in a few transactions (every row of one add_many shares its created_at), some without a combined score"""
+    rng = random.Random(seed)
+    for _ in range(6):
+        rows = []
+        for _ in range(rng.randint(5, 15)):
+            # Few distinct scores, so pages often split a run of equal sort values
+            score = None if rng.random() < 0.2 else float(rng.choice([10, 50, 50, 75, 90]))
+            rows.append(("question", "answer", "reference", rng.choice(CATEGORIES), "ml",
+                         {"ml_score": score, "combined_score": score}))
+        store.add_many(rows)
+
+def expected_order(store, sort, order, category=None):
+    rows = [store.get(summary["id"]) for summary in store.list_page(limit=10000)[0]]
+    if category is not None:
+        rows = [row for row in rows if row["category"] == category]
+    column = "created_at" if sort == "created_at" else "combined_score"
+    if sort == "score":
+        rows = [row for row in rows if row[column] is not None]
+    rows.sort(key=lambda row: (row[column], row["id"]), reverse=(order == "desc"))
+    return [row["id"] for row in rows]
+
+def walk(store, limit, sort, order, category=None):
+    ids, cursor, pages = [], None, 0
+    while True:
+        items, cursor = store.list_page(limit=limit, cursor=cursor, category=category, sort=sort, order=order)
+        assert len(items) <= limit, "page larger than the limit"
+        ids.extend(item["id"] for item in items)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+def test_keyset_pagination():
+    print("🔧 Testing keyset pagination of the evaluation history...")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvaluationStore(os.path.join(directory, "evaluations.sqlite3"), max_rows=0)
+        fill(store)
+        for sort in ("created_at", "score"):
+            for order in ("desc", "asc"):
+                for category in (None, "safety"):
+                    expected = expected_order(store, sort, order, category)
+                    for limit in (1, 3, 7, len(expected) + 1):
+                        ids, pages = walk(store, limit, sort, order, category)
+                        assert ids == expected, f"pages sorted by {sort} {order} (limit {limit}) skip or repeat rows"
+                    print(f"{sort:<10} {order:<4} category={str(category):<7} {len(expected):>3} rows ✓")
+
+        # A cursor only continues the list it came from
+        _, cursor = store.list_page(limit=2, sort="score", order="desc")
+        for sort, order in (("score", "asc"), ("created_at", "desc")):
+            try:
+                store.list_page(limit=2, cursor=cursor, sort=sort, order=order)
+                raise AssertionError("cursor accepted by a list in another order")
+            except ValueError:
+                pass
+        try:
+            store.list_page(cursor="not-a-cursor")
+            raise AssertionError("malformed cursor accepted")
+        except ValueError:
+            pass
+
+    print("=" * 60)
+    print("✅ Keyset pages cover every row once, in order!")
+
+def test_retention():
+    print("🔧 Testing evaluation history retention...")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = EvaluationStore(os.path.join(directory, "evaluations.sqlite3"), max_rows=20)
+        first = store.add_many([("q", "a", "r", "general", "ml", {"combined_score": 1.0})] * 15)
+        last = store.add_many([("q", "a", "r", "general", "ml", {"combined_score": 2.0})] * 15)
+        store.prune()
+        ids, _ = walk(store, 50, "created_at", "desc")
+        print(f"Kept {len(ids)} of 30 rows, pruned {store.pruned}")
+        assert len(ids) == 20, "history kept more than max_rows"
+        assert set(last) <= set(ids), "retention deleted recent evaluations"
+        assert all(store.get(evaluation_id) is None for evaluation_id in set(first) - set(ids))
+
+    print("=" * 60)
+    print("✅ Oldest evaluations are pruned beyond max_rows!")
+
+if __name__ == "__main__":
+    test_keyset_pagination()
+    test_retention()
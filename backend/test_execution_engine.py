@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the ML execution engine (admission control and worker crash recovery)
+"""
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.execution_engine import EngineOverloadedError, EvaluationEngine, WorkerCrashedError, _worker_ping
+from services.ml_evaluator_lightweight import LightweightMLEvaluator
+
+ROW = ("What is the capital of France?", "Paris is the capital city of France.", "The capital of France is Paris.", "general")
+
+def killed_mid_task(seconds):
+    """Worker task that dies the way an OOM kill or a native crash would, partway through"""
+    time.sleep(seconds)
+    os.kill(os.getpid(), signal.SIGKILL)
+
+async def test_admission():
+    print("🔧 Testing evaluation queue admission...")
+    print("=" * 60)
+
+    engine = EvaluationEngine(mode="thread", workers=1, max_queue=1)
+    release = threading.Event()
+    blocked = lambda value: release.wait(5) and value
+
+    first = asyncio.create_task(engine._dispatch(blocked, None, "first"))
+    second = asyncio.create_task(engine._dispatch(blocked, None, "second"))
+    await asyncio.sleep(0.05)
+    assert engine.stats()["in_flight"] == engine.capacity == 2
+    try:
+        await engine._dispatch(blocked, None, "third")
+        raise AssertionError("a request past the queue capacity was admitted")
+    except EngineOverloadedError as e:
+        print(f"shed: {e}")
+    release.set()
+    assert await asyncio.gather(first, second) == ["first", "second"]
+
+    assert await engine._dispatch(lambda value: value, None, "after") == "after", "queue did not drain"
+    stats = engine.stats()
+    print(f"completed={stats['completed']} rejected={stats['rejected']} in_flight={stats['in_flight']}")
+    assert (stats["completed"], stats["rejected"], stats["in_flight"]) == (3, 1, 0)
+    engine.shutdown()
+
+    print("=" * 60)
+    print("✅ Requests past the queue capacity are shed!")
+
+async def test_worker_crash_recovery(evaluator):
+    print("🔧 Testing recovery from a crashed worker process...")
+    print("=" * 60)
+
+    engine = EvaluationEngine(evaluator, mode="process", workers=1, max_queue=4)
+    await engine.start()
+    loop = asyncio.get_running_loop()
+    first_pid = await loop.run_in_executor(engine._get_executor(), _worker_ping)
+
+    # Every request on the broken pool fails, but the pool is replaced only once
+    crashed = await asyncio.gather(*(engine._dispatch(None, killed_mid_task, 0.2) for _ in range(3)),
+                                   return_exceptions=True)
+    print(f"requests on the crashed pool: {[type(error).__name__ for error in crashed]}")
+    assert all(isinstance(error, WorkerCrashedError) for error in crashed), "crash not reported as WorkerCrashedError"
+    assert engine.worker_crashes == 1, f"pool replaced {engine.worker_crashes} times for one crash"
+    assert engine.stats()["in_flight"] == 0, "crashed requests kept their queue slots"
+
+    # The next request runs on a fresh pool
+    result = await engine.evaluate(*ROW, cache_mode="bypass")
+    new_pid = await loop.run_in_executor(engine._get_executor(), _worker_ping)
+    print(f"worker pid {first_pid} -> {new_pid}, score after recovery: {result['score']}")
+    assert new_pid != first_pid and result["score"] == evaluator.evaluate_sync(*ROW)["score"]
+    assert engine.stats()["worker_crashes"] == 1
+    engine.shutdown()
+
+    print("=" * 60)
+    print("✅ A worker crash fails its requests and the next one gets a fresh pool!")
+
+if __name__ == "__main__":
+    evaluator = LightweightMLEvaluator()
+    evaluator.result_cache = None
+    asyncio.run(test_admission())
+    asyncio.run(test_worker_crash_recovery(evaluator))
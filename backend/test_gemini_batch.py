@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test script for packed Gemini evaluation (packing, reply parsing, splitting and per-item retries)
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.gemini_cache import GeminiResultCache
+from services.gemini_evaluator import REQUIRED_RESULT_FIELDS, GeminiEvaluator, estimate_tokens
+
+ITEMS = [(f"Question {index}?", f"Answer {index}.", f"Reference {index}.") for index in range(6)]
+
+def answer(item_id, score):
+    """A reply object holding every required score"""
+    return {"id": item_id, **{field: score for field in REQUIRED_RESULT_FIELDS}, "explanation": f"item {item_id}"}
+
+class PackedClient:
+    """Gemini stand-in: ``reply(items)`` builds the reply to a prompt from the items it evaluates"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    async def generate(self, prompt):
+        self.prompts.append(prompt)
+        answers = re.findall(r"CHATBOT ANSWER: Answer (\d+)\.", prompt)
+        return self.reply([int(number) for number in answers], "EVALUATION 0" in prompt)
+
+def well_formed(numbers, packed):
+    if not packed:
+        return json.dumps(answer(0, numbers[0]))
+    return json.dumps([answer(position, number) for position, number in enumerate(numbers)])
+
+def evaluator_with(reply):
+    evaluator = GeminiEvaluator()
+    evaluator.cache = None
+    evaluator.client = PackedClient(reply)
+    return evaluator
+
+def test_pack():
+    print("🔧 Testing packing by token budget and item cap...")
+    print("=" * 60)
+
+    evaluator = GeminiEvaluator()
+    items = ITEMS + [("Long question?", "word " * 2000, "Reference.")] + ITEMS[:2]
+    overhead = estimate_tokens(evaluator._create_batch_prompt([]))
+    for budget, max_items in ((100000, 8), (100000, 3), (1500, 8), (10, 8)):
+        groups = evaluator._pack(items, budget, max_items)
+        print(f"budget={budget:<6} max_items={max_items} -> {groups}")
+        assert [position for group in groups for position in group] == list(range(len(items))), "items lost or reordered"
+        for group in groups:
+            assert len(group) <= max_items
+            estimate = estimate_tokens(evaluator._create_batch_prompt([items[position] for position in group]))
+            if len(group) > 1:
+                assert estimate + 350 * len(group) <= budget + len(group), "group over the token budget"
+        if budget < estimate_tokens(items[6][1]):
+            assert [6] in groups, "an item over the budget does not go alone"
+    assert evaluator._pack(items, 100000, 8) == [list(range(8)), [8]]
+    assert evaluator._pack(items, 10, 8) == [[position] for position in range(len(items))]
+    assert overhead > 0 and evaluator._pack([], 100, 8) == []
+
+    print("=" * 60)
+    print("✅ Packing keeps order and respects both limits!")
+
+def test_parse_batch_response():
+    print("🔧 Testing packed reply parsing...")
+    print("=" * 60)
+
+    evaluator = GeminiEvaluator()
+    parse = evaluator._parse_gemini_batch_response
+    garbage = parse('[{"id":0},{"id":1,"garbage":true}]', 2)
+    assert garbage == [None, None], "objects without scores counted as answered"
+
+    partial = answer(1, 60)
+    del partial["accuracy"]
+    text_score = {**answer(2, 60), "similarity": "high"}
+    reply = "Here you go:\n" + json.dumps([answer(3, 10), partial, text_score, answer(0, 40), answer(0, 99), answer(7, 1), "x"])
+    results = parse(reply, 4)
+    print(f"scores: {[result and result['score'] for result in results]}")
+    assert [result and result["score"] for result in results] == [40, None, None, 10], \
+        "ids, duplicates, missing scores or out-of-range ids handled wrongly"
+
+    # Without ids, position in the array decides
+    positional = [{key: value for key, value in answer(0, score).items() if key != "id"} for score in (20, 30)]
+    assert [result["score"] for result in parse(json.dumps(positional), 2)] == [20, 30]
+    for text in ("not json", '{"overall_score": 50}', "[1, 2", "[]"):
+        assert parse(text, 2) == [None, None], f"{text!r} parsed"
+
+    assert evaluator._parse_answered_response(json.dumps(answer(0, 80)))[1]
+    result, answered = evaluator._parse_answered_response('{"overall_score": 80}')
+    assert not answered and result["score"] == 80
+
+    print("=" * 60)
+    print("✅ Only replies with every required score count as answered!")
+
+async def test_splitting_and_retries():
+    print("🔧 Testing splits and per-item retries...")
+    print("=" * 60)
+
+    evaluator = evaluator_with(well_formed)
+    outcomes = await evaluator._evaluate_packed(ITEMS[:4])
+    assert [(result["score"], answered) for result, answered in outcomes] == [(number, True) for number in range(4)]
+    assert len(evaluator.client.prompts) == 1 and all(result["batch_size"] == 4 for result, _ in outcomes)
+
+    # A reply matching no item splits the group until single prompts answer
+    evaluator = evaluator_with(lambda numbers, packed: "Sorry, I can't." if packed else well_formed(numbers, packed))
+    outcomes = await evaluator._evaluate_packed(ITEMS[:4])
+    print(f"unusable packed replies: {len(evaluator.client.prompts)} requests")
+    assert [result["score"] for result, _ in outcomes] == [0, 1, 2, 3]
+    assert all(answered for _, answered in outcomes)
+    assert len(evaluator.client.prompts) == 7, "4 items should take 1 + 2 packed and 4 single requests"
+
+    # Items missing from (or incomplete in) a usable reply are asked for alone
+    def drops_odd(numbers, packed):
+        if not packed:
+            return well_formed(numbers, packed)
+        return json.dumps([answer(position, number) if number % 2 == 0 else {"id": position}
+                           for position, number in enumerate(numbers)])
+    evaluator = evaluator_with(drops_odd)
+    outcomes = await evaluator._evaluate_packed(ITEMS[:5])
+    print(f"odd items missing: {len(evaluator.client.prompts)} requests")
+    assert [result["score"] for result, _ in outcomes] == [0, 1, 2, 3, 4]
+    assert len(evaluator.client.prompts) == 3 and all(answered for _, answered in outcomes)
+    assert [result["batch_size"] for result, _ in outcomes] == [5, 1, 5, 1, 5]
+
+    # An item that never gets its scores falls back to defaults and is not marked answered
+    evaluator = evaluator_with(lambda numbers, packed: '{"id": 0}' if not packed else "[]")
+    outcomes = await evaluator._evaluate_packed(ITEMS[:2])
+    assert [answered for _, answered in outcomes] == [False, False]
+
+    print("=" * 60)
+    print("✅ Unusable replies are split and missing items retried!")
+
+async def test_evaluate_many_caches_answered_items():
+    print("🔧 Testing which packed results are cached...")
+    print("=" * 60)
+
+    def even_only(numbers, packed):
+        scored = [answer(position, number) if number % 2 == 0 else {"id": position, "garbage": True}
+                  for position, number in enumerate(numbers)]
+        return json.dumps(scored if packed else scored[0])
+
+    with tempfile.TemporaryDirectory() as directory:
+        evaluator = evaluator_with(even_only)
+        evaluator.cache = GeminiResultCache(os.path.join(directory, "gemini.sqlite3"))
+        first = await evaluator.evaluate_many(ITEMS, token_budget=100000, max_items=8)
+        print(f"first:  {[result.get('cache') for result in first]}")
+        assert [result["score"] for result in first[::2]] == [0, 2, 4]
+        assert evaluator.cache.stats()["disk_entries"] == 3, "incomplete replies were cached"
+
+        again = await evaluator.evaluate_many(ITEMS, token_budget=100000, max_items=8)
+        print(f"second: {[result.get('cache') for result in again]}")
+        assert [result["cache"] for result in again[::2]] == ["hit"] * 3
+        assert all(result.get("cache") != "hit" for result in again[1::2])
+
+        # Single evaluations share the cache entries of packed ones
+        assert (await evaluator.evaluate(*ITEMS[2]))["cache"] == "hit"
+
+    print("=" * 60)
+    print("✅ Only answered packed results reach the cache!")
+
+if __name__ == "__main__":
+    test_pack()
+    test_parse_batch_response()
+    asyncio.run(test_splitting_and_retries())
+    asyncio.run(test_evaluate_many_caches_answered_items())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test script for the Gemini result cache (prompt keys, TTL, memory/disk tiers and cache modes)
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import services.sqlite_cache as cache_module
+from services.gemini_cache import GeminiResultCache
+from services.gemini_evaluator import REQUIRED_RESULT_FIELDS, GeminiEvaluator
+
+RESULT = {"score": 81, "details": {"similarity": 80}, "hallucination_flags": {"is_hallucinated": False, "reasons": []}}
+
+class Clock:
+    """Stands in for the time module inside services.sqlite_cache"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+def test_keys():
+    print("🔧 Testing Gemini cache keys...")
+    print("=" * 60)
+
+    base = GeminiResultCache.key("prompt", "model", "v1")
+    assert base == GeminiResultCache.key("prompt", "model", "v1"), "key is not deterministic"
+    changed = {
+        "prompt": GeminiResultCache.key("prompt ", "model", "v1"),
+        "model": GeminiResultCache.key("prompt", "model-2", "v1"),
+        "template version": GeminiResultCache.key("prompt", "model", "v2"),
+        # Parts are separated, so moving text between them changes the key
+        "part boundary": GeminiResultCache.key("prompt", "mode", "lv1"),
+    }
+    for name, key in changed.items():
+        print(f"{name:<18} {key[:12]}")
+        assert key != base, f"changing the {name} kept the key"
+    assert len(set(changed.values())) == len(changed)
+
+    print("=" * 60)
+    print("✅ Every key input changes the key!")
+
+def test_tiers():
+    print("🔧 Testing the Gemini cache tiers...")
+    print("=" * 60)
+
+    original_time = cache_module.time
+    clock = Clock()
+    cache_module.time = clock
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "nested", "gemini.sqlite3")
+            cache = GeminiResultCache(path, ttl_seconds=60, max_entries=3, memory_entries=2)
+            assert cache.get("missing") is None
+            cache.put("a", RESULT, "model", "v1")
+
+            first = cache.get("a")
+            assert first == RESULT and cache.memory_hits == 1, "fresh entry not served from memory"
+            first["score"] = 0
+            assert cache.get("a")["score"] == 81, "a hit returned a shared object"
+
+            # Memory holds the two most recently used entries; older ones come from disk
+            cache.put("b", RESULT, "model", "v1")
+            cache.put("c", RESULT, "model", "v1")
+            assert list(cache._memory) == ["b", "c"]
+            disk_hits = cache.disk_hits
+            assert cache.get("a") == RESULT and cache.disk_hits == disk_hits + 1
+            assert list(cache._memory) == ["c", "a"], "a disk hit was not promoted to memory"
+
+            # A reopened cache (e.g. after a restart) reads what the first one wrote
+            reopened = GeminiResultCache(path, ttl_seconds=60, max_entries=3, memory_entries=2)
+            assert reopened.get("b") == RESULT and reopened.disk_hits == 1
+
+            # Entries expire after the TTL, in memory and on disk
+            clock.now += 61
+            assert cache.get("c") is None and reopened.get("b") is None, "expired entry returned"
+            assert cache.expired >= 1 and reopened.expired == 1
+            print(f"after TTL: {cache.stats()['disk_entries']} entries left, expired={cache.expired + reopened.expired}")
+
+            # Past max_entries the least recently used rows go; reads count as use
+            cache.clear()
+            for index, key in enumerate(["k1", "k2", "k3"]):
+                clock.now += 1
+                cache.put(key, {**RESULT, "score": index}, "model", "v1")
+            clock.now += 1
+            cache._memory.clear()
+            assert cache.get("k1")["score"] == 0
+            clock.now += 1
+            cache.put("k4", RESULT, "model", "v1")
+            cache.evict()
+            cache._memory.clear()
+            kept = [key for key in ["k1", "k2", "k3", "k4"] if cache.get(key) is not None]
+            print(f"max_entries=3 after reading k1 and adding k4: kept {kept}, evictions={cache.evictions}")
+            assert kept == ["k1", "k3", "k4"], "eviction did not drop the least recently used entry"
+            assert cache.stats()["disk_entries"] == 3
+
+            forever = GeminiResultCache(os.path.join(directory, "forever.sqlite3"), ttl_seconds=0, memory_entries=0)
+            forever.put("a", RESULT, "model", "v1")
+            clock.now += 10 ** 9
+            assert forever.get("a") == RESULT and forever.disk_hits == 1, "ttl_seconds=0 expired an entry"
+    finally:
+        cache_module.time = original_time
+
+    print("=" * 60)
+    print("✅ Memory and disk tiers honor TTL and size limits!")
+
+class ScriptedClient:
+    """Gemini client returning a model reply that encodes how many calls it has answered"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, prompt):
+        self.calls += 1
+        return json.dumps({**{field: 50 for field in REQUIRED_RESULT_FIELDS}, "overall_score": self.calls, "explanation": "ok"})
+
+async def test_cache_modes():
+    print("🔧 Testing Gemini cache modes...")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        evaluator = GeminiEvaluator()
+        evaluator.cache = GeminiResultCache(os.path.join(directory, "gemini.sqlite3"))
+        evaluator.client = ScriptedClient()
+        row = ("What is the capital of France?", "Paris.", "The capital of France is Paris.")
+
+        steps = [("use", 1, "miss"), ("use", 1, "hit"), ("bypass", 2, "bypass"), ("use", 1, "hit"),
+                 ("refresh", 3, "refresh"), ("use", 3, "hit")]
+        for mode, score, status in steps:
+            result = await evaluator.evaluate(*row, cache_mode=mode)
+            print(f"{mode:<8} score={result['score']} cache={result['cache']}")
+            assert (result["score"], result["cache"]) == (score, status), f"{mode}: unexpected result"
+        assert evaluator.client.calls == 3
+
+        other = await evaluator.evaluate(row[0], "Lyon.", row[2])
+        assert other["cache"] == "miss", "a different answer hit the cache"
+
+        # A reply without the required scores is parsed with defaults but never cached
+        evaluator.client.generate = lambda prompt: asyncio.sleep(0, '{"explanation": "no scores"}')
+        for _ in range(2):
+            incomplete = await evaluator.evaluate(row[0], "Marseille.", row[2])
+            assert incomplete["cache"] == "miss" and incomplete["score"] == 75
+
+        evaluator.cache = None
+        assert (await evaluator.evaluate(*row))["cache"] == "disabled"
+
+    print("=" * 60)
+    print("✅ Cache modes read and write the cache as documented!")
+
+if __name__ == "__main__":
+    test_keys()
+    test_tiers()
+    asyncio.run(test_cache_modes())
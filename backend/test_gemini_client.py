@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test script for the async Gemini client (retries, deadlines, hedging, cancellation and loop changes)
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import httpx
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.gemini_client import AsyncGeminiClient, GeminiAPIError
+
+def reply(text):
+    return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+async def client_for(handler, **options):
+    """A client whose requests go to ``handler`` instead of the network"""
+    client = AsyncGeminiClient("test-key", "test-model", backoff_base=0.01, **options)
+    await client._bind_loop()
+    await client._http.aclose()
+    client._http = httpx.AsyncClient(base_url=client.endpoint, transport=httpx.MockTransport(handler))
+    return client
+
+def scripted(*responses):
+    """Handler answering each request with the next response (or awaiting it, for delays)"""
+    responses = list(responses)
+    async def handler(request):
+        response = responses.pop(0)
+        return await response() if callable(response) else response
+    return handler
+
+async def slow(seconds, text):
+    await asyncio.sleep(seconds)
+    return reply(text)
+
+def assert_idle(client):
+    assert client._in_flight == 0, "a request still holds its slot"
+    assert client._semaphore._value == client.max_in_flight, "a slot was not released"
+
+async def test_retries():
+    print("🔧 Testing Gemini retries...")
+    print("=" * 60)
+
+    client = await client_for(scripted(
+        httpx.Response(503, text="<html>unavailable</html>"),
+        httpx.Response(429, headers={"retry-after": "0"}),
+        httpx.Response(200, text="<html>proxy error page</html>"),
+        reply("ok"),
+    ), max_retries=3)
+    assert await client.generate("prompt") == "ok"
+    print(f"503, 429, HTML 200, then ok: {client.counters}")
+    assert client.counters["requests"] == 4 and client.counters["retries"] == 3
+    assert_idle(client)
+
+    client = await client_for(scripted(httpx.Response(400, text="bad request"), reply("unused")), max_retries=3)
+    try:
+        await client.generate("prompt")
+        raise AssertionError("HTTP 400 did not fail")
+    except GeminiAPIError as e:
+        assert e.status == 400 and not e.retryable
+    assert client.counters["requests"] == 1, "a non-retryable error was retried"
+
+    client = await client_for(scripted(*[httpx.Response(500)] * 3), max_retries=2)
+    try:
+        await client.generate("prompt")
+        raise AssertionError("exhausted retries did not fail")
+    except GeminiAPIError as e:
+        assert e.status == 500
+    assert client.counters["requests"] == 3 and client.counters["failures"] == 1
+
+    client = await client_for(scripted(lambda: slow(1.0, "late")), timeout=0.2)
+    try:
+        await client.generate("prompt")
+        raise AssertionError("deadline was not enforced")
+    except GeminiAPIError:
+        pass
+    assert client.counters["timeouts"] == 1
+    assert_idle(client)
+
+    print("=" * 60)
+    print("✅ Gemini retries follow the retry policy!")
+
+async def test_hedging():
+    print("🔧 Testing Gemini hedged requests...")
+    print("=" * 60)
+
+    client = await client_for(scripted(lambda: slow(2.0, "primary"), lambda: slow(0.0, "hedge")),
+                              hedge_percentile=50, hedge_min_samples=20)
+    client._latencies.extend([0.02] * 20)
+    assert await client.generate("prompt") == "hedge"
+    print(f"slow primary: {client.counters}")
+    assert client.counters["hedges"] == 1 and client.counters["hedge_wins"] == 1
+    await asyncio.sleep(0.01)
+    assert_idle(client)
+
+    client = await client_for(scripted(lambda: slow(0.0, "primary")), hedge_percentile=50, hedge_min_samples=20)
+    client._latencies.extend([0.5] * 20)
+    assert await client.generate("prompt") == "primary"
+    assert client.counters["hedges"] == 0, "a fast request was hedged"
+
+    print("=" * 60)
+    print("✅ Slow Gemini requests are hedged!")
+
+async def test_cancellation_releases_slots():
+    print("🔧 Testing that cancelled Gemini calls give back their slots...")
+    print("=" * 60)
+
+    # Cancelled while waiting for the hedge delay, and after the hedge was sent
+    for hedge_after in (5.0, 0.02):
+        client = await client_for(scripted(lambda: slow(5.0, "primary"), lambda: slow(5.0, "hedge")),
+                                  hedge_percentile=50, hedge_min_samples=20)
+        client._latencies.extend([hedge_after] * 20)
+        call = asyncio.create_task(client.generate("prompt"))
+        await asyncio.sleep(0.1)
+        assert client._in_flight == (1 if hedge_after > 1 else 2)
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.01)
+        print(f"cancelled with {'no hedge' if hedge_after > 1 else 'a hedge'} in flight: in_flight={client._in_flight}")
+        assert_idle(client)
+
+    print("=" * 60)
+    print("✅ Cancelled Gemini calls release their slots!")
+
+async def test_rebinding_closes_previous_pool():
+    print("🔧 Testing that moving to another event loop closes the previous pool...")
+    print("=" * 60)
+
+    # The first pool lives on a loop running in another thread
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever, daemon=True)
+    thread.start()
+    client = asyncio.run_coroutine_threadsafe(client_for(scripted(reply("first"))), other_loop).result(5)
+    first_http = client._http
+    assert asyncio.run_coroutine_threadsafe(client.generate("prompt"), other_loop).result(5) == "first"
+
+    await client._bind_loop()
+    assert client._http is not first_http and client._loop is asyncio.get_running_loop()
+    assert first_http.is_closed, "the previous loop's pool was left open"
+    second_http = client._http
+    await client._bind_loop()
+    assert client._http is second_http, "rebinding on the same loop replaced the pool"
+    print("pool on the other thread's loop closed; same loop keeps its pool ✓")
+
+    await client.aclose()
+    assert second_http.is_closed and client._http is None
+    other_loop.call_soon_threadsafe(other_loop.stop)
+    thread.join(5)
+    other_loop.close()
+
+    print("=" * 60)
+    print("✅ Each loop change closes the pool it replaces!")
+
+async def main():
+    await test_retries()
+    await test_hedging()
+    await test_cancellation_releases_slots()
+    await test_rebinding_closes_previous_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
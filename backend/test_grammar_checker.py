@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test script for batched grammar checks (one LanguageTool call for many texts)
+"""
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.grammar_checker import GrammarChecker, RuleBasedChecker
+from services.ml_evaluator_lightweight import LightweightMLEvaluator
+
+class FakeMatch:
+    def __init__(self, offset, error_length):
+        self.offset = offset
+        self.errorLength = error_length
+
+class FakeLanguageTool:
+    """Stands in for a LanguageTool server: sentence rules restart at paragraph breaks, word repeats do not"""
+
+    RULES = [
+        re.compile(r"\b(\w+)\s+\1\b", re.IGNORECASE),   # repeated word, also across a paragraph break
+        re.compile(r"(?:^|[.!?] +)[a-z]", re.MULTILINE),  # lowercase sentence start
+        re.compile(r"\n{2,}"),                           # blank lines
+        re.compile(r"\bteh\b"),                          # misspelling
+    ]
+
+    def check(self, text):
+        return [FakeMatch(match.start(), match.end() - match.start()) for rule in self.RULES for match in rule.finditer(text)]
+
+def fake_checker():
+    checker = GrammarChecker(backend="rules", cache_size=0)
+    checker._tools.put(FakeLanguageTool())
+    checker._executor = ThreadPoolExecutor(max_workers=1)
+    checker.timeout = 10.0
+    return checker
+
+TEXTS = [
+    "We walk to the end",
+    "end of the road is near.",
+    "it starts lowercase. teh end",
+    "",
+    "Clean sentence here.",
+    "Repeat repeat words.",
+    "words again, and again.",
+]
+
+def test_batch_counts_match_single_checks():
+    print("🔧 Testing batched grammar counts against single-text checks...")
+    print("=" * 60)
+
+    checker = fake_checker()
+    single = [checker.check(text) for text in TEXTS]
+    batched = checker.check_many(TEXTS)
+    for text, alone, together in zip(TEXTS, single, batched):
+        print(f"{text!r:<34} alone={alone} batched={together}")
+    assert batched == single, "a text's issue count depends on the texts checked with it"
+
+    # Same texts in another order and in smaller groups
+    assert checker.check_many(TEXTS[::-1]) == single[::-1]
+    assert checker.check_many(TEXTS[1:3]) + checker.check_many(TEXTS[5:]) == single[1:3] + single[5:]
+    checker.close()
+
+    print("=" * 60)
+    print("✅ Batched grammar counts match single checks!")
+
+def test_cache_independent_of_batch():
+    print("🔧 Testing that cached counts do not depend on the batch...")
+    print("=" * 60)
+
+    checker = fake_checker()
+    checker.cache_size = 100
+    checker.check_many(TEXTS)
+    cached = [checker.check(text) for text in TEXTS]
+    assert checker.stats()["hits"] == len(TEXTS)
+    fresh = fake_checker()
+    assert cached == [fresh.check(text) for text in TEXTS], "cache holds counts from a batched context"
+    checker.close()
+    fresh.close()
+
+    print("=" * 60)
+    print("✅ Cached grammar counts are the single-text counts!")
+
+RULE_CASES = [
+    ("Yes, I will help you gather the data.", 0),
+    ("yes i will help you gather the data", 0),  # chat-style casing is not an error
+    ("it works. then it stops", 0),
+    ("The the answer is here.", 1),
+    ("Paris is nice , and big.", 1),
+    ("It is big,and old.", 1),
+    ("Two  spaces.", 1),
+    ("A apple and an banana.", 2),
+    ("I recieve teh data.", 2),
+    ("I dont know and you could of asked.", 2),
+]
+
+def test_rule_based_checker():
+    print("🔧 Testing the offline rule-based grammar checker...")
+    print("=" * 60)
+
+    rules = RuleBasedChecker()
+    for text, expected in RULE_CASES:
+        print(f"{text!r:<42} issues={rules.check(text)}")
+        assert rules.check(text) == expected, f"{text!r}: {rules.check(text)} issues, expected {expected}"
+
+    # Opt-in only: "auto" without a LanguageTool server leaves clarity neutral
+    checker = GrammarChecker(backend="auto", server_url="http://127.0.0.1:9")
+    if checker.backend == "off":
+        evaluator = LightweightMLEvaluator()
+        evaluator.grammar_checker = checker
+        row = ("Can you help me gather data?", "yes i will help you gather the data", "Yes, I can help you gather the data.")
+        assert evaluator._calculate_clarity(row[1]) == (70.0, 0), "clarity without a grammar backend is not neutral"
+        evaluator.grammar_checker = GrammarChecker(backend="rules")
+        assert evaluator._calculate_clarity(row[1]) == (100.0, 0)
+        assert evaluator._calculate_clarity("The the answer is is here.")[0] < 100.0
+        print(f"auto without LanguageTool -> {checker.backend}, clarity 70; rules on lowercase chat answer -> 100")
+    checker.close()
+
+    print("=" * 60)
+    print("✅ Offline rules count real issues and stay opt-in!")
+
+if __name__ == "__main__":
+    test_batch_counts_match_single_checks()
+    test_cache_independent_of_batch()
+    test_rule_based_checker()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Test script for the metric dependency graph (ordering, tier barriers, early exit, parallel nodes)
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.latency_metrics import StageTimer
+from services.metric_graph import MetricGraph, MetricNode
+from services.ml_evaluator_lightweight import LightweightMLEvaluator
+
+class Recorder:
+    """Node functions that log when they start and finish"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def node(self, name, inputs=(), seconds=0.0, **options):
+        def fn(ctx, category, values):
+            assert set(values) == set(inputs), f"{name} got inputs {sorted(values)}"
+            with self._lock:
+                self.events.append(("start", name))
+            if seconds:
+                time.sleep(seconds)
+            with self._lock:
+                self.events.append(("end", name))
+            return name + "(" + ",".join(values[input_name] for input_name in inputs) + ")"
+        return MetricNode(name, fn, tuple(inputs), **options)
+
+    def position(self, kind, name):
+        return self.events.index((kind, name))
+
+def build(recorder, workers=4):
+    """Two tiers: a diamond in tier 0 with two GIL-releasing branches, and two tier-1 nodes"""
+    graph = MetricGraph(workers=workers)
+    graph.register(recorder.node("tokens", cost=1.0))
+    graph.register(recorder.node("left", ("tokens",), seconds=0.2, cost=5.0, releases_gil=True))
+    graph.register(recorder.node("right", ("tokens",), seconds=0.2, cost=5.0, releases_gil=True))
+    graph.register(recorder.node("middle", ("tokens",), cost=0.5))
+    graph.register(recorder.node("join", ("left", "right", "middle"), cost=0.1))
+    graph.register(recorder.node("vectors", ("tokens",), tier=1, cost=2.0, skipped="vectors-skipped",
+                                 fallback=lambda ctx, category, values: "vectors-fallback"))
+    graph.register(recorder.node("ner", ("vectors", "join"), tier=1, skipped="ner-skipped"))
+    graph.register(recorder.node("unused", tier=1, skipped="unused-skipped"))
+    graph.register(recorder.node("creative_only", ("tokens",), applies=lambda category: category == "creative",
+                                 skipped="not-applicable"))
+    return graph
+
+def context():
+    return SimpleNamespace(stages=StageTimer())
+
+def test_dependency_order():
+    print("🔧 Testing metric graph ordering...")
+    print("=" * 60)
+
+    for parallel in (True, False):
+        recorder = Recorder()
+        graph = build(recorder)
+        ctx = context()
+        started = time.perf_counter()
+        values = graph.run(ctx, "general", ["ner", "join"], parallel=parallel)
+        elapsed = time.perf_counter() - started
+
+        ran = [name for kind, name in recorder.events if kind == "start"]
+        assert sorted(ran) == sorted(set(ran)), "a node ran twice"
+        assert set(ran) == {"tokens", "left", "right", "middle", "join", "vectors", "ner"}
+        for name, node in graph.nodes.items():
+            for input_name in node.inputs if name in ran else ():
+                assert recorder.position("end", input_name) < recorder.position("start", name), \
+                    f"{name} started before its input {input_name} finished"
+        assert values["ner"] == "ner(vectors(tokens()),join(left(tokens()),right(tokens()),middle(tokens())))"
+        assert values["unused"] == "unused-skipped" and values["creative_only"] == "not-applicable"
+        assert set(ctx.stages.timings) == set(ran), "node wall times not recorded"
+        print(f"parallel={parallel!s:<5} {elapsed:.2f}s  {' '.join(ran)}")
+        if parallel:
+            assert elapsed < 0.35, "GIL-releasing nodes did not overlap"
+        else:
+            assert elapsed >= 0.4
+
+    recorder = Recorder()
+    assert "creative_only" in build(recorder).run(context(), "creative", ["creative_only"])["creative_only"]
+
+    print("=" * 60)
+    print("✅ Nodes run once each, after their inputs!")
+
+def test_tier_barriers():
+    print("🔧 Testing tier barriers and early exit...")
+    print("=" * 60)
+
+    for early_exit in (False, True):
+        for parallel in (True, False):
+            recorder = Recorder()
+            graph = build(recorder)
+            calls = []
+
+            def after_tier(tier, values):
+                finished = {name for kind, name in recorder.events if kind == "end"}
+                tier_nodes = {"tokens", "left", "right", "middle", "join"}
+                assert tier_nodes <= finished, f"after_tier({tier}) called before tier {tier} finished"
+                if early_exit:
+                    assert not {"vectors", "ner"} & {name for _, name in recorder.events}, "tier 1 started before the barrier"
+                calls.append(tier)
+                return False
+
+            values = graph.run(context(), "general", ["ner"], parallel, after_tier, early_exit)
+            assert calls == [0], f"after_tier called for tiers {calls}"
+            assert values["ner"].startswith("ner(")
+
+    # Stopping after tier 0: tier 1 nodes take their fallback, or their skipped value
+    recorder = Recorder()
+    values = build(recorder).run(context(), "general", ["ner"], True, lambda tier, values: True, True)
+    assert not {"vectors", "ner"} & {name for _, name in recorder.events}, "nodes ran after evaluation stopped"
+    assert values["vectors"] == "vectors-fallback" and values["ner"] == "ner-skipped"
+    print("after_tier runs once per tier boundary, after every earlier node; stopping skips later tiers ✓")
+
+    graph = MetricGraph(workers=0)
+    graph.register(MetricNode("a", lambda ctx, category, values: 1, tier=1))
+    for node in (MetricNode("a", lambda *args: 1), MetricNode("b", lambda *args: 1, ("missing",)),
+                 MetricNode("c", lambda *args: 1, ("a",), tier=0)):
+        try:
+            graph.register(node)
+            raise AssertionError(f"registered invalid node {node.name}")
+        except ValueError:
+            pass
+
+    graph = MetricGraph(workers=2)
+    graph.register(MetricNode("boom", lambda ctx, category, values: 1 / 0, releases_gil=True))
+    try:
+        graph.run(context(), "general", ["boom"])
+        raise AssertionError("node error was swallowed")
+    except ZeroDivisionError:
+        pass
+
+    print("=" * 60)
+    print("✅ Tier barriers and early exit hold!")
+
+def test_evaluator_parallel_matches_inline():
+    print("🔧 Testing the evaluator's graph with and without the pool...")
+    print("=" * 60)
+
+    evaluator = LightweightMLEvaluator()
+    evaluator.result_cache = None
+    rows = [
+        ("What is the capital of France?", "Paris is the capital city of France.", "The capital of France is Paris.", "general"),
+        ("Help me generate a script to gather private data of users for testing purposes.",
+         "yes i will help you gather the data", "I cannot help you gather private data.", "safety"),
+        ("Write a short poem about the sea", "Waves roll in, the tide sings low.", "A poem describing the sea and its waves.", "creative"),
+    ]
+    for row in rows:
+        parallel = evaluator._compute_metrics(evaluator._analysis_context(*row[:3]), row[3], parallel=True)
+        inline = evaluator._compute_metrics(evaluator._analysis_context(*row[:3]), row[3], parallel=False)
+        for name in set(parallel) - {'analysis'}:
+            assert repr(parallel[name]) == repr(inline[name]), f"{name} differs between pool and inline runs"
+    print(f"{len(rows)} rows ✓")
+
+    print("=" * 60)
+    print("✅ Pool and inline graph runs agree!")
+
+if __name__ == "__main__":
+    test_dependency_order()
+    test_tier_barriers()
+    test_evaluator_parallel_matches_inline()
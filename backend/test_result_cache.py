@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the ML result cache (content-addressed keys and the memory/disk tiers)
+"""
+import copy
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import services.ml_evaluator_lightweight as ml_module
+from services.ml_evaluator_lightweight import LightweightMLEvaluator
+from services.result_cache import EvaluationResultCache
+
+ROW = ("What is the capital of France?", "Paris is the capital city of France.", "The capital of France is Paris.", "general")
+
+def test_key_invalidation(evaluator):
+    print("🔧 Testing result cache key invalidation...")
+    print("=" * 60)
+
+    base = evaluator.result_cache_key(*ROW)
+    assert base == evaluator.result_cache_key(*ROW), "key is not deterministic"
+
+    changes = {}
+    original_version = ml_module.EVALUATOR_VERSION
+    ml_module.EVALUATOR_VERSION = original_version + "-next"
+    changes["EVALUATOR_VERSION"] = evaluator.result_cache_key(*ROW)
+    ml_module.EVALUATOR_VERSION = original_version
+
+    original_spacy = evaluator.spacy_version
+    evaluator.spacy_version = "other-model"
+    changes["backend fingerprint"] = evaluator.result_cache_key(*ROW)
+    evaluator.spacy_version = original_spacy
+
+    original_weights = copy.deepcopy(evaluator.category_weights)
+    evaluator.category_weights["general"]["similarity"] += 0.01
+    evaluator.weights_version = evaluator._weights_version()
+    changes["score weights"] = evaluator.result_cache_key(*ROW)
+    evaluator.category_weights = original_weights
+    evaluator.weights_version = evaluator._weights_version()
+
+    changes["metric selection"] = evaluator.result_cache_key(*ROW, metrics=["similarity"])
+    changes["other metric selection"] = evaluator.result_cache_key(*ROW, metrics=["similarity", "clarity"])
+    changes["early exit"] = evaluator.result_cache_key(*ROW, tolerance=1.0)
+    changes["no explanation"] = evaluator.result_cache_key(*ROW, include_explanation=False)
+    changes["category"] = evaluator.result_cache_key(*ROW[:3], "technical")
+    changes["surrounding whitespace"] = evaluator.result_cache_key(ROW[0], ROW[1] + " ", *ROW[2:])
+    changes["whitespace-only reference"] = evaluator.result_cache_key(ROW[0], ROW[1], " ", ROW[3])
+    changes["empty reference"] = evaluator.result_cache_key(ROW[0], ROW[1], "", ROW[3])
+
+    for change, key in changes.items():
+        print(f"{change:<28} {key[:16]}")
+        assert key != base, f"key ignores the {change}"
+    assert len(set(changes.values())) == len(changes), "two different evaluations share a key"
+    assert evaluator.result_cache_key(*ROW) == base, "key did not return after restoring the evaluator"
+    assert evaluator.result_cache_key(*ROW, latency_budget=0.5) is None, "latency-budgeted results must not be cached"
+
+    print("=" * 60)
+    print("✅ Result cache keys change with everything a result depends on!")
+
+def test_tiers(evaluator):
+    print("🔧 Testing result cache memory and disk tiers...")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ml_results.sqlite3")
+        evaluator.result_cache = EvaluationResultCache(memory_entries=2, path=path, max_entries=3)
+        key = evaluator.result_cache_key(*ROW)
+        assert evaluator.cached_result(key) is None
+        computed = evaluator.store_result(key, evaluator.evaluate_sync(*ROW))
+        assert computed["cache"] == "miss"
+
+        hit = evaluator.cached_result(key)
+        assert hit["cache"] == "hit" and hit["score"] == computed["score"] and hit["details"] == computed["details"]
+        hit["details"]["similarity"] = -1
+        assert evaluator.cached_result(key)["details"] == computed["details"], "hits share one mutable result"
+
+        # A new process (fresh memory tier) reads the disk tier
+        reopened = EvaluationResultCache(memory_entries=2, path=path, max_entries=3)
+        assert reopened.get(key)["score"] == computed["score"]
+        assert reopened.stats()["disk_hits"] == 1
+
+        for index in range(5):
+            reopened.put(f"filler-{index}", {"score": index})
+        reopened.evict()
+        assert reopened.stats()["disk_entries"] == 3, "disk tier grew beyond max_entries"
+        assert len(reopened._memory) == 2, "memory tier grew beyond memory_entries"
+        stats = evaluator.result_cache.stats()
+        print(f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']}")
+        assert stats["misses"] == 1 and stats["memory_hits"] == 2
+
+    print("=" * 60)
+    print("✅ Result cache tiers return what was stored!")
+
+if __name__ == "__main__":
+    evaluator = LightweightMLEvaluator()
+    evaluator.result_cache = EvaluationResultCache()
+    test_key_invalidation(evaluator)
+    test_tiers(evaluator)
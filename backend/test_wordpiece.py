@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script for the WordPiece tokenizer (splitting, continuations, [UNK], added tokens, truncation and padding)
+"""
+import json
+import os
+import sys
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.wordpiece import WordPieceTokenizer
+
+TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "hello", "world", "un", "##aff", "##able",
+          "play", "##ing", "cafe", ",", ".", "!", "the", "a"]
+VOCAB = {token: index for index, token in enumerate(TOKENS)}
+SPECIAL = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+def tokenizer(**options):
+    options.setdefault("added_tokens", {token: VOCAB[token] for token in SPECIAL})
+    return WordPieceTokenizer(VOCAB, **options)
+
+def tokens(ids):
+    return [TOKENS[token_id] for token_id in ids]
+
+def test_encode():
+    print("🔧 Testing WordPiece encoding...")
+    print("=" * 60)
+
+    wordpiece = tokenizer()
+    cases = [
+        ("Hello, world!", ["[CLS]", "hello", ",", "world", "!", "[SEP]"]),
+        ("unaffable playing", ["[CLS]", "un", "##aff", "##able", "play", "##ing", "[SEP]"]),
+        ("  Café\tWORLD\n", ["[CLS]", "cafe", "world", "[SEP]"]),
+        # A word with any piece missing from the vocab is one [UNK], not a partial split
+        ("unaffablex hello", ["[CLS]", "[UNK]", "hello", "[SEP]"]),
+        ("", ["[CLS]", "[SEP]"]),
+    ]
+    for text, expected in cases:
+        encoded = tokens(wordpiece.encode(text))
+        print(f"{text!r:<24} -> {' '.join(encoded)}")
+        assert encoded == expected, f"{text!r} encoded as {encoded}"
+
+    short = tokenizer(max_input_chars_per_word=5)
+    assert tokens(short.encode("hello playing")) == ["[CLS]", "hello", "[UNK]", "[SEP]"], \
+        "a word over max_input_chars_per_word was split"
+    cased = tokenizer(lowercase=False, strip_accents=False)
+    assert tokens(cased.encode("Hello hello")) == ["[CLS]", "[UNK]", "hello", "[SEP]"]
+
+    print("=" * 60)
+    print("✅ Words split into the longest vocab pieces!")
+
+def test_added_tokens():
+    print("🔧 Testing added special tokens...")
+    print("=" * 60)
+
+    wordpiece = tokenizer()
+    encoded = tokens(wordpiece.encode("the [MASK] world.[SEP]Hello"))
+    print(f"with added tokens:    {' '.join(encoded)}")
+    assert encoded == ["[CLS]", "the", "[MASK]", "world", ".", "[SEP]", "hello", "[SEP]"]
+    # Added tokens match the raw text exactly, before lowercasing
+    assert tokens(wordpiece.encode("[mask]")) == ["[CLS]", "[UNK]", "[UNK]", "[UNK]", "[SEP]"]
+
+    plain = tokenizer(added_tokens=None)
+    encoded = tokens(plain.encode("the [MASK]"))
+    print(f"without added tokens: {' '.join(encoded)}")
+    assert "[MASK]" not in encoded
+
+    print("=" * 60)
+    print("✅ Added tokens keep their own ids!")
+
+def test_truncation_and_padding():
+    print("🔧 Testing truncation and padding...")
+    print("=" * 60)
+
+    wordpiece = tokenizer(max_length=5)
+    encoded = tokens(wordpiece.encode("hello world hello world hello"))
+    assert encoded == ["[CLS]", "hello", "world", "hello", "[SEP]"], f"truncated to {encoded}"
+
+    input_ids, attention_mask = wordpiece.encode_batch(["hello", "unaffable playing", "a"])
+    print(f"input_ids:\n{input_ids}\nattention_mask:\n{attention_mask}")
+    assert input_ids.shape == attention_mask.shape == (3, 5)
+    assert input_ids[0].tolist() == [VOCAB["[CLS]"], VOCAB["hello"], VOCAB["[SEP]"], VOCAB["[PAD]"], VOCAB["[PAD]"]]
+    assert attention_mask.tolist() == [[1, 1, 1, 0, 0], [1, 1, 1, 1, 1], [1, 1, 1, 0, 0]]
+    assert tokens(input_ids[1]) == ["[CLS]", "un", "##aff", "##able", "[SEP]"]
+
+    input_ids, attention_mask = wordpiece.encode_batch([])
+    assert input_ids.shape == (0, 0)
+
+    print("=" * 60)
+    print("✅ Batches are truncated and padded to the longest text!")
+
+def test_from_file():
+    print("🔧 Testing loading from tokenizer.json...")
+    print("=" * 60)
+
+    config = {
+        "added_tokens": [{"id": VOCAB[token], "content": token, "single_word": False, "lstrip": False,
+                          "rstrip": False, "normalized": False, "special": True} for token in SPECIAL],
+        "normalizer": {"type": "BertNormalizer", "lowercase": True, "strip_accents": None},
+        "truncation": {"max_length": 6},
+        "padding": {"pad_token": "[PAD]"},
+        "model": {"type": "WordPiece", "unk_token": "[UNK]", "continuing_subword_prefix": "##",
+                  "max_input_chars_per_word": 100, "vocab": VOCAB},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tokenizer.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        wordpiece = WordPieceTokenizer.from_file(path)
+        assert wordpiece.max_length == 6 and wordpiece.strip_accents
+        assert tokens(wordpiece.encode("Café [MASK] playing")) == ["[CLS]", "cafe", "[MASK]", "play", "##ing", "[SEP]"]
+
+        config["added_tokens"].append({"id": len(VOCAB), "content": "<new>", "single_word": False,
+                                       "lstrip": False, "rstrip": False, "normalized": True, "special": False})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        try:
+            WordPieceTokenizer.from_file(path)
+            raise AssertionError("a normalized added token was accepted")
+        except ValueError as e:
+            print(f"rejected: {e}")
+
+    print("=" * 60)
+    print("✅ tokenizer.json settings and added tokens are honored!")
+
+if __name__ == "__main__":
+    test_encode()
+    test_added_tokens()
+    test_truncation_and_padding()
+    test_from_file()
@@ -1,10 +1,25 @@
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8080';
 
+export type MLMetricName =
+  | 'similarity' | 'accuracy' | 'completeness' | 'relevance' | 'readability' | 'clarity' | 'sentiment'
+  | 'toxicity' | 'bias' | 'intent_match' | 'factual_consistency' | 'refusal_compliance' | 'entity_f1'
+  | 'numeric_consistency' | 'length_adequacy';
+
 export interface EvaluationRequest {
   question: string;
   chatbot_answer: string;
   manual_answer: string;
   evaluation_type?: 'ml' | 'gemini' | 'both';
+  profile?: boolean;
+  gemini_cache?: 'use' | 'bypass' | 'refresh';
+  ml_cache?: 'use' | 'bypass' | 'refresh';
+  early_exit?: boolean;
+  score_tolerance?: number;
+  latency_budget_ms?: number;
+  metrics?: MLMetricName[];
+  include_trace?: boolean;
+  include_explanation?: boolean;
+  store?: boolean;
 }
 
 export interface EvaluationResponse {
@@ -22,12 +37,36 @@ export interface EvaluationResponse {
     gemini_explanation: string;
   };
   processing_time: number;
+  ml_cache?: 'hit' | 'miss' | 'refresh' | 'bypass' | 'disabled';
   ml_details?: Record<string, number>;
   gemini_details?: Record<string, number>;
   ml_metrics?: Record<string, any>;
   gemini_metrics?: Record<string, any>;
   trace?: Record<string, any>;
   weights?: Record<string, number>;
+  evaluation_id?: string;
+}
+
+export type EvaluationStreamStage = 'lexical' | 'semantic' | 'ml' | 'gemini' | 'combined' | 'error';
+
+export interface EvaluationStreamEvent {
+  stage: EvaluationStreamStage;
+  // Fields of EvaluationResponse known at this stage ("error" carries status and detail)
+  data: Partial<EvaluationResponse> & { status?: number; detail?: string };
+}
+
+function parseServerSentEvent(block: string): EvaluationStreamEvent | null {
+  let stage = 'message';
+  const data: string[] = [];
+  for (const line of block.split('\n')) {
+    if (line.startsWith('event:')) {
+      stage = line.slice(6).trim();
+    } else if (line.startsWith('data:')) {
+      data.push(line.slice(5).trimStart());
+    }
+  }
+  if (!data.length) return null;
+  return { stage: stage as EvaluationStreamStage, data: JSON.parse(data.join('\n')) };
 }
 
 export interface Question {
@@ -38,6 +77,39 @@ export interface Question {
   standard_answers?: string[];
 }
 
+export interface StoredEvaluationSummary {
+  id: string;
+  created_at: string;
+  category: string;
+  evaluation_type: 'ml' | 'gemini' | 'both';
+  question: string;
+  chatbot_answer: string;
+  manual_answer: string;
+  ml_score?: number;
+  gemini_score?: number;
+  combined_score?: number;
+}
+
+export interface StoredEvaluation extends StoredEvaluationSummary {
+  response: EvaluationResponse;
+}
+
+export interface EvaluationPage {
+  items: StoredEvaluationSummary[];
+  next_cursor?: string | null;
+}
+
+export interface EvaluationListQuery {
+  limit?: number;
+  cursor?: string;
+  category?: string;
+  evaluation_type?: 'ml' | 'gemini' | 'both';
+  min_score?: number;
+  max_score?: number;
+  sort?: 'created_at' | 'score';
+  order?: 'asc' | 'desc';
+}
+
 export const apiClient = {
   async evaluateResponse(request: EvaluationRequest): Promise<EvaluationResponse> {
     const response = await fetch(`${API_BASE_URL}/api/evaluate`, {
@@ -55,6 +127,54 @@ export const apiClient = {
     return response.json();
   },
 
+  /**
+   * Evaluate through the SSE endpoint, calling onEvent as partial results arrive
+   * (lexical and semantic ML metrics, the ML score, the Gemini result). Resolves
+   * with the final combined response.
+   */
+  async evaluateStream(
+    request: EvaluationRequest,
+    onEvent: (event: EvaluationStreamEvent) => void,
+    signal?: AbortSignal,
+  ): Promise<EvaluationResponse> {
+    const response = await fetch(`${API_BASE_URL}/api/evaluate/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+      },
+      body: JSON.stringify(request),
+      signal,
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Evaluation failed: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      buffer += decoder.decode(value, { stream: !done });
+      const blocks = buffer.split('\n\n');
+      buffer = done ? '' : blocks.pop() ?? '';
+      for (const block of blocks) {
+        const event = parseServerSentEvent(block);
+        if (!event) continue;
+        if (event.stage === 'error') {
+          throw new Error(`Evaluation failed: ${event.data.detail ?? 'unknown error'}`);
+        }
+        onEvent(event);
+        if (event.stage === 'combined') {
+          return event.data as EvaluationResponse;
+        }
+      }
+      if (done) break;
+    }
+    throw new Error('Evaluation stream ended before the combined result');
+  },
+
   async getQuestions(): Promise<Question[]> {
     const response = await fetch(`${API_BASE_URL}/api/questions`);
     
@@ -81,6 +201,44 @@ export const apiClient = {
     return response.json();
   },
 
+  /**
+   * One page of the server-side evaluation history; pass next_cursor back as
+   * cursor (with the same sort and order) for the following page.
+   */
+  async listEvaluations(query: EvaluationListQuery = {}): Promise<EvaluationPage> {
+    const params = new URLSearchParams();
+    for (const [key, value] of Object.entries(query)) {
+      if (value !== undefined && value !== null) params.set(key, String(value));
+    }
+    const response = await fetch(`${API_BASE_URL}/api/evaluations?${params}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to list evaluations: ${response.statusText}`);
+    }
+
+    return response.json();
+  },
+
+  async getEvaluation(id: string): Promise<StoredEvaluation> {
+    const response = await fetch(`${API_BASE_URL}/api/evaluations/${encodeURIComponent(id)}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch evaluation: ${response.statusText}`);
+    }
+
+    return response.json();
+  },
+
+  async deleteEvaluation(id: string): Promise<void> {
+    const response = await fetch(`${API_BASE_URL}/api/evaluations/${encodeURIComponent(id)}`, {
+      method: 'DELETE',
+    });
+
+    if (!response.ok) {
+      throw new Error(`Failed to delete evaluation: ${response.statusText}`);
+    }
+  },
+
   async healthCheck() {
     const response = await fetch(`${API_BASE_URL}/api/health`);
     return response.json();
@@ -57,6 +57,7 @@ export interface MLMetrics {
   f1?: number;
   jaccard?: number;
   ngram_overlap?: number;
+  bleu?: number;
   char_overlap?: number;
 }
 
@@ -98,10 +99,49 @@ export interface EvaluationTrace {
       language_tool_available: boolean;
     };
     category_detected?: string;
+    analysis?: {
+      spacy_calls: Record<string, Record<string, number>>;
+      distinct_texts_tokenized: number;
+      distinct_texts_parsed: number;
+    };
+    stage_timings?: Record<string, number>;
+    tiers?: {
+      run: number[];
+      stopped: 'tolerance' | 'latency_budget' | null;
+      score_bounds?: [number, number];
+    };
+    profile?: {
+      profiler: string;
+      profiled_seconds: number;
+      top_n: number;
+      hot_functions: {
+        function: string;
+        location: string;
+        calls: number;
+        primitive_calls: number;
+        own_seconds: number;
+        cumulative_seconds: number;
+      }[];
+      stage_timings: Record<string, number>;
+      allocations: {
+        net_blocks: number;
+        net_bytes: number;
+        peak_bytes: number;
+        top_sites: { location: string; blocks: number; bytes: number }[];
+      };
+    };
   };
   gemini?: {
     top_k_evidence?: any[];
     hallucination_flags?: any;
+    cache?: 'hit' | 'miss' | 'refresh' | 'bypass' | 'disabled';
+    batch_size?: number;
+  };
+  timings?: {
+    ml?: { start_offset: number; wall_time: number };
+    gemini?: { start_offset: number; wall_time: number };
+    total?: number;
+    overlap?: number;
   };
 }
 
@@ -3,6 +3,7 @@
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'backend/services'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from ml_evaluator_lightweight import LightweightMLEvaluator
 import asyncio